@@ -1,26 +1,152 @@
 import os
-import webbrowser
-import requests
+import errno
 import io
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, StringVar, scrolledtext
-from PIL import Image, ImageTk
-from mutagen import File, MutagenError
-from mutagen.mp3 import MP3
-from mutagen.id3 import ID3, APIC
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Tuple, Optional, Union
+from enum import IntEnum
 import locale
 import sys
+import time
+import argparse
+import sqlite3
+import select
+import signal
+import struct
+import json
+import bisect
+import contextlib
+import queue
+import threading
+import tempfile
+import shutil
+import fnmatch
+import itertools
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+# 图形界面相关模块 (tkinter、PIL、requests) 以及 mutagen 都在首次使用时才导入,
+# 命令行模式不会加载图形界面依赖。界面模块由 _import_gui_modules() 注入到模块全局。
+tk = ttk = filedialog = messagebox = StringVar = scrolledtext = webbrowser = None
 
 
 ICON_PATH = "icon.ico"
 GITHUB_ICON_URL = "https://github.githubassets.com/images/modules/logos_page/GitHub-Mark.png"
+GITHUB_ICON_PATH = "github.png"  # 随程序分发的图标, 不存在时使用磁盘缓存或在后台下载
+GITHUB_ICON_SIZE = (24, 24)
 GITHUB_PROFILE_URL = "https://github.com/SorakageMeiou"
 GITHUB_WIKI_URL = "https://github.com/SorakageMeiou/AudioCoverRemover/wiki"
 AUTHOR_EMAIL = "sorakagemo@qq.com"
 
-AUDIO_EXTENSIONS = ('.mp3', '.flac', '.wav', '.aiff', '.ape', '.ogg', '.alac', '.wv', '.mpc')
+AUDIO_EXTENSIONS = ('.mp3', '.flac', '.wav', '.aiff', '.ape', '.ogg', '.alac', '.wv', '.mpc',
+                    '.m4a', '.mp4', '.aac')
+AUDIO_EXTENSION_SET = frozenset(AUDIO_EXTENSIONS)
+
+ID3_HEADER_SIZE = 10
+ID3_FLAG_UNSYNC = 0x80
+ID3_FLAG_EXTENDED = 0x40
+ID3_FLAG_FOOTER = 0x10
+MP3_SYNC_SEARCH_SIZE = 4096  # ID3v2 标签之后读取的字节数, 帧同步字之前只允许有零填充
+
+FLAC_BLOCK_PADDING = 1
+FLAC_BLOCK_PICTURE = 6
+FLAC_MAX_BLOCK_SIZE = (1 << 24) - 1
+
+VORBIS_PICTURE_KEYS = ('metadata_block_picture', 'coverart', 'coverartmime')
+VORBIS_KEY_PROBE_SIZE = 32  # 判断注释字段名时只读取每条注释的开头
+OGG_PAGE_HEADER_SIZE = 27
+
+IFF_EXTENSIONS = ('.wav', '.aiff')  # RIFF/AIFF 容器中的 'id3 ' / 'ID3 ' 块
+IFF_HEADER_SIZE = 12                # 'RIFF'/'FORM' + 长度 + 格式类型
+IFF_CHUNK_HEADER_SIZE = 8
+
+APEV2_EXTENSIONS = ('.ape', '.wv', '.mpc')  # APEv2 标签位于文件末尾 (可能后跟 ID3v1)
+APEV2_FOOTER_SIZE = 32
+APEV2_VERSION = 2000
+APEV2_FLAG_HAS_HEADER = 1 << 31
+APEV2_ITEM_BINARY = 1               # 项目标志位 1-2 表示值的类型
+APEV2_KEY_PROBE_SIZE = 256          # 项目键最长 255 字节
+ID3V1_SIZE = 128
+
+MP4_EXTENSIONS = ('.m4a', '.mp4', '.aac')  # .aac 可能是 MP4 容器, 也可能是裸 ADTS 流
+MP4_ATOM_HEADER_SIZE = 8
+MP4_TAG_PATH = (b'moov', b'udta', b'meta', b'ilst')
+MP4_COVER_MIMES = {13: 'image/jpeg', 14: 'image/png', 27: 'image/bmp'}  # data 原子的类型标志
+
+APIC_HEAD_SIZE = 1024    # 解析 APIC 帧的编码、MIME 和描述时读取的长度
+IMAGE_HEAD_SIZE = 64 * 1024  # 读取图片尺寸时最多读取的图片开头 (JPEG 的 EXIF 段可能较大)
+
+DOWNSCALE_MAX_KB = 500     # 缩小模式下保留的封面大小上限
+DOWNSCALE_MAX_PX = 1000    # 缩小模式下保留的封面最长边上限
+DOWNSCALE_QUALITY = 85     # 重新编码的 JPEG 质量
+DOWNSCALE_CACHE_ENTRIES = 256  # 按图片哈希缓存的缩小结果数量 (同一专辑的封面只编码一次)
+RESIZE_ATTEMPTS = 4        # 编码后仍超出大小上限时最多再缩小几次
+RESIZE_STEP = 0.75
+RESIZE_MIN_PX = 128
+
+MEMORY_BUDGET = 32 * 1024 * 1024  # 标签超过此大小时不用 mutagen 读入内存, 改为按偏移跳过图片
+
+PROBE_BUFFER_SIZE = 16 * 1024  # 预检时的读缓冲, 通常一次读取即可覆盖整个标签头部
+
+COPY_CHUNK_SIZE = 1024 * 1024
+FICLONE = 0x40049409  # Linux reflink ioctl
+
+MANIFEST_BATCH_SIZE = 1000      # 处理记录每积累多少条提交一次
+MANIFEST_BATCH_INTERVAL = 5.0   # 或距上次提交超过多少秒
+
+SCHED_WINDOW = 20        # 自动调整并发数时每个观察窗口的文件数
+SCHED_DECREASE = 0.75    # 耗时超出目标时并发数的缩减比例
+SCHED_MIN_GAIN = 1.05    # 吞吐量至少提升这么多才继续增加并发
+SCHED_READAHEAD = 1000   # 按设备限制并发时最多预先取出的文件数
+
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_DEFAULT_LEVEL = 7
+IOPRIO_CLASSES = {'be': 2, 'idle': 3}
+IOPRIO_SET_SYSCALLS = {'x86_64': 251, 'i686': 289, 'aarch64': 30, 'armv7l': 314,
+                       'ppc64le': 273, 's390x': 282, 'riscv64': 30}
+
+ANALYZE_CHUNK_SIZE = 64  # 分析模式下每次提交给工作进程的文件数
+ANALYSIS_FIELDS = ('path', 'format', 'pictures', 'picture_bytes', 'dimensions', 'mime_types', 'method', 'error')
+ANALYSIS_TOTAL_FIELDS = ('format', 'files', 'files_with_pictures', 'pictures', 'picture_bytes', 'errors')
+
+ASYNC_PREFETCH_SIZE = 64 * 1024  # 异步模式下每个文件预读的字节数, 足以覆盖大多数不含封面的标签
+ASYNC_READ_CONCURRENCY = 32      # 异步模式下同时进行的元数据读取数
+ASYNC_WRITE_CONCURRENCY = 8      # 异步模式下同时进行的修改数
+
+JOURNAL_DIR = '.acr-journal'  # --safe-writes 的重做日志目录
+JOURNAL_OWNER = 'owner'       # 日志目录中加锁的文件, 记录持有目录的主机名和进程号
+SYNC_BATCH_SIZE = 100         # --safe-writes 每积累多少个文件落盘一次
+SYNC_BATCH_INTERVAL = 5.0     # 或距上次落盘超过多少秒
+TEMP_PREFIX = '.acr-tmp.'     # 需要重写的文件先处理同目录下的临时副本, 扫描时忽略
+JOURNAL_SAMPLE_SIZE = 4096    # 日志校验清零区域时读取的开头和结尾字节数
+
+LOCK_TIMEOUT = 600.0  # 分片接管时, 超过此时间没有刷新的锁视为节点已退出; 持有的锁每隔其 1/4 刷新一次
+LOCK_CLOCK_INTERVAL = 60.0  # 重新测量锁目录所在文件系统的时钟的间隔
+
+WATCH_SETTLE_SECONDS = 2.0   # 文件在多长时间内没有变化才被处理
+WATCH_POLL_INTERVAL = 5.0    # 不支持 inotify 时的扫描间隔
+WATCH_BATCH_SIZE = 1000      # 一批最多处理的文件数
+WATCH_DONE_LIMIT = 100000    # 记住多少个已处理文件的状态, 用于忽略自身写入产生的事件
+
+INOTIFY_READ_SIZE = 64 * 1024
+INOTIFY_EVENT_SIZE = 16  # struct inotify_event 的固定部分
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # 阶段耗时直方图上界 (秒)
+PROMETHEUS_WRITE_INTERVAL = 10.0  # Prometheus 文本文件的最短重写间隔
+PROFILE_TOP_FUNCTIONS = 25        # --profile 结束时打印的函数数量
+
+LOG_MAX_LINES = 2000        # 日志控件中保留的最大行数, 完整日志写入临时文件
+LOG_POLL_INTERVAL_MS = 100  # 界面从结果队列取数据的间隔
+LOG_BATCH_LIMIT = 5000      # 每次刷新最多处理的结果数量
 
 # ====== 多语言支持 ======
 class I18N:
@@ -69,6 +195,8 @@ class I18N:
                 'unsupported_format': '不支持的音频格式',
                 'no_metadata': '没有找到元数据',
                 'metadata_cleared': '元数据已清除',
+                'cover_resized': '封面已缩小',
+                'cover_kept': '封面无需缩小',
                 'process_error': '处理时出错: {}',
                 'id3_error': 'ID3标签处理失败: {}',
                 'audio_error': '音频标签处理失败: {}',
@@ -76,7 +204,25 @@ class I18N:
                 'output_dir': '输出目录:',
                 'browse': '浏览',
                 'scan_subdir': '包含子目录',
-                'drag_drop': '或将文件拖放到此处'
+                'drag_drop': '或将文件拖放到此处',
+                'in_place': '原地修改 (不重写整个文件)',
+                'no_audio_files': '没有找到音频文件',
+                'cli_description': '批量移除音频文件中的封面图片',
+                'cli_summary': '共 {} 个文件, 成功 {}, 失败 {}, 用时 {:.1f} 秒 ({:.1f} 个/秒)',
+                'cli_skipped': '跳过 {} 个未变化的文件',
+                'manifest_pruned': '已从处理记录中删除 {} 个不存在的文件',
+                'manifest_merged': '已合并 {} 个分片记录: 共 {} 个文件, 成功 {} 个, 失败 {} 个',
+                'journal_recovered': '恢复完成: 重放 {} 批修改, 回滚 {} 批, 删除 {} 个临时文件',
+                'journal_busy': '日志目录 {} 正被另一个运行使用 ({}), 请等它结束后再运行',
+                'cancel': '取消',
+                'cancelled': '已取消',
+                'save_log': '保存日志',
+                'log_files': '日志文件',
+                'progress_stats': '{}/{} · {:.1f} 个/秒 · 剩余 {}',
+                'watch_started': '正在监视 {} 个目录, 按 Ctrl+C 停止',
+                'watch_stopped': '已停止监视: 共处理 {} 个文件, 失败 {}',
+                'watch_polling': '无法使用 inotify ({}), 改为定期扫描',
+                'watch_add_failed': '无法监视目录 {}: {}'
             },
             'en_US': {
                 'app_title': 'Audio Cover Remover v1.1',
@@ -103,6 +249,8 @@ class I18N:
                 'unsupported_format': 'Unsupported audio format',
                 'no_metadata': 'No metadata found',
                 'metadata_cleared': 'Metadata cleared',
+                'cover_resized': 'Cover downscaled',
+                'cover_kept': 'Cover already within limits',
                 'process_error': 'Processing error: {}',
                 'id3_error': 'ID3 tag error: {}',
                 'audio_error': 'Audio tag error: {}',
@@ -110,140 +258,3718 @@ class I18N:
                 'output_dir': 'Output Directory:',
                 'browse': 'Browse',
                 'scan_subdir': 'Include subdirectories',
-                'drag_drop': 'or drag and drop files here'
+                'drag_drop': 'or drag and drop files here',
+                'in_place': 'Edit in place (no full rewrite)',
+                'no_audio_files': 'No audio files found',
+                'cli_description': 'Remove embedded cover art from audio files in batch',
+                'cli_summary': '{} files, {} succeeded, {} failed in {:.1f}s ({:.1f} files/s)',
+                'cli_skipped': 'Skipped {} unchanged files',
+                'manifest_pruned': 'Removed {} missing files from the manifest',
+                'manifest_merged': 'Merged {} shard manifests: {} files, {} succeeded, {} failed',
+                'journal_recovered': 'Recovery done: replayed {} batches, rolled back {}, removed {} temporary files',
+                'journal_busy': 'Journal directory {} is in use by another run ({}); wait for it to finish',
+                'cancel': 'Cancel',
+                'cancelled': 'Cancelled',
+                'save_log': 'Save Log',
+                'log_files': 'Log Files',
+                'progress_stats': '{}/{} · {:.1f} files/s · ETA {}',
+                'watch_started': 'Watching {} folder(s), press Ctrl+C to stop',
+                'watch_stopped': 'Stopped watching: {} files processed, {} failed',
+                'watch_polling': 'inotify unavailable ({}), falling back to polling',
+                'watch_add_failed': 'Cannot watch folder {}: {}'
             },
         }
 
-    def add_observer(self, callback):
-        """添加语言变更观察者"""
-        self.observers.append(callback)
+    def add_observer(self, callback):
+        """添加语言变更观察者"""
+        self.observers.append(callback)
+
+    def set_language(self, lang_code: str):
+        """设置当前语言并通知观察者"""
+        if lang_code in self.languages:
+            self.current_lang = lang_code
+            for callback in self.observers:
+                callback()
+
+    def get(self, key: str, *args) -> str:
+        """获取翻译文本"""
+        try:
+            text = self.translations[self.current_lang].get(key, key)
+            return text.format(*args) if args else text
+        except:
+            return key
+
+    def render(self, result: 'CoverResult') -> str:
+        """把处理结果转换为当前语言的文本, 只在需要显示时调用"""
+        key = result.outcome.name.lower()
+        return self.get(key) if result.success else self.get(key, result.error)
+
+# ====== 性能统计 ======
+# 当前进程中尚未取走的阶段采样 (阶段名, 秒, 读字节, 写字节); 为 None 时统计关闭,
+# _stage() 只返回一个共享的空上下文, 几乎没有额外开销。
+_stage_samples: Optional[List[Tuple[str, float, int, int]]] = None
+_proc_io = (None, -1)  # (pid, /proc/self/io 文件描述符), fork 之后需要重新打开
+
+def enable_instrumentation(enabled: bool = True):
+    """开启或关闭当前进程的阶段统计"""
+    global _stage_samples
+    _stage_samples = [] if enabled else None
+
+def take_stage_samples() -> Optional[List[Tuple[str, float, int, int]]]:
+    """取走并清空当前进程累积的阶段采样"""
+    if _stage_samples is None:
+        return None
+    samples = list(_stage_samples)
+    _stage_samples.clear()
+    return samples
+
+def _io_counters() -> Tuple[int, int]:
+    """当前进程累计读写的字节数 (rchar, wchar), 非 Linux 平台返回 (0, 0)"""
+    global _proc_io
+    pid, fd = _proc_io
+    if pid != os.getpid():
+        try:
+            fd = os.open('/proc/self/io', os.O_RDONLY)
+        except OSError:
+            fd = -1
+        _proc_io = (os.getpid(), fd)
+    if fd < 0:
+        return 0, 0
+    rchar = wchar = 0
+    for line in os.pread(fd, 512, 0).split(b'\n'):
+        if line.startswith(b'rchar:'):
+            rchar = int(line[6:])
+        elif line.startswith(b'wchar:'):
+            wchar = int(line[6:])
+            break
+    return rchar, wchar
+
+class _Stage:
+    """记录一个处理阶段的耗时和读写字节数; 退出后 written 为阶段内的写入字节数 (非 Linux 为 0)"""
+    __slots__ = ('name', 'start', 'io', 'written')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.io = _io_counters()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        rchar, wchar = _io_counters()
+        self.written = wchar - self.io[1]
+        if _stage_samples is not None:
+            _stage_samples.append((self.name, elapsed, rchar - self.io[0], self.written))
+        return False
+
+_NULL_STAGE = contextlib.nullcontext()
+
+def _stage(name: str):
+    """统计开启时返回阶段计时上下文, 否则返回空上下文"""
+    return _NULL_STAGE if _stage_samples is None else _Stage(name)
+
+# 暂存模式 (AudioCoverRemover.remove_cover 的 staged 参数) 下为 True: 原地补丁不写入, 随结果返回
+_staging = False
+
+class _RewriteRequired(Exception):
+    """暂存模式下遇到无法表示为补丁的修改, 改为处理临时副本"""
+
+def _rewrite_stage():
+    """mutagen 保存或移动音频数据之前调用, 返回 'save' 阶段上下文; 暂存模式下抛出 _RewriteRequired
+
+    不论是否开启统计都计量写入字节数 (_Stage.written), 供写入限速按实际写入量扣除。
+    """
+    if _staging:
+        raise _RewriteRequired()
+    return _Stage('save')
+
+class MetricsHook:
+    """统计导出接口: 每个文件处理完成后调用 on_file, 运行结束时调用 close"""
+
+    def on_file(self, metrics: 'Metrics', file_path: str, success: bool,
+                samples: List[Tuple[str, float, int, int]]):
+        pass
+
+    def close(self, metrics: 'Metrics'):
+        pass
+
+class JsonLinesHook(MetricsHook):
+    """每个文件写一行 JSON, 结束时追加一行汇总"""
+
+    def __init__(self, path: str):
+        self.file = open(path, 'w', encoding='utf-8')
+
+    def on_file(self, metrics, file_path, success, samples):
+        self.file.write(json.dumps({'file': file_path, 'success': success,
+                                    'stages': [list(sample) for sample in samples]},
+                                   ensure_ascii=False) + '\n')
+
+    def close(self, metrics):
+        self.file.write(json.dumps({'summary': metrics.snapshot()}) + '\n')
+        self.file.close()
+
+class PrometheusHook(MetricsHook):
+    """以 Prometheus 文本格式写出统计 (可供 node_exporter textfile collector 读取)
+
+    运行期间最多每 PROMETHEUS_WRITE_INTERVAL 秒重写一次, 通过临时文件替换保证读取方看到完整内容。
+    """
+
+    def __init__(self, path: str, interval: float = PROMETHEUS_WRITE_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._last_write = time.monotonic()
+
+    def on_file(self, metrics, file_path, success, samples):
+        if time.monotonic() - self._last_write >= self.interval:
+            self._write(metrics)
+
+    def close(self, metrics):
+        self._write(metrics)
+
+    def _write(self, metrics: 'Metrics'):
+        snapshot = metrics.snapshot()
+        lines = ['# HELP audiocoverremover_files_total Files processed by result.',
+                 '# TYPE audiocoverremover_files_total counter']
+        for result, count in snapshot['files'].items():
+            lines.append(f'audiocoverremover_files_total{{result="{result}"}} {count}')
+        lines += ['# HELP audiocoverremover_stage_seconds Time spent per processing stage.',
+                  '# TYPE audiocoverremover_stage_seconds histogram']
+        for stage, data in snapshot['stages'].items():
+            for le, count in data['buckets'].items():
+                lines.append(f'audiocoverremover_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {count}')
+            lines.append(f'audiocoverremover_stage_seconds_sum{{stage="{stage}"}} {data["seconds"]:.6f}')
+            lines.append(f'audiocoverremover_stage_seconds_count{{stage="{stage}"}} {data["count"]}')
+        for key in ('bytes_read', 'bytes_written'):
+            lines += [f'# HELP audiocoverremover_stage_{key}_total Bytes {key.split("_")[1]} per processing stage.',
+                      f'# TYPE audiocoverremover_stage_{key}_total counter']
+            for stage, data in snapshot['stages'].items():
+                lines.append(f'audiocoverremover_stage_{key}_total{{stage="{stage}"}} {data[key]}')
+
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, self.path)
+        self._last_write = time.monotonic()
+
+class Metrics:
+    """汇总各阶段的次数、总耗时、耗时直方图和读写字节数, 并转发给导出钩子"""
+
+    def __init__(self, hooks: Iterable[MetricsHook] = (), buckets: Tuple[float, ...] = STAGE_BUCKETS):
+        self.hooks = list(hooks)
+        self.buckets = buckets
+        self.stages = {}  # 阶段名 -> [次数, 秒, 读字节, 写字节, 各桶计数]
+        self.files = {'success': 0, 'fail': 0}
+
+    def observe(self, stage: str, seconds: float, bytes_read: int = 0, bytes_written: int = 0):
+        """记录一次阶段采样"""
+        entry = self.stages.get(stage)
+        if entry is None:
+            entry = self.stages[stage] = [0, 0.0, 0, 0, [0] * (len(self.buckets) + 1)]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] += bytes_read
+        entry[3] += bytes_written
+        entry[4][bisect.bisect_left(self.buckets, seconds)] += 1
+
+    def record_file(self, file_path: str, success: bool,
+                    samples: Optional[List[Tuple[str, float, int, int]]]):
+        """记录一个文件的处理结果及其阶段采样"""
+        self.files['success' if success else 'fail'] += 1
+        samples = samples or []
+        for sample in samples:
+            self.observe(*sample)
+        for hook in self.hooks:
+            hook.on_file(self, file_path, success, samples)
+
+    def snapshot(self) -> Dict:
+        """返回可序列化的统计快照, 直方图为累计计数"""
+        stages = {}
+        for stage, (count, seconds, bytes_read, bytes_written, bucket_counts) in self.stages.items():
+            buckets, total = {}, 0
+            for le, n in zip([str(b) for b in self.buckets] + ['+Inf'], bucket_counts):
+                total += n
+                buckets[le] = total
+            stages[stage] = {'count': count, 'seconds': seconds, 'bytes_read': bytes_read,
+                             'bytes_written': bytes_written, 'buckets': buckets}
+        return {'files': dict(self.files), 'stages': stages}
+
+    def close(self):
+        for hook in self.hooks:
+            hook.close(self)
+
+# ====== 核心功能 ======
+class Outcome(IntEnum):
+    """处理结果类型, 名称的小写形式即翻译键; 数值不小于 INVALID_MP3 的表示失败"""
+    COVER_REMOVED = 0
+    NO_COVER = 1
+    NO_ID3 = 2
+    NO_METADATA = 3
+    METADATA_CLEARED = 4  # 不再产生, 保留以兼容旧的处理记录
+    COVER_RESIZED = 5
+    COVER_KEPT = 6
+    INVALID_MP3 = 16
+    UNSUPPORTED_FORMAT = 17
+    PROCESS_ERROR = 18
+    ID3_ERROR = 19
+    AUDIO_ERROR = 20
+
+class CoverPolicy(NamedTuple):
+    """缩小封面的规则: 不超过 max_kb 且最长边不超过 max_px 的图片保持不变, 其余以 quality 重新编码"""
+    max_kb: int = DOWNSCALE_MAX_KB
+    max_px: int = DOWNSCALE_MAX_PX
+    quality: int = DOWNSCALE_QUALITY
+
+    def exceeds(self, data: bytes) -> bool:
+        if len(data) > self.max_kb * 1024:
+            return True
+        size = _image_dimensions(data[:IMAGE_HEAD_SIZE])
+        return size is not None and max(size) > self.max_px
+
+class CoverResult(NamedTuple):
+    """单个文件的处理结果
+
+    只包含数值和短字符串, 可以廉价地在进程间传递和大量聚合; 文本由 I18N.render 按需生成。
+    method: 'probe' (预检判定无封面) / 'inplace' / 'stream' / 'shrink' / 'mutagen' / 'reflink' / 'hardlink' / 'copy'
+    bytes_removed: 去掉的封面数据字节数; bytes_written: 写入字节数, mutagen 保存时无法计量 (非 Linux) 则为文件大小 (上界)
+    pending: 暂存模式下尚未提交的修改, ('patch', 路径, 补丁, 截断位置或 None, 原大小, 补丁区域原内容的摘要)
+             或 ('rename', 临时文件, 路径)
+    """
+    outcome: Outcome
+    fmt: str = ''
+    method: str = ''
+    bytes_removed: int = 0
+    bytes_written: int = 0
+    elapsed: float = 0.0
+    error: str = ''
+    pending: Optional[tuple] = None
+
+    @property
+    def success(self) -> bool:
+        return self.outcome < Outcome.INVALID_MP3
+
+def _syncsafe_to_int(data: bytes) -> int:
+    """解析 ID3v2 的 syncsafe 整数 (每字节 7 位)"""
+    value = 0
+    for b in data:
+        value = (value << 7) | (b & 0x7F)
+    return value
+
+def _int_to_syncsafe(value: int) -> bytes:
+    """编码 ID3v2 的 syncsafe 整数"""
+    return bytes([(value >> 21) & 0x7F, (value >> 14) & 0x7F, (value >> 7) & 0x7F, value & 0x7F])
+
+# (偏移, 数据) 形式的写入补丁; 数据为整数时表示写入该长度的 0
+Patch = Tuple[int, Union[bytes, int]]
+
+def _is_frame_id(frame_id: bytes) -> bool:
+    """ID3v2.3/2.4 帧 ID 只能由大写字母和数字组成"""
+    return len(frame_id) == 4 and all(48 <= b <= 57 or 65 <= b <= 90 for b in frame_id)
+
+class _OggPacketReader:
+    """按需读取 Ogg 流中单个逻辑包的数据, 跨页时只读取页头, 可跳过不需要的内容"""
+
+    def __init__(self, f, page_offset: int):
+        self.f = f
+        self.next_page = page_offset
+        self.remaining = 0      # 当前页中属于本包、尚未读取的字节数
+        self.finished = False   # 本包已在当前页结束
+
+    def _next_page(self) -> bool:
+        """定位到下一页中属于本包的数据"""
+        if self.finished:
+            return False
+        self.f.seek(self.next_page)
+        header = self.f.read(OGG_PAGE_HEADER_SIZE)
+        if len(header) < OGG_PAGE_HEADER_SIZE or header[:4] != b'OggS':
+            return False
+        lacing = self.f.read(header[26])
+        if len(lacing) < header[26]:
+            return False
+        self.next_page += OGG_PAGE_HEADER_SIZE + len(lacing) + sum(lacing)
+        self.remaining = 0
+        for value in lacing:
+            self.remaining += value
+            if value < 255:
+                self.finished = True
+                break
+        return True
+
+    def read(self, n: int) -> Optional[bytes]:
+        """读取 n 字节, 包提前结束时返回 None"""
+        chunks = []
+        while n > 0:
+            if not self.remaining and not self._next_page():
+                return None
+            chunk = self.f.read(min(n, self.remaining))
+            if not chunk:
+                return None
+            chunks.append(chunk)
+            self.remaining -= len(chunk)
+            n -= len(chunk)
+        return b''.join(chunks)
+
+    def skip(self, n: int) -> bool:
+        """跳过 n 字节而不读取"""
+        while n > 0:
+            if not self.remaining and not self._next_page():
+                return False
+            step = min(n, self.remaining)
+            self.f.seek(step, os.SEEK_CUR)
+            self.remaining -= step
+            n -= step
+        return True
+
+class TagLayout:
+    """直接读取标签的字节布局, 并生成原地修改所需的补丁
+
+    封面数据只被跳过或覆盖为填充, 从不移动音频数据。遇到无法安全处理的布局时返回 None,
+    由调用方退回到 mutagen 的常规保存流程。
+    """
+
+    @staticmethod
+    def read_id3(f, base: int = 0) -> Optional[Tuple[int, int, List[Tuple[int, int, bytes]]]]:
+        """读取 base 处的 ID3v2.3/2.4 标签, 返回 (帧结束位置, 标签结束位置, [(偏移, 长度, 帧 ID)])"""
+        f.seek(base)
+        header = f.read(ID3_HEADER_SIZE)
+        if len(header) < ID3_HEADER_SIZE or header[:3] != b'ID3':
+            return None
+        major, flags = header[3], header[5]
+        # 整体反同步、扩展头 (可能含 CRC) 和尾部标签不允许就地填充
+        if major not in (3, 4) or flags & (ID3_FLAG_UNSYNC | ID3_FLAG_EXTENDED | ID3_FLAG_FOOTER):
+            return None
+
+        tag_end = base + ID3_HEADER_SIZE + _syncsafe_to_int(header[6:10])
+        frames = []
+        pos = base + ID3_HEADER_SIZE
+        while pos + ID3_HEADER_SIZE <= tag_end:
+            f.seek(pos)
+            frame_header = f.read(ID3_HEADER_SIZE)
+            if len(frame_header) < ID3_HEADER_SIZE:
+                return None
+            if frame_header[0] == 0:
+                break  # 填充区
+            if not _is_frame_id(frame_header[:4]):
+                return None
+            size_bytes = frame_header[4:8]
+            if major == 4:
+                if any(b & 0x80 for b in size_bytes):
+                    return None  # 非 syncsafe 的 v2.4 帧长度, 交给 mutagen 处理
+                size = _syncsafe_to_int(size_bytes)
+            else:
+                size = int.from_bytes(size_bytes, 'big')
+            total = ID3_HEADER_SIZE + size
+            if pos + total > tag_end:
+                return None
+            frames.append((pos, total, frame_header[:4]))
+            pos += total
+        return min(pos, tag_end), tag_end, frames
+
+    @staticmethod
+    def id3_cover_patches(f, base: int = 0) -> Optional[List[Patch]]:
+        """生成删除 APIC 帧的补丁: 后续帧前移, 腾出的空间变为标签填充"""
+        layout = TagLayout.read_id3(f, base)
+        if layout is None:
+            return None
+        frames_end, _, frames = layout
+
+        patches = []
+        write_pos = None
+        for offset, size, frame_id in frames:
+            if frame_id == b'APIC':
+                if write_pos is None:
+                    write_pos = offset
+            elif write_pos is not None:
+                f.seek(offset)
+                patches.append((write_pos, f.read(size)))
+                write_pos += size
+        if write_pos is None:
+            return []
+        patches.append((write_pos, frames_end - write_pos))
+        return patches
+
+    @staticmethod
+    def read_flac(f) -> Optional[List[Tuple[int, int, int, bool]]]:
+        """读取 FLAC 元数据块, 返回 [(偏移, 类型, 长度, 是否最后一块)]"""
+        f.seek(0)
+        header = f.read(ID3_HEADER_SIZE)
+        base = 0
+        if len(header) == ID3_HEADER_SIZE and header[:3] == b'ID3':
+            base = ID3_HEADER_SIZE + _syncsafe_to_int(header[6:10])
+            f.seek(base)
+            header = f.read(4)
+        if header[:4] != b'fLaC':
+            return None
+
+        blocks = []
+        pos = base + 4
+        while True:
+            f.seek(pos)
+            block_header = f.read(4)
+            if len(block_header) < 4:
+                return None
+            block_type = block_header[0] & 0x7F
+            is_last = bool(block_header[0] & 0x80)
+            length = int.from_bytes(block_header[1:4], 'big')
+            if block_type == 127 or (not blocks and block_type != 0):
+                return None  # 无效块类型, 或第一块不是 STREAMINFO
+            blocks.append((pos, block_type, length, is_last))
+            pos += 4 + length
+            if is_last:
+                # 被截断的文件: 元数据块超出文件末尾, 原地改写会把文件补长
+                return blocks if pos <= f.seek(0, os.SEEK_END) else None
+
+    @staticmethod
+    def flac_cover_patches(f) -> Optional[List[Patch]]:
+        """生成把 PICTURE 块改写为 PADDING 块的补丁, 相邻的图片/填充块合并为一个"""
+        blocks = TagLayout.read_flac(f)
+        if blocks is None:
+            return None
+        if not any(block_type == FLAC_BLOCK_PICTURE for _, block_type, _, _ in blocks):
+            return []
+
+        # 按连续的 PICTURE/PADDING 块分组
+        runs, run = [], []
+        for block in blocks:
+            if block[1] in (FLAC_BLOCK_PICTURE, FLAC_BLOCK_PADDING):
+                run.append(block)
+                continue
+            if run:
+                runs.append(run)
+            run = []
+        if run:
+            runs.append(run)
+
+        patches = []
+        for run in runs:
+            if all(block_type != FLAC_BLOCK_PICTURE for _, block_type, _, _ in run):
+                continue
+            start = run[0][0]
+            end = run[-1][0] + 4 + run[-1][2]
+            if end - start - 4 > FLAC_MAX_BLOCK_SIZE:
+                run_groups = [[block] for block in run]  # 合并后超出块长度上限, 逐块转换
+            else:
+                run_groups = [run]
+            for group in run_groups:
+                start = group[0][0]
+                end = group[-1][0] + 4 + group[-1][2]
+                last_flag = 0x80 if group[-1][3] else 0
+                patches.append((start, bytes([FLAC_BLOCK_PADDING | last_flag])
+                                + (end - start - 4).to_bytes(3, 'big')))
+                for offset, block_type, length, _ in group:
+                    if block_type == FLAC_BLOCK_PICTURE:
+                        zero_start = offset + 4 if offset == start else offset
+                        patches.append((zero_start, offset + 4 + length - zero_start))
+                    elif offset != start:
+                        patches.append((offset, 4))  # 被合并的填充块只需清除块头
+        return patches
+
+    @staticmethod
+    def id3_stripped_header(f, base: int = 0) -> Optional[Tuple[Optional[bytes], int]]:
+        """生成去掉 APIC 帧后的 ID3 标签, 返回 (新标签, 音频起始位置); 没有封面时新标签为 None"""
+        layout = TagLayout.read_id3(f, base)
+        if layout is None:
+            return None
+        frames_end, tag_end, frames = layout
+        if all(frame_id != b'APIC' for _, _, frame_id in frames):
+            return None, tag_end
+
+        f.seek(base)
+        header = bytearray(f.read(ID3_HEADER_SIZE))
+        body = bytearray()
+        for offset, size, frame_id in frames:
+            if frame_id != b'APIC':
+                f.seek(offset)
+                body += f.read(size)
+        body += bytes(tag_end - frames_end)  # 保留原有填充, 便于之后原地编辑
+        header[6:10] = _int_to_syncsafe(len(body))
+        return bytes(header + body), tag_end
+
+    @staticmethod
+    def flac_stripped_header(f) -> Optional[Tuple[Optional[bytes], int]]:
+        """生成去掉 PICTURE 块后的 FLAC 元数据, 返回 (新元数据, 音频起始位置); 没有封面时新元数据为 None"""
+        blocks = TagLayout.read_flac(f)
+        if blocks is None:
+            return None
+        last_offset, _, last_length, _ = blocks[-1]
+        audio_start = last_offset + 4 + last_length
+        kept = [block for block in blocks if block[1] != FLAC_BLOCK_PICTURE]
+        if len(kept) == len(blocks):
+            return None, audio_start
+
+        f.seek(0)
+        header = bytearray(f.read(blocks[0][0]))  # 'fLaC' 以及可能存在的前置 ID3 标签
+        for i, (offset, block_type, length, _) in enumerate(kept):
+            f.seek(offset + 4)
+            last_flag = 0x80 if i == len(kept) - 1 else 0
+            header += bytes([block_type | last_flag]) + length.to_bytes(3, 'big')
+            header += f.read(length)
+        return bytes(header), audio_start
+
+    @staticmethod
+    def read_vorbis_comment_keys(f) -> Optional[List[str]]:
+        """读取 Ogg Vorbis/Opus 注释包中的字段名 (小写), 注释值本身被跳过"""
+        f.seek(0)
+        header = f.read(OGG_PAGE_HEADER_SIZE)
+        if len(header) < OGG_PAGE_HEADER_SIZE or header[:4] != b'OggS':
+            return None
+        lacing = f.read(header[26])
+        # 第一页只包含识别头, 注释包从第二页开始
+        reader = _OggPacketReader(f, OGG_PAGE_HEADER_SIZE + len(lacing) + sum(lacing))
+
+        magic = reader.read(7)
+        if magic == b'\x03vorbis':
+            pass
+        elif magic == b'OpusTag' and reader.read(1) == b's':
+            pass
+        else:
+            return None
+
+        vendor_length = reader.read(4)
+        if vendor_length is None or not reader.skip(int.from_bytes(vendor_length, 'little')):
+            return None
+        count = reader.read(4)
+        if count is None:
+            return None
+
+        keys = []
+        for _ in range(int.from_bytes(count, 'little')):
+            length = reader.read(4)
+            if length is None:
+                return None
+            length = int.from_bytes(length, 'little')
+            head = reader.read(min(length, VORBIS_KEY_PROBE_SIZE))
+            if head is None or not reader.skip(length - len(head)):
+                return None
+            keys.append(head.split(b'=', 1)[0].decode('ascii', 'replace').lower())
+        return keys
+
+    @staticmethod
+    def probe_cover(f, ext: str) -> Optional[bool]:
+        """只读取标签区域判断文件是否含有封面
+
+        返回 True/False; 格式不支持或布局不确定时返回 None, 由调用方进行完整解析。
+        """
+        if ext == '.mp3':
+            valid, tag_size = AudioCoverRemover._sniff_mp3(f)
+            if not valid:
+                return None  # 交给完整流程报告无效文件
+            if not tag_size:
+                return False
+            layout = TagLayout.read_id3(f)
+            if layout is None:
+                return None
+            return any(frame_id == b'APIC' for _, _, frame_id in layout[2])
+        if ext == '.flac':
+            blocks = TagLayout.read_flac(f)
+            if blocks is None:
+                return None
+            return any(block_type == FLAC_BLOCK_PICTURE for _, block_type, _, _ in blocks)
+        if ext == '.ogg':
+            keys = TagLayout.read_vorbis_comment_keys(f)
+            if keys is None:
+                return None
+            return any(key in VORBIS_PICTURE_KEYS for key in keys)
+        if ext in MP4_EXTENSIONS:
+            found = TagLayout.read_mp4_ilst(f)
+            if found is None:
+                return None
+            return any(name == b'covr' for _, _, _, name in found[1])
+        if ext in IFF_EXTENSIONS:
+            chunk = TagLayout.iff_id3_chunk(f)
+            if chunk is None:
+                return None
+            if not chunk[2]:
+                return False
+            layout = TagLayout.read_id3(f, chunk[2] + IFF_CHUNK_HEADER_SIZE)
+            return any(frame_id == b'APIC' for _, _, frame_id in layout[2])
+        if ext in APEV2_EXTENSIONS:
+            layout = TagLayout.read_apev2(f)
+            if layout is None:
+                return None
+            return any(TagLayout._is_apev2_cover(key, binary) for _, _, key, binary in layout[2])
+        return None
+
+    @staticmethod
+    def id3_pictures(f, base: int = 0) -> Optional[List[Tuple[str, int, int, int, int]]]:
+        """列出 ID3 标签中的 APIC 帧, 返回 [(MIME, 图片数据偏移, 图片字节数, 0, 0)]
+
+        ID3 不记录图片尺寸, 宽高为 0。帧带有压缩/加密等标志或描述过长时返回 None。
+        """
+        layout = TagLayout.read_id3(f, base)
+        if layout is None:
+            return None
+        pictures = []
+        for offset, total, frame_id in layout[2]:
+            if frame_id != b'APIC':
+                continue
+            f.seek(offset + 8)
+            flags = f.read(2)
+            head = f.read(min(total - ID3_HEADER_SIZE, APIC_HEAD_SIZE))
+            if len(flags) < 2 or flags[1] or len(head) < 2:
+                return None
+            mime_end = head.find(b'\0', 1)
+            if mime_end < 0:
+                return None
+            desc_start = mime_end + 2  # 跳过图片类型字节
+            if head[0] in (1, 2):  # UTF-16 描述以对齐的两个零字节结尾
+                desc_end = desc_start
+                while desc_end + 1 < len(head) and head[desc_end:desc_end + 2] != b'\0\0':
+                    desc_end += 2
+                data_start = desc_end + 2
+            else:
+                desc_end = head.find(b'\0', desc_start)
+                data_start = desc_end + 1
+            if desc_end < 0 or data_start > len(head):
+                return None
+            mime = head[1:mime_end].decode('latin-1')
+            pictures.append((mime, offset + ID3_HEADER_SIZE + data_start,
+                             total - ID3_HEADER_SIZE - data_start, 0, 0))
+        return pictures
+
+    @staticmethod
+    def flac_pictures(f) -> Optional[List[Tuple[str, int, int, int, int]]]:
+        """列出 FLAC PICTURE 块, 返回 [(MIME, 图片数据偏移, 图片字节数, 宽, 高)]"""
+        blocks = TagLayout.read_flac(f)
+        if blocks is None:
+            return None
+        pictures = []
+        for offset, block_type, length, _ in blocks:
+            if block_type != FLAC_BLOCK_PICTURE:
+                continue
+            f.seek(offset + 8)  # 块头和图片类型
+            mime_length = int.from_bytes(f.read(4), 'big')
+            mime = f.read(mime_length).decode('ascii', 'replace')
+            desc_length = int.from_bytes(f.read(4), 'big')
+            f.seek(desc_length, os.SEEK_CUR)
+            fields = f.read(20)
+            if len(fields) < 20:
+                return None
+            width, height = int.from_bytes(fields[0:4], 'big'), int.from_bytes(fields[4:8], 'big')
+            data_length = int.from_bytes(fields[16:20], 'big')
+            data_offset = offset + 4 + 32 + mime_length + desc_length
+            if data_offset + data_length > offset + 4 + length:
+                return None
+            pictures.append((mime, data_offset, data_length, width, height))
+        return pictures
+
+    @staticmethod
+    def read_iff_chunks(f) -> Optional[Tuple[bool, int, List[Tuple[int, bytes, int]]]]:
+        """读取 WAV (RIFF) / AIFF (FORM) 的块列表, 返回 (是否大端, 容器结束位置, [(偏移, 块 ID, 数据长度)])"""
+        file_size = f.seek(0, os.SEEK_END)
+        f.seek(0)
+        header = f.read(IFF_HEADER_SIZE)
+        if len(header) < IFF_HEADER_SIZE:
+            return None
+        if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+            big_endian = False
+        elif header[:4] == b'FORM' and header[8:12] in (b'AIFF', b'AIFC'):
+            big_endian = True
+        else:
+            return None
+        byteorder = 'big' if big_endian else 'little'
+        form_end = 8 + int.from_bytes(header[4:8], byteorder)
+        if form_end > file_size:
+            return None
+
+        chunks = []
+        pos = IFF_HEADER_SIZE
+        while pos + IFF_CHUNK_HEADER_SIZE <= form_end:
+            f.seek(pos)
+            chunk_header = f.read(IFF_CHUNK_HEADER_SIZE)
+            size = int.from_bytes(chunk_header[4:8], byteorder)
+            if pos + IFF_CHUNK_HEADER_SIZE + size > form_end:
+                return None
+            chunks.append((pos, chunk_header[:4], size))
+            pos += IFF_CHUNK_HEADER_SIZE + size + (size & 1)  # 块数据按 2 字节对齐
+        return big_endian, form_end, chunks
+
+    @staticmethod
+    def iff_id3_chunk(f) -> Optional[Tuple[bool, int, int, int]]:
+        """查找唯一的 ID3 块, 返回 (是否大端, 容器结束位置, 块偏移, 数据长度); 没有 ID3 块时块偏移为 0
+
+        有多个 ID3 块, 或块中的标签超出块的范围时返回 None。
+        """
+        layout = TagLayout.read_iff_chunks(f)
+        if layout is None:
+            return None
+        big_endian, form_end, chunks = layout
+        id3_chunks = [(offset, size) for offset, chunk_id, size in chunks if chunk_id in (b'id3 ', b'ID3 ')]
+        if not id3_chunks:
+            return big_endian, form_end, 0, 0
+        if len(id3_chunks) > 1:
+            return None
+        offset, size = id3_chunks[0]
+        tag = TagLayout.read_id3(f, offset + IFF_CHUNK_HEADER_SIZE)
+        if tag is None or tag[1] > offset + IFF_CHUNK_HEADER_SIZE + size:
+            return None
+        return big_endian, form_end, offset, size
+
+    @staticmethod
+    def read_apev2(f) -> Optional[Tuple[int, int, List[Tuple[int, int, str, bool]]]]:
+        """读取文件末尾的 APEv2 标签, 返回 (标签起始位置, 标签结束位置, [(项目偏移, 项目长度, 键, 是否二进制)])
+
+        项目的值被跳过而不读取。没有 APEv2 标签时返回空的项目列表, 起止位置均为标签应在的位置;
+        APEv1 或结构无效时返回 None。
+        """
+        end = f.seek(0, os.SEEK_END)
+        if end >= ID3V1_SIZE:
+            f.seek(end - ID3V1_SIZE)
+            if f.read(3) == b'TAG':
+                end -= ID3V1_SIZE
+        if end < APEV2_FOOTER_SIZE:
+            return end, end, []
+        f.seek(end - APEV2_FOOTER_SIZE)
+        footer = f.read(APEV2_FOOTER_SIZE)
+        if footer[:8] != b'APETAGEX':
+            return end, end, []
+        version, size, count, flags = struct.unpack('<4I', footer[8:24])
+        if version != APEV2_VERSION or size < APEV2_FOOTER_SIZE or size > end:
+            return None
+        items_start = end - size
+        start = items_start - (APEV2_FOOTER_SIZE if flags & APEV2_FLAG_HAS_HEADER else 0)
+        if start < 0:
+            return None
+
+        items = []
+        pos = items_start
+        for _ in range(count):
+            f.seek(pos)
+            head = f.read(8 + APEV2_KEY_PROBE_SIZE)
+            key_end = head.find(b'\0', 8)
+            if key_end < 0:
+                return None
+            value_size, item_flags = struct.unpack('<II', head[:8])
+            total = key_end + 1 + value_size
+            if pos + total > end - APEV2_FOOTER_SIZE:
+                return None
+            binary = (item_flags >> 1) & 3 == APEV2_ITEM_BINARY
+            items.append((pos, total, head[8:key_end].decode('ascii', 'replace'), binary))
+            pos += total
+        return start, end, items
+
+    @staticmethod
+    def _is_apev2_cover(key: str, binary: bool) -> bool:
+        return binary and key.lower().startswith('cover art')
+
+    @staticmethod
+    def apev2_stripped_tag(f) -> Optional[Tuple[Optional[bytes], int]]:
+        """生成去掉 Cover Art 二进制项目后的 APEv2 标签 (及其后的 ID3v1), 返回 (新的文件尾部, 标签起始位置)
+
+        没有封面时新的文件尾部为 None。
+        """
+        layout = TagLayout.read_apev2(f)
+        if layout is None:
+            return None
+        start, end, items = layout
+        kept = [item for item in items if not TagLayout._is_apev2_cover(item[2], item[3])]
+        if len(kept) == len(items):
+            return None, start
+
+        body = bytearray()
+        for offset, total, _, _ in kept:
+            f.seek(offset)
+            body += f.read(total)
+        f.seek(end - APEV2_FOOTER_SIZE)
+        footer = bytearray(f.read(APEV2_FOOTER_SIZE))
+        footer[12:20] = struct.pack('<II', len(body) + APEV2_FOOTER_SIZE, len(kept))
+        tail = bytearray()
+        if struct.unpack('<I', footer[20:24])[0] & APEV2_FLAG_HAS_HEADER:
+            f.seek(start)
+            header = bytearray(f.read(APEV2_FOOTER_SIZE))
+            header[12:20] = footer[12:20]
+            tail += header
+        tail += body + footer
+        f.seek(end)
+        tail += f.read()  # ID3v1
+        return bytes(tail), start
+
+    @staticmethod
+    def apev2_pictures(f) -> Optional[List[Tuple[str, int, int, int, int]]]:
+        """列出 APEv2 Cover Art 项目, 返回 [('', 图片数据偏移, 图片字节数, 0, 0)]; 值以 '描述\\0' 开头"""
+        layout = TagLayout.read_apev2(f)
+        if layout is None:
+            return None
+        pictures = []
+        for offset, total, key, binary in layout[2]:
+            if not TagLayout._is_apev2_cover(key, binary):
+                continue
+            value_start = offset + 8 + len(key.encode('ascii', 'replace')) + 1
+            f.seek(value_start)
+            head = f.read(min(offset + total - value_start, APIC_HEAD_SIZE))
+            data_start = value_start + head.find(b'\0') + 1  # 找不到描述结束符时为整个值
+            pictures.append(('', data_start, offset + total - data_start, 0, 0))
+        return pictures
+
+    @staticmethod
+    def read_mp4_atoms(f, start: int, end: int) -> Optional[List[Tuple[int, int, int, bytes]]]:
+        """列出 [start, end) 范围内的 MP4 原子, 返回 [(偏移, 头部长度, 总长度, 类型)]"""
+        atoms = []
+        pos = start
+        while pos + MP4_ATOM_HEADER_SIZE <= end:
+            f.seek(pos)
+            header = f.read(MP4_ATOM_HEADER_SIZE)
+            if len(header) < MP4_ATOM_HEADER_SIZE:
+                return None
+            size, name = int.from_bytes(header[:4], 'big'), header[4:]
+            header_size = MP4_ATOM_HEADER_SIZE
+            if size == 1:  # 64 位长度
+                extended = f.read(8)
+                if len(extended) < 8:
+                    return None
+                size, header_size = int.from_bytes(extended, 'big'), MP4_ATOM_HEADER_SIZE + 8
+            elif size == 0:  # 延伸到范围末尾 (通常是最后的 mdat)
+                size = end - pos
+            if size < header_size or pos + size > end:
+                return None
+            atoms.append((pos, header_size, size, name))
+            pos += size
+        return atoms
+
+    @staticmethod
+    def read_mp4_ilst(f) -> Optional[Tuple[Tuple[int, int, int, bytes], List[Tuple[int, int, int, bytes]]]]:
+        """沿 moov/udta/meta/ilst 查找标签列表, 返回 (ilst 原子, 其中的项目原子)
+
+        没有 ilst 时返回 (None, []); 原子结构无法解析时返回 None。
+        """
+        start, end = 0, f.seek(0, os.SEEK_END)  # 异步预检时 f 是只含文件开头的 BytesIO
+        atom = None
+        for name in MP4_TAG_PATH:
+            atoms = TagLayout.read_mp4_atoms(f, start, end)
+            if atoms is None:
+                return None
+            atom = next((a for a in atoms if a[3] == name), None)
+            if atom is None:
+                return None, []
+            offset, header_size, size, _ = atom
+            # meta 是 full atom, 子原子之前还有 4 字节版本和标志
+            start, end = offset + header_size + (4 if name == b'meta' else 0), offset + size
+        items = TagLayout.read_mp4_atoms(f, start, end)
+        if items is None:
+            return None
+        return atom, items
+
+    @staticmethod
+    def mp4_cover_patches(f) -> Optional[List[Patch]]:
+        """生成去掉 covr 原子的补丁, 不移动 ilst 之外的任何数据
+
+        第一个 covr 之后的其他项目前移补上空位, covr (及 free) 原子从 ilst 中截出, 合并为紧跟 ilst 的
+        一个 free 原子, 成为 mutagen、iTunes 等识别的标签填充; 原来的图片数据清零。
+        """
+        found = TagLayout.read_mp4_ilst(f)
+        if found is None:
+            return None
+        ilst, items = found
+        first = next((i for i, item in enumerate(items) if item[3] == b'covr'), None)
+        if first is None:
+            return []
+
+        # ilst 中只有文字等小项目, 前移时整体读入
+        kept = bytearray()
+        for offset, _, size, name in items[first:]:
+            if name not in (b'covr', b'free'):
+                f.seek(offset)
+                kept += f.read(size)
+        ilst_offset, ilst_header_size, ilst_size, _ = ilst
+        free_offset = items[first][0] + len(kept)
+        free_size = ilst_offset + ilst_size - free_offset
+        patches = []
+        if kept:
+            patches.append((items[first][0], bytes(kept)))
+        if ilst_header_size == MP4_ATOM_HEADER_SIZE:
+            patches.append((ilst_offset, struct.pack('>I', free_offset - ilst_offset)))
+        else:
+            patches.append((ilst_offset + 8, struct.pack('>Q', free_offset - ilst_offset)))
+        if free_size < 1 << 32:
+            free_header = struct.pack('>I', free_size) + b'free'
+        else:
+            free_header = struct.pack('>I', 1) + b'free' + struct.pack('>Q', free_size)
+        patches.append((free_offset, free_header))
+        patches.append((free_offset + len(free_header), free_size - len(free_header)))
+        return patches
+
+    @staticmethod
+    def mp4_pictures(f) -> Optional[List[Tuple[str, int, int, int, int]]]:
+        """列出 covr 原子中的图片, 返回 [(MIME, 图片数据偏移, 图片字节数, 0, 0)]"""
+        found = TagLayout.read_mp4_ilst(f)
+        if found is None:
+            return None
+        pictures = []
+        for offset, header_size, size, name in found[1]:
+            if name != b'covr':
+                continue
+            children = TagLayout.read_mp4_atoms(f, offset + header_size, offset + size)
+            if children is None:
+                return None
+            for child_offset, child_header_size, child_size, child_name in children:
+                if child_name != b'data' or child_size < child_header_size + 8:
+                    continue
+                f.seek(child_offset + child_header_size)
+                flags = int.from_bytes(f.read(4), 'big') & 0xFFFFFF
+                data_start = child_offset + child_header_size + 8  # 类型标志和 locale
+                pictures.append((MP4_COVER_MIMES.get(flags, ''), data_start,
+                                 child_offset + child_size - data_start, 0, 0))
+        return pictures
+
+    @staticmethod
+    def apply_patches(f, patches: List[Patch]) -> int:
+        """按顺序写入补丁, 返回写入的字节数"""
+        written = 0
+        zeros = None
+        for offset, data in patches:
+            f.seek(offset)
+            if isinstance(data, int):
+                if zeros is None:
+                    zeros = memoryview(bytes(COPY_CHUNK_SIZE))
+                remaining = data
+                while remaining > 0:
+                    n = min(remaining, COPY_CHUNK_SIZE)
+                    f.write(zeros[:n])
+                    remaining -= n
+                written += data
+            else:
+                f.write(data)
+                written += len(data)
+        f.flush()
+        return written
+
+class FastCopy:
+    """尽量避免经过用户态缓冲区的文件复制"""
+
+    @staticmethod
+    def copy_range(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+        """把 src_fd 中 [offset, offset + count) 的数据追加写入 dst_fd 的当前位置
+
+        依次尝试 copy_file_range (同一文件系统上可能直接共享数据块)、sendfile, 最后退回普通读写。
+        """
+        remaining = count
+        if hasattr(os, 'copy_file_range'):
+            try:
+                while remaining > 0:
+                    n = os.copy_file_range(src_fd, dst_fd, min(remaining, 1 << 30), offset)
+                    if n == 0:
+                        break
+                    offset += n
+                    remaining -= n
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF):
+                    raise
+
+        if remaining > 0 and hasattr(os, 'sendfile'):
+            try:
+                while remaining > 0:
+                    n = os.sendfile(dst_fd, src_fd, offset, min(remaining, 1 << 30))
+                    if n == 0:
+                        break
+                    offset += n
+                    remaining -= n
+            except OSError as e:
+                if e.errno not in (errno.EINVAL, errno.ENOSYS, errno.ENOTSOCK, errno.EOPNOTSUPP):
+                    raise
+
+        if remaining > 0:
+            os.lseek(src_fd, offset, os.SEEK_SET)
+            while remaining > 0:
+                chunk = os.read(src_fd, min(remaining, COPY_CHUNK_SIZE))
+                if not chunk:
+                    break
+                view = memoryview(chunk)
+                while view:
+                    view = view[os.write(dst_fd, view):]
+                remaining -= len(chunk)
+        return count - remaining
+
+    @staticmethod
+    def reflink(src: str, dst: str) -> bool:
+        """尝试以 reflink 方式克隆文件 (Btrfs/XFS 等), 不支持时返回 False 且不留下目标文件"""
+        try:
+            import fcntl
+        except ImportError:
+            return False
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            if os.path.exists(dst):
+                os.unlink(dst)
+            return False
+        shutil.copystat(src, dst)
+        return True
+
+    @staticmethod
+    def link_or_copy(src: str, dst: str, hardlink: bool = False) -> str:
+        """为未修改的文件生成输出: 优先 reflink, 否则复制
+
+        hardlink 为 True 时, 同一文件系统上退回硬链接 (输出与源文件共享数据, 之后原地修改输出会同时改动源文件)。
+        返回实际使用的方式 ('reflink' / 'hardlink' / 'copy')。
+        """
+        if FastCopy.reflink(src, dst):
+            return 'reflink'
+        if hardlink and os.stat(src).st_dev == os.stat(os.path.dirname(os.path.abspath(dst))).st_dev:
+            try:
+                os.link(src, dst)
+                return 'hardlink'
+            except OSError:
+                pass
+        shutil.copy2(src, dst)
+        return 'copy'
+
+class AudioCoverRemover:
+    @staticmethod
+    def remove_cover(file_path: str, output_dir: Optional[str] = None,
+                     source_root: Optional[str] = None, in_place: bool = False,
+                     prefilter: bool = True, memory_budget: Optional[int] = MEMORY_BUDGET,
+                     staged: Optional[str] = None, hardlink: bool = False) -> CoverResult:
+        """Remove audio file cover
+
+        in_place 为 True 时, MP3 和 FLAC 的封面字节被原地改写为标签填充, 音频数据不会移动,
+        写入量只与标签大小有关。无法原地处理的文件会退回到常规保存流程。
+
+        prefilter 为 True 时先只读取标签区域检查是否有封面, 确定没有封面的文件不做任何写入。
+
+        memory_budget: 允许 mutagen 一次读入内存的标签字节数上限 (None 为不限制)。标签更大的
+        MP3/FLAC 按偏移跳过图片数据, 只读取保留的帧/块, 音频数据分块前移, 内存占用与图片大小无关。
+
+        staged: WriteJournal 的日志目录, 指定时不修改原文件 (不能与 output_dir 同时使用)。原地补丁放在结果的
+        pending 中返回, 需要重写的文件在同目录下的临时副本上处理, 由 WriteJournal 成批落盘后再提交。
+
+        hardlink: 指定 output_dir 时, 没有封面的文件在无法 reflink 时以硬链接代替复制。
+
+        返回 CoverResult, 需要显示时用 i18n.render() 生成文本。
+        """
+        start = time.perf_counter()
+        fmt = Path(file_path).suffix.lower()[1:]
+        try:
+            if staged:
+                result = AudioCoverRemover._remove_cover_staged(file_path, in_place, prefilter, memory_budget, staged)
+            else:
+                result = AudioCoverRemover._remove_cover(file_path, output_dir, source_root, in_place, prefilter,
+                                                         memory_budget, hardlink)
+        except Exception as e:
+            result = CoverResult(Outcome.PROCESS_ERROR, error=str(e))
+        return result._replace(fmt=fmt, elapsed=time.perf_counter() - start)
+
+    @staticmethod
+    def _remove_cover(file_path: str, output_dir: Optional[str], source_root: Optional[str],
+                      in_place: bool, prefilter: bool, memory_budget: Optional[int],
+                      hardlink: bool = False) -> CoverResult:
+        file_path = str(Path(file_path).resolve())
+        ext = Path(file_path).suffix.lower()
+
+        if prefilter:
+            with _stage('probe'), open(file_path, 'rb', buffering=PROBE_BUFFER_SIZE) as f:
+                has_cover = TagLayout.probe_cover(f, ext)
+            if has_cover is False:
+                if output_dir:
+                    output_path = AudioCoverRemover._prepare_output(file_path, output_dir, source_root)
+                    with _stage('copy'):
+                        method = FastCopy.link_or_copy(file_path, str(output_path), hardlink)
+                    return CoverResult(Outcome.NO_COVER, method=method)
+                return CoverResult(Outcome.NO_COVER, method='probe')
+
+        if output_dir:
+            output_path = AudioCoverRemover._prepare_output(file_path, output_dir, source_root)
+            with _stage('copy'):
+                result = AudioCoverRemover._stream_to_output(file_path, str(output_path), ext, hardlink)
+                if result is None:
+                    # 无法流式处理的格式: 先复制文件到输出目录
+                    shutil.copy2(file_path, output_path)
+            if result is not None:
+                return result
+            file_path = str(output_path)
+
+        if ext == '.mp3':
+            return AudioCoverRemover._remove_mp3_cover(file_path, in_place, memory_budget)
+        else:
+            return AudioCoverRemover._remove_non_mp3_cover(file_path, in_place, memory_budget)
+
+    @staticmethod
+    def _remove_cover_staged(file_path: str, in_place: bool, prefilter: bool,
+                             memory_budget: Optional[int], journal_dir: str) -> CoverResult:
+        """暂存模式: 先尝试只生成补丁; 需要重写时复制到同目录的临时文件 (优先 reflink) 并处理副本
+
+        临时文件在复制前记入 journal_dir, 工作进程崩溃时 WriteJournal 也能找到并删除它。
+        """
+        global _staging
+        _staging = True
+        try:
+            return AudioCoverRemover._remove_cover(file_path, None, None, in_place, prefilter, memory_budget)
+        except _RewriteRequired:
+            pass
+        finally:
+            _staging = False
+
+        file_path = str(Path(file_path).resolve())
+        directory, name = os.path.split(file_path)
+        temp = os.path.join(directory, TEMP_PREFIX + name)  # 保留扩展名, 按同样的格式处理
+        WriteJournal.log_temp(journal_dir, temp)
+        with _stage('copy'):
+            if os.path.lexists(temp):
+                os.unlink(temp)  # 上次中断留下的副本
+            if not FastCopy.reflink(file_path, temp):
+                shutil.copy2(file_path, temp)
+        try:
+            result = AudioCoverRemover._remove_cover(temp, None, None, in_place, False, memory_budget)
+        except BaseException:
+            os.unlink(temp)
+            raise
+        if result.outcome != Outcome.COVER_REMOVED:
+            os.unlink(temp)
+            return result
+        return result._replace(pending=('rename', temp, file_path))
+
+    @staticmethod
+    def _prepare_output(file_path: str, output_dir: str, source_root: Optional[str]) -> Path:
+        """计算输出路径, 创建所在目录并删除旧的输出文件"""
+        output_path = AudioCoverRemover._get_output_path(file_path, output_dir, source_root)
+        if str(output_path.resolve()) == file_path:
+            raise shutil.SameFileError(f"{file_path} and {output_path} are the same file")
+        if not os.path.exists(output_path.parent):
+            os.makedirs(output_path.parent)
+        # 旧的输出可能是源文件的硬链接, 必须先删除再写入
+        if os.path.lexists(output_path):
+            os.unlink(output_path)
+        return output_path
+
+    @staticmethod
+    def _stream_to_output(file_path: str, output_path: str, ext: str,
+                          hardlink: bool = False) -> Optional[CoverResult]:
+        """一次性写出输出文件: 先写去掉封面的标签, 再直接从源文件复制音频数据
+
+        没有封面的文件以 reflink (或 hardlink 为 True 时的硬链接) 方式输出。格式不支持时返回 None。
+        """
+        with open(file_path, 'rb') as src:
+            if ext == '.mp3':
+                valid, tag_size = AudioCoverRemover._sniff_mp3(src)
+                if not valid:
+                    return CoverResult(Outcome.INVALID_MP3)
+                stripped = TagLayout.id3_stripped_header(src) if tag_size else (None, 0)
+            elif ext == '.flac':
+                stripped = TagLayout.flac_stripped_header(src)
+            else:
+                return None
+            if stripped is None:
+                return None
+
+            header, audio_start = stripped
+            if header is None:
+                method = FastCopy.link_or_copy(file_path, output_path, hardlink)
+                outcome = Outcome.NO_ID3 if ext == '.mp3' and not tag_size else Outcome.NO_COVER
+                return CoverResult(outcome, method=method)
+
+            with open(output_path, 'wb') as dst:
+                dst.write(header)
+                dst.flush()
+                size = os.fstat(src.fileno()).st_size
+                copied = FastCopy.copy_range(src.fileno(), dst.fileno(), audio_start, size - audio_start)
+        shutil.copymode(file_path, output_path)
+        return CoverResult(Outcome.COVER_REMOVED, method='stream', bytes_removed=audio_start - len(header),
+                           bytes_written=len(header) + copied)
+
+    @staticmethod
+    def _get_output_path(original_path: str, output_dir: str,
+                         source_root: Optional[str] = None) -> Path:
+        """获取输出路径 (指定 source_root 时保留相对目录结构)"""
+        original_path = Path(original_path)
+        output_dir = Path(output_dir)
+        base = Path(source_root).resolve() if source_root else original_path.parent
+        relative_path = original_path.relative_to(base)
+        return output_dir / relative_path
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _writable(f):
+        """以只读方式打开、解析过的文件需要写入时, 再以 'rb+' 重新打开
+
+        只读文件没有封面时因此仍返回 NO_COVER, 而不是打开失败。
+        """
+        if f.writable():
+            yield f
+        else:
+            with open(f.name, 'rb+') as writable:
+                yield writable
+
+    @staticmethod
+    def _patched(f, patches: List[Patch]) -> CoverResult:
+        """原地写入封面补丁; 清零的字节即被改写为填充的封面数据"""
+        removed = sum(data for _, data in patches if isinstance(data, int))
+        if _staging:
+            written = sum(data if isinstance(data, int) else len(data) for _, data in patches)
+            return CoverResult(Outcome.COVER_REMOVED, method='inplace', bytes_removed=removed, bytes_written=written,
+                               pending=('patch', f.name, patches, None, os.fstat(f.fileno()).st_size,
+                                        WriteJournal.digests(f, patches)))
+        with _stage('save'), AudioCoverRemover._writable(f) as f:
+            written = TagLayout.apply_patches(f, patches)
+        return CoverResult(Outcome.COVER_REMOVED, method='inplace', bytes_removed=removed, bytes_written=written)
+
+    @staticmethod
+    def _shrunk(f, header: Optional[bytes], audio_start: int) -> CoverResult:
+        """用去掉封面的标签替换文件开头的 audio_start 字节, 音频数据分块前移后截断文件
+
+        图片数据从不读入内存, 峰值内存只与保留的标签和 COPY_CHUNK_SIZE 有关。
+        """
+        if header is None:
+            return CoverResult(Outcome.NO_COVER, method='shrink')
+        with _rewrite_stage(), AudioCoverRemover._writable(f) as f:
+            size = os.fstat(f.fileno()).st_size
+            f.seek(0)
+            f.write(header)
+            buffer = memoryview(bytearray(COPY_CHUNK_SIZE))
+            read_pos, write_pos = audio_start, len(header)
+            while read_pos < size:
+                f.seek(read_pos)
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                f.seek(write_pos)
+                f.write(buffer[:n])
+                read_pos += n
+                write_pos += n
+            f.truncate(write_pos)
+            f.flush()
+        return CoverResult(Outcome.COVER_REMOVED, method='shrink', bytes_removed=audio_start - len(header),
+                           bytes_written=write_pos)
+
+    @staticmethod
+    def _saved(file_path: str, removed: int, save: _Stage) -> CoverResult:
+        """mutagen 保存后的结果
+
+        mutagen 只重写标签, 标签缩小较多时才移动其后的音频数据, 写入量取保存期间进程的写入字节数;
+        无法计量时 (非 Linux) 以文件大小作为上界。异步模式下多个线程同时写入, 计量值会偏大。
+        """
+        return CoverResult(Outcome.COVER_REMOVED, method='mutagen', bytes_removed=removed,
+                           bytes_written=save.written or os.path.getsize(file_path))
+
+    @staticmethod
+    def _remove_mp3_cover(file_path: str, in_place: bool = False,
+                          memory_budget: Optional[int] = MEMORY_BUDGET) -> CoverResult:
+        """Handle MP3 cover removal
+
+        文件只打开、解析一次: 同一个文件对象依次用于格式检测、读取 ID3 标签和保存。
+        """
+        from mutagen import MutagenError
+        try:
+            try:
+                f = open(file_path, 'rb+')
+            except PermissionError:
+                f = open(file_path, 'rb')  # 只读文件仍可判断是否有封面
+            with f:
+                valid, tag_size = AudioCoverRemover._sniff_mp3(f)
+                if not valid:
+                    return CoverResult(Outcome.INVALID_MP3)
+                if not tag_size:
+                    return CoverResult(Outcome.NO_ID3)
+
+                from mutagen.id3 import ID3
+                if in_place:
+                    with _stage('parse'):
+                        patches = TagLayout.id3_cover_patches(f)
+                    if patches is not None:
+                        if not patches:
+                            return CoverResult(Outcome.NO_COVER, method='inplace')
+                        return AudioCoverRemover._patched(f, patches)
+
+                if memory_budget is not None and tag_size > memory_budget:
+                    with _stage('parse'):
+                        f.seek(0)
+                        stripped = TagLayout.id3_stripped_header(f)
+                    if stripped is not None:
+                        return AudioCoverRemover._shrunk(f, *stripped)
+
+                with _stage('parse'):
+                    f.seek(0)
+                    id3 = ID3(f)
+                pictures = id3.getall("APIC")
+                if pictures:
+                    id3.delall("APIC")
+                    with _rewrite_stage() as save:
+                        f.seek(0)  # save() 从当前位置查找旧标签
+                        id3.save(f)
+                    return AudioCoverRemover._saved(file_path, sum(len(p.data) for p in pictures), save)
+                return CoverResult(Outcome.NO_COVER, method='mutagen')
+            
+        except MutagenError as e:
+            if "can't sync to MPEG frame" in str(e):
+                return CoverResult(Outcome.INVALID_MP3)
+            return CoverResult(Outcome.ID3_ERROR, error=str(e))
+
+    @staticmethod
+    def _remove_mp4_cover(file_path: str) -> Optional[CoverResult]:
+        """MP4/M4A: 把 covr 原子原地改写为 free 原子, mdat 不移动, stco/co64 中的块偏移也无需修改
+
+        原子结构无法解析时返回 None, 由调用方退回到 mutagen 重写整个文件。
+        """
+        with open(file_path, 'rb') as f:
+            with _stage('parse'):
+                patches = TagLayout.mp4_cover_patches(f)
+            if patches is None:
+                return None
+            if not patches:
+                return CoverResult(Outcome.NO_COVER, method='inplace')
+            return AudioCoverRemover._patched(f, patches)
+
+    @staticmethod
+    def _truncated(f, patches: List[Patch], end: int) -> CoverResult:
+        """写入补丁后把文件截断到 end; 用于位于文件末尾的标签, 音频数据不移动"""
+        size = os.fstat(f.fileno()).st_size
+        if _staging:
+            written = sum(data if isinstance(data, int) else len(data) for _, data in patches)
+            return CoverResult(Outcome.COVER_REMOVED, method='shrink', bytes_removed=size - end, bytes_written=written,
+                               pending=('patch', f.name, patches, end, size, WriteJournal.digests(f, patches)))
+        with _stage('save'), AudioCoverRemover._writable(f) as f:
+            written = TagLayout.apply_patches(f, patches)
+            f.truncate(end)
+        return CoverResult(Outcome.COVER_REMOVED, method='shrink', bytes_removed=size - end, bytes_written=written)
+
+    @staticmethod
+    def _remove_iff_cover(file_path: str, in_place: bool = False) -> Optional[CoverResult]:
+        """WAV/AIFF: 只修改 ID3 块, 音频数据不移动
+
+        ID3 块位于文件末尾时写入去掉 APIC 帧的标签并截断文件, 同时修正块和容器的长度;
+        否则 (或 in_place 为 True 时) 在块内把 APIC 帧改写为标签填充。
+        无法直接解析时返回 None, 由调用方退回到 mutagen。
+        """
+        with open(file_path, 'rb') as f:
+            with _stage('parse'):
+                chunk = TagLayout.iff_id3_chunk(f)
+                if chunk is None:
+                    return None
+                big_endian, form_end, offset, size = chunk
+                if not offset:
+                    return CoverResult(Outcome.NO_COVER, method='inplace')
+                base = offset + IFF_CHUNK_HEADER_SIZE
+                at_end = base + size + (size & 1) == form_end == os.fstat(f.fileno()).st_size
+                if in_place or not at_end:
+                    patches = TagLayout.id3_cover_patches(f, base)
+                    stripped = None
+                else:
+                    stripped = TagLayout.id3_stripped_header(f, base)
+            if not in_place and at_end:
+                if stripped is None:
+                    return None
+                header = stripped[0]
+                if header is None:
+                    return CoverResult(Outcome.NO_COVER, method='shrink')
+                end = base + len(header) + (len(header) & 1)
+                size_format = '>I' if big_endian else '<I'
+                return AudioCoverRemover._truncated(f, [
+                    (base, header + bytes(len(header) & 1)),
+                    (offset + 4, struct.pack(size_format, len(header))),
+                    (4, struct.pack(size_format, end - 8)),
+                ], end)
+            if patches is None:
+                return None
+            if not patches:
+                return CoverResult(Outcome.NO_COVER, method='inplace')
+            return AudioCoverRemover._patched(f, patches)
+
+    @staticmethod
+    def _remove_apev2_cover(file_path: str) -> Optional[CoverResult]:
+        """APE/WavPack/Musepack: 重写文件末尾的 APEv2 标签, 只去掉 Cover Art 二进制项目
+
+        图片数据不被读取; 没有封面时不做任何写入。无法直接解析时返回 None, 由调用方退回到 mutagen。
+        """
+        with open(file_path, 'rb') as f:
+            with _stage('parse'):
+                stripped = TagLayout.apev2_stripped_tag(f)
+            if stripped is None:
+                return None
+            tail, start = stripped
+            if tail is None:
+                return CoverResult(Outcome.NO_COVER, method='shrink')
+            return AudioCoverRemover._truncated(f, [(start, tail)], start + len(tail))
+
+    @staticmethod
+    def _remove_non_mp3_cover(file_path: str, in_place: bool = False,
+                              memory_budget: Optional[int] = MEMORY_BUDGET) -> CoverResult:
+        """Handle non-MP3 cover removal"""
+        from mutagen import File, MutagenError
+        try:
+            ext = Path(file_path).suffix.lower()
+            if in_place and ext == '.flac':
+                with open(file_path, 'rb') as f:
+                    with _stage('parse'):
+                        patches = TagLayout.flac_cover_patches(f)
+                    if patches is not None:
+                        if not patches:
+                            return CoverResult(Outcome.NO_COVER, method='inplace')
+                        return AudioCoverRemover._patched(f, patches)
+            elif memory_budget is not None and ext == '.flac':
+                with open(file_path, 'rb') as f:
+                    with _stage('parse'):
+                        blocks = TagLayout.read_flac(f)
+                        metadata_size = blocks[-1][0] + 4 + blocks[-1][2] if blocks else 0
+                        stripped = TagLayout.flac_stripped_header(f) if metadata_size > memory_budget else None
+                    if stripped is not None:
+                        return AudioCoverRemover._shrunk(f, *stripped)
+
+            elif ext in MP4_EXTENSIONS:
+                result = AudioCoverRemover._remove_mp4_cover(file_path)
+                if result is not None:
+                    return result
+            elif ext in IFF_EXTENSIONS:
+                result = AudioCoverRemover._remove_iff_cover(file_path, in_place)
+                if result is not None:
+                    return result
+            elif ext in APEV2_EXTENSIONS:
+                result = AudioCoverRemover._remove_apev2_cover(file_path)
+                if result is not None:
+                    return result
+
+            with _stage('parse'):
+                audio = File(file_path)
+            if audio is None:
+                return CoverResult(Outcome.UNSUPPORTED_FORMAT)
+
+            if not hasattr(audio, 'tags') or audio.tags is None:
+                return CoverResult(Outcome.NO_METADATA, method='mutagen')
+
+            if ext == '.flac':
+                removed = sum(len(picture.data) for picture in audio.pictures)
+                if audio.pictures:
+                    audio.clear_pictures()
+                    with _rewrite_stage() as save:
+                        audio.save()
+                    return AudioCoverRemover._saved(file_path, removed, save)
+                return CoverResult(Outcome.NO_COVER, method='mutagen')
+            elif ext == '.ogg':
+                # Vorbis 注释中的封面字段 (以及旧式的 COVERART)
+                keys = [key for key in VORBIS_PICTURE_KEYS if key in audio.tags]
+                if keys:
+                    removed = sum(len(value) for key in keys for value in audio.tags[key])
+                    for key in keys:
+                        del audio.tags[key]
+                    with _rewrite_stage() as save:
+                        audio.save()
+                    return AudioCoverRemover._saved(file_path, removed, save)
+                return CoverResult(Outcome.NO_COVER, method='mutagen')
+            elif ext in MP4_EXTENSIONS:
+                # 原子结构无法直接处理时才重写: mutagen 移动 mdat 并修正 stco/co64 中的块偏移
+                covers = audio.tags.get('covr')
+                if covers:
+                    del audio.tags['covr']
+                    with _rewrite_stage() as save:
+                        audio.save()
+                    return AudioCoverRemover._saved(file_path, sum(len(cover) for cover in covers), save)
+                return CoverResult(Outcome.NO_COVER, method='mutagen')
+            elif hasattr(audio.tags, 'getall'):
+                # WAV/AIFF 中的 ID3 块无法直接处理时 (如整体反同步): 只删除 APIC 帧
+                pictures = audio.tags.getall('APIC')
+                if pictures:
+                    audio.tags.delall('APIC')
+                    with _rewrite_stage() as save:
+                        audio.save()
+                    return AudioCoverRemover._saved(file_path, sum(len(p.data) for p in pictures), save)
+                return CoverResult(Outcome.NO_COVER, method='mutagen')
+            else:
+                # APEv2 等键值标签: 只删除 Cover Art 二进制项目, 其余标签保持不变
+                keys = [key for key in audio.tags.keys()
+                        if TagLayout._is_apev2_cover(key, getattr(audio.tags[key], 'kind', None) == APEV2_ITEM_BINARY)]
+                if keys:
+                    removed = sum(len(audio.tags[key].value) for key in keys)
+                    for key in keys:
+                        del audio.tags[key]
+                    with _rewrite_stage() as save:
+                        audio.save()
+                    return AudioCoverRemover._saved(file_path, removed, save)
+                return CoverResult(Outcome.NO_COVER, method='mutagen')
+
+        except MutagenError as e:
+            return CoverResult(Outcome.AUDIO_ERROR, error=str(e))
+
+    @staticmethod
+    def downscale_covers(file_path: str, policy: CoverPolicy, output_dir: Optional[str] = None,
+                         source_root: Optional[str] = None,
+                         resize: Optional[Callable[[bytes], Optional[Tuple[bytes, str, int, int]]]] = None
+                         ) -> CoverResult:
+        """保留封面, 但把超出 policy 限制的图片重新编码为较小的 JPEG
+
+        resize 接收原图数据, 返回 (新数据, MIME, 宽, 高), 不需要或无法缩小时返回 None;
+        默认在当前进程中调用 _resize_image。批处理时可传入带缓存、在独立进程池中执行的实现。
+        """
+        start = time.perf_counter()
+        fmt = Path(file_path).suffix.lower()[1:]
+        if resize is None:
+            resize = lambda data: _resize_image(data, policy)
+        try:
+            file_path = str(Path(file_path).resolve())
+            if output_dir:
+                output_path = AudioCoverRemover._prepare_output(file_path, output_dir, source_root)
+                with _stage('copy'):
+                    shutil.copy2(file_path, output_path)
+                file_path = str(output_path)
+            result = AudioCoverRemover._downscale_tags(file_path, policy, resize)
+        except Exception as e:
+            result = CoverResult(Outcome.PROCESS_ERROR, error=str(e))
+        return result._replace(fmt=fmt, elapsed=time.perf_counter() - start)
+
+    @staticmethod
+    def _downscale_tags(file_path: str, policy: CoverPolicy, resize) -> CoverResult:
+        """用 mutagen 读取图片 (ID3 APIC、FLAC PICTURE、Vorbis METADATA_BLOCK_PICTURE、MP4 covr), 缩小后保存"""
+        from mutagen import File, MutagenError
+        try:
+            with _stage('parse'):
+                audio = File(file_path)
+            if audio is None:
+                return CoverResult(Outcome.UNSUPPORTED_FORMAT)
+            tags = audio.tags
+
+            # (原图数据, 替换函数) 列表
+            found = []
+            vorbis_values = mp4_covers = None
+            if hasattr(audio, 'pictures'):
+                for picture in audio.pictures:
+                    found.append((picture.data, AudioCoverRemover._flac_picture_setter(picture)))
+            if tags is not None and hasattr(tags, 'getall'):
+                for frame in tags.getall('APIC'):
+                    found.append((frame.data, AudioCoverRemover._apic_setter(frame)))
+            elif tags is not None and 'metadata_block_picture' in tags:
+                import base64
+                from mutagen.flac import Picture
+                vorbis_values = tags['metadata_block_picture']
+                for i, value in enumerate(vorbis_values):
+                    picture = Picture(base64.b64decode(value))
+                    found.append((picture.data, AudioCoverRemover._vorbis_picture_setter(vorbis_values, i, picture)))
+            elif tags is not None and 'covr' in tags:
+                mp4_covers = list(tags['covr'])
+                for i, cover in enumerate(mp4_covers):
+                    found.append((bytes(cover), AudioCoverRemover._mp4_cover_setter(mp4_covers, i)))
+            if not found:
+                return CoverResult(Outcome.NO_COVER, method='mutagen')
+
+            removed = 0
+            for data, replace in found:
+                if not policy.exceeds(data):
+                    continue
+                with _stage('resize'):
+                    resized = resize(data)
+                if resized is not None:
+                    replace(*resized)
+                    removed += len(data) - len(resized[0])
+            if not removed:
+                return CoverResult(Outcome.COVER_KEPT, method='mutagen')
+
+            if hasattr(audio, 'pictures'):
+                pictures = list(audio.pictures)
+                audio.clear_pictures()
+                for picture in pictures:
+                    audio.add_picture(picture)
+            if vorbis_values is not None:
+                tags['metadata_block_picture'] = vorbis_values
+            if mp4_covers is not None:
+                tags['covr'] = mp4_covers
+            with _Stage('save') as save:
+                if hasattr(tags, 'version') and tags.version < (2, 4, 0):
+                    audio.save(v2_version=3)  # 保持原有的 ID3v2.3
+                else:
+                    audio.save()
+            return CoverResult(Outcome.COVER_RESIZED, method='mutagen', bytes_removed=removed,
+                               bytes_written=save.written or os.path.getsize(file_path))
+        except MutagenError as e:
+            return CoverResult(Outcome.AUDIO_ERROR, error=str(e))
+
+    @staticmethod
+    def _apic_setter(frame):
+        def replace(data, mime, width, height):
+            frame.data, frame.mime = data, mime
+        return replace
+
+    @staticmethod
+    def _flac_picture_setter(picture):
+        def replace(data, mime, width, height):
+            picture.data, picture.mime, picture.width, picture.height = data, mime, width, height
+            picture.depth = 24
+        return replace
+
+    @staticmethod
+    def _vorbis_picture_setter(values: List[str], index: int, picture):
+        def replace(data, mime, width, height):
+            import base64
+            picture.data, picture.mime, picture.width, picture.height = data, mime, width, height
+            picture.depth = 24
+            values[index] = base64.b64encode(picture.write()).decode('ascii')
+        return replace
+
+    @staticmethod
+    def _mp4_cover_setter(covers: List, index: int):
+        def replace(data, mime, width, height):
+            from mutagen.mp4 import MP4Cover
+            covers[index] = MP4Cover(data, MP4Cover.FORMAT_PNG if mime == 'image/png' else MP4Cover.FORMAT_JPEG)
+        return replace
+
+    @staticmethod
+    def _sniff_mp3(f) -> Tuple[bool, int]:
+        """MP3 header sniffing, 返回 (是否有效, ID3v2 标签总长度)
+
+        没有标签的文件必须以 MPEG 帧同步字开头; 以 ID3v2 标签开头的文件跳过标签,
+        同步字必须紧跟在标签之后, 中间只允许有零填充。
+        """
+        header = f.read(ID3_HEADER_SIZE)
+        tag_size = 0
+        if len(header) == ID3_HEADER_SIZE and header[:3] == b'ID3':
+            tag_size = ID3_HEADER_SIZE + _syncsafe_to_int(header[6:10])
+            if header[5] & 0x10:  # ID3v2.4 footer
+                tag_size += ID3_HEADER_SIZE
+            f.seek(tag_size)
+            data = f.read(MP3_SYNC_SEARCH_SIZE).lstrip(b'\x00')
+        else:
+            data = header
+        return len(data) >= 2 and data[0] == 0xFF and data[1] & 0xE0 == 0xE0, tag_size
+
+class PictureInfo(NamedTuple):
+    """一张内嵌图片: MIME 类型、字节数和尺寸 (未知时为 0)"""
+    mime: str
+    size: int
+    width: int = 0
+    height: int = 0
+
+class FileAnalysis(NamedTuple):
+    """只读分析一个文件的结果; method 为 'tag' (直接读取标签区域) 或 'mutagen'"""
+    fmt: str
+    pictures: Tuple[PictureInfo, ...] = ()
+    method: str = ''
+    error: str = ''
+
+def _image_dimensions(head: bytes) -> Optional[Tuple[int, int]]:
+    """从图片开头的字节中读取宽高 (JPEG/PNG/GIF/WebP/BMP), 无法识别时返回 None"""
+    if head[:8] == b'\x89PNG\r\n\x1a\n' and len(head) >= 24:
+        return int.from_bytes(head[16:20], 'big'), int.from_bytes(head[20:24], 'big')
+    if head[:6] in (b'GIF87a', b'GIF89a') and len(head) >= 10:
+        return int.from_bytes(head[6:8], 'little'), int.from_bytes(head[8:10], 'little')
+    if head[:2] == b'BM' and len(head) >= 26:
+        return int.from_bytes(head[18:22], 'little'), abs(int.from_bytes(head[22:26], 'little', signed=True))
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP' and len(head) >= 30:
+        chunk = head[12:16]
+        if chunk == b'VP8 ':
+            return int.from_bytes(head[26:28], 'little') & 0x3FFF, int.from_bytes(head[28:30], 'little') & 0x3FFF
+        if chunk == b'VP8L':
+            bits = int.from_bytes(head[21:25], 'little')
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8X':
+            return int.from_bytes(head[24:27], 'little') + 1, int.from_bytes(head[27:30], 'little') + 1
+        return None
+    if head[:2] == b'\xff\xd8':
+        # 逐个跳过 JPEG 段, 直到帧头 (SOF0-SOF15, 不含 DHT/JPG/DAC)
+        pos = 2
+        while pos + 9 <= len(head):
+            if head[pos] != 0xFF:
+                return None
+            marker = head[pos + 1]
+            if marker == 0xFF:
+                pos += 1
+                continue
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                return int.from_bytes(head[pos + 7:pos + 9], 'big'), int.from_bytes(head[pos + 5:pos + 7], 'big')
+            if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+                pos += 2
+                continue
+            pos += 2 + int.from_bytes(head[pos + 2:pos + 4], 'big')
+    return None
+
+def _resize_image(data: bytes, policy: 'CoverPolicy') -> Optional[Tuple[bytes, str, int, int]]:
+    """把图片缩小到 policy.max_px 以内并重新编码为 JPEG, 返回 (数据, MIME, 宽, 高)
+
+    仍超出 policy.max_kb 时逐步缩小尺寸; 结果不比原图小时返回 None (保留原图)。
+    """
+    from PIL import Image
+    with Image.open(io.BytesIO(data)) as image:
+        side = policy.max_px
+        # JPEG 可以在解码时直接按 1/2、1/4、1/8 缩小, 大幅减少解码时间和内存
+        image.draft('RGB', (side, side))
+        image = image.convert('RGB')
+    for _ in range(RESIZE_ATTEMPTS):
+        resized = image.copy()
+        resized.thumbnail((side, side), Image.LANCZOS)
+        out = io.BytesIO()
+        resized.save(out, 'JPEG', quality=policy.quality, optimize=True)
+        encoded = out.getvalue()
+        if len(encoded) <= policy.max_kb * 1024 or side <= RESIZE_MIN_PX:
+            break
+        side = max(RESIZE_MIN_PX, int(side * RESIZE_STEP))
+    if len(encoded) >= len(data):
+        return None
+    return encoded, 'image/jpeg', resized.width, resized.height
+
+class CoverAnalyzer:
+    """只读统计文件中的内嵌图片, 不修改任何文件"""
+
+    @staticmethod
+    def analyze(file_path: str) -> FileAnalysis:
+        """MP3/FLAC/MP4/WAV/AIFF/APEv2 直接读取标签区域和每张图片的开头; 其他格式或无法直接解析时用 mutagen 只读解析"""
+        ext = Path(file_path).suffix.lower()
+        try:
+            with open(file_path, 'rb', buffering=PROBE_BUFFER_SIZE) as f:
+                found = None
+                if ext == '.mp3':
+                    header = f.read(3)
+                    found = TagLayout.id3_pictures(f) if header == b'ID3' else []
+                elif ext == '.flac':
+                    found = TagLayout.flac_pictures(f)
+                elif ext in MP4_EXTENSIONS:
+                    found = TagLayout.mp4_pictures(f)
+                elif ext in IFF_EXTENSIONS:
+                    chunk = TagLayout.iff_id3_chunk(f)
+                    if chunk is not None:
+                        found = TagLayout.id3_pictures(f, chunk[2] + IFF_CHUNK_HEADER_SIZE) if chunk[2] else []
+                elif ext in APEV2_EXTENSIONS:
+                    found = TagLayout.apev2_pictures(f)
+                if found is not None:
+                    pictures = []
+                    for mime, offset, length, width, height in found:
+                        f.seek(offset)
+                        size = _image_dimensions(f.read(min(length, IMAGE_HEAD_SIZE)))
+                        if size:
+                            width, height = size
+                        pictures.append(PictureInfo(mime, length, width, height))
+                    return FileAnalysis(ext[1:], tuple(pictures), 'tag')
+            return CoverAnalyzer._analyze_mutagen(file_path, ext)
+        except Exception as e:
+            return FileAnalysis(ext[1:], error=str(e) or type(e).__name__)
+
+    @staticmethod
+    def _analyze_mutagen(file_path: str, ext: str) -> FileAnalysis:
+        """用 mutagen 只读解析标签, 收集各种格式的图片数据"""
+        from mutagen import File
+        audio = File(file_path)
+        if audio is None:
+            return FileAnalysis(ext[1:], method='mutagen', error='unsupported format')
+        found = []  # (MIME, 图片数据)
+        for picture in getattr(audio, 'pictures', None) or []:
+            found.append((picture.mime, picture.data))
+        tags = audio.tags
+        if tags is not None:
+            if hasattr(tags, 'getall'):  # ID3 (MP3/WAV/AIFF)
+                found.extend((frame.mime, frame.data) for frame in tags.getall('APIC'))
+            for key, value in CoverAnalyzer._tag_items(tags):
+                lower = key.lower()
+                if lower == 'metadata_block_picture':
+                    import base64
+                    from mutagen.flac import Picture
+                    picture = Picture(base64.b64decode(value))
+                    found.append((picture.mime, picture.data))
+                elif lower == 'coverart':
+                    import base64
+                    found.append(('', base64.b64decode(value)))
+                elif lower.startswith('cover art') and getattr(value, 'kind', None) == 1:  # APEv2 二进制项
+                    found.append(('', bytes(value.value).split(b'\0', 1)[-1]))
+                elif lower == 'covr':  # MP4
+                    found.extend(('', bytes(cover)) for cover in value)
+        pictures = []
+        for mime, data in found:
+            width, height = _image_dimensions(data[:IMAGE_HEAD_SIZE]) or (0, 0)
+            pictures.append(PictureInfo(mime, len(data), width, height))
+        return FileAnalysis(ext[1:], tuple(pictures), 'mutagen')
+
+    @staticmethod
+    def _tag_items(tags) -> Iterator[Tuple[str, object]]:
+        """依次返回标签中的 (键, 值); Vorbis 注释的多值字段展开为多项"""
+        if hasattr(tags, 'getall'):
+            return
+        for key, value in tags.items():
+            if isinstance(value, list) and key.lower() != 'covr':
+                for item in value:
+                    yield key, item
+            else:
+                yield key, value
+
+class FileProcessor:
+    @staticmethod
+    def get_audio_files(path: str, recursive: bool = False) -> List[str]:
+        """获取音频文件列表"""
+        return list(FileProcessor.iter_audio_files(path, recursive))
+
+    @staticmethod
+    def iter_audio_files(path: str, recursive: bool = False,
+                         exclude: Iterable[str] = ()) -> Iterator[str]:
+        """边扫描边返回音频文件路径
+
+        基于 os.scandir, 利用目录项自带的类型信息判断目录, 不为每个条目创建 Path 对象。
+        名称匹配 exclude 中任一通配符的目录 (如 '@eaDir'、'.*') 不会进入; 不跟随目录符号链接。
+        """
+        if not os.path.isdir(path):
+            if os.path.isfile(path) and FileProcessor._is_audio_name(path):
+                yield path
+            return
+
+        exclude = tuple(exclude)
+        stack = [path]
+        while stack:
+            try:
+                entries = os.scandir(stack.pop())
+            except OSError:
+                continue  # 无权限或扫描期间被删除的目录
+            subdirs = []
+            with entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive and not any(fnmatch.fnmatch(entry.name, p) for p in exclude):
+                                subdirs.append(entry.path)
+                        elif FileProcessor._is_audio_name(entry.name) and entry.is_file():
+                            yield entry.path
+                    except OSError:
+                        continue
+            # 逆序入栈, 使子目录按扫描顺序处理
+            stack.extend(reversed(subdirs))
+
+    @staticmethod
+    def _is_audio_name(name: str) -> bool:
+        """按扩展名判断是否为支持的音频文件 (--safe-writes 留下的临时副本除外)"""
+        dot = name.rfind('.')
+        return (dot >= 0 and name[dot:].lower() in AUDIO_EXTENSION_SET
+                and not os.path.basename(name).startswith(TEMP_PREFIX))
+
+# ====== 处理记录 ======
+class Manifest:
+    """SQLite 处理记录: 保存每个文件的大小、修改时间、inode、处理结果和运行参数
+
+    之后的运行只处理新增、变化、上次失败或以不同参数 (输出目录、原地修改、缩小封面) 处理过的文件;
+    结果按批提交, 中断的运行最多重做最后一批。
+    """
+
+    SCHEMA_VERSION = 2
+    COLUMNS = ('path', 'size', 'mtime_ns', 'inode', 'success', 'outcome', 'updated', 'options')
+
+    def __init__(self, path: str, batch_size: int = MANIFEST_BATCH_SIZE,
+                 batch_interval: float = MANIFEST_BATCH_INTERVAL, options: str = '',
+                 output_dir: Optional[str] = None, roots: Optional[List[str]] = None):
+        """options: 本次运行参数的指纹 (见 _manifest_options); output_dir: 输出目录, 输出文件缺失时重新处理
+
+        roots: 源根目录 (命令行中的路径)。分片和普通运行都记录相对根目录的路径, 挂载位置不同的节点的
+        记录合并后仍与之后的运行匹配; 以前以绝对路径记录的行在打开时改为相对路径。不同根目录下相对路径
+        相同的文件共用一条记录, 但 inode 不同, 只会被重新处理而不会被误跳过。不指定时 (只合并或清理记录)
+        使用绝对路径。
+        """
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS files ('
+            ' path TEXT PRIMARY KEY,'
+            ' size INTEGER NOT NULL,'
+            ' mtime_ns INTEGER NOT NULL,'
+            ' inode INTEGER NOT NULL,'
+            ' success INTEGER NOT NULL,'
+            ' outcome TEXT,'
+            ' updated REAL NOT NULL,'
+            " options TEXT NOT NULL DEFAULT ''"
+            ') WITHOUT ROWID')
+        if 'options' not in {row[1] for row in self.conn.execute('PRAGMA table_info(files)')}:
+            # 版本 1 的记录没有运行参数, 视为与任何参数都不匹配
+            self.conn.execute("ALTER TABLE files ADD COLUMN options TEXT NOT NULL DEFAULT ''")
+        self.conn.execute(f'PRAGMA user_version={self.SCHEMA_VERSION}')
+        self.conn.commit()
+        self.options = options
+        self.output_dir = output_dir
+        self.roots = [os.path.join(os.path.abspath(root), '') for root in roots or ()]
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self._pending = []
+        self._last_commit = time.monotonic()
+        for root in sorted(self.roots, key=len, reverse=True):  # 嵌套的根目录中的文件属于较深的根目录
+            self._relativize(root)
+
+    def _relativize(self, root: str):
+        """把根目录下以绝对路径记录的行改为相对路径; 已有相对路径的记录时保留后者"""
+        # root 以分隔符结尾, 把最后一个字符加一作为上界即可按主键范围查询
+        upper = root[:-1] + chr(ord(root[-1]) + 1)
+        while True:
+            rows = [(_relative_key(path, root), path) for (path,) in self.conn.execute(
+                'SELECT path FROM files WHERE path >= ? AND path < ? LIMIT ?', (root, upper, self.batch_size))]
+            if not rows:
+                return
+            with self.conn:
+                self.conn.executemany('UPDATE OR IGNORE files SET path = ? WHERE path = ?', rows)
+                self.conn.executemany('DELETE FROM files WHERE path = ?', [(path,) for _, path in rows])
+
+    def _key(self, file_path: str) -> str:
+        """记录的主键: 相对所属根目录的路径, 不在任何根目录下时为绝对路径"""
+        file_path = os.path.abspath(file_path)
+        root = max((root for root in self.roots if file_path.startswith(root)), key=len, default=None)
+        return file_path if root is None else _relative_key(file_path, root)
+
+    def _exists(self, key: str) -> bool:
+        """记录对应的文件是否仍存在; 不知道根目录时保留相对路径的记录"""
+        if os.path.isabs(key):
+            return os.path.exists(key)
+        return not self.roots or any(os.path.exists(os.path.join(root, key)) for root in self.roots)
+
+    def is_current(self, file_path: str, st: Optional[os.stat_result] = None,
+                   root: Optional[str] = None) -> bool:
+        """文件自上次以相同参数成功处理后未发生变化 (且输出文件仍存在) 时返回 True
+
+        root: 源根目录, 用于计算输出路径。
+        """
+        row = self.conn.execute(
+            'SELECT size, mtime_ns, inode, success, options FROM files WHERE path = ?',
+            (self._key(file_path),)).fetchone()
+        if row is None or not row[3] or row[4] != self.options:
+            return False
+        if st is None:
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                return False
+        if row[:3] != (st.st_size, st.st_mtime_ns, st.st_ino):
+            return False
+        if self.output_dir:
+            output_path = AudioCoverRemover._get_output_path(str(Path(file_path).resolve()), self.output_dir, root)
+            return output_path.is_file()
+        return True
+
+    def record(self, file_path: str, success: bool, outcome: str):
+        """记录处理结果 (使用处理后的文件状态), 累积到一批后再提交"""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return
+        self._pending.append((self._key(file_path), st.st_size, st.st_mtime_ns, st.st_ino,
+                              int(success), outcome, time.time(), self.options))
+        if (len(self._pending) >= self.batch_size
+                or time.monotonic() - self._last_commit >= self.batch_interval):
+            self.flush()
+
+    def flush(self):
+        """提交尚未写入的记录"""
+        if self._pending:
+            with self.conn:
+                self.conn.executemany(
+                    f'INSERT OR REPLACE INTO files ({", ".join(self.COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    self._pending)
+            self._pending.clear()
+        self._last_commit = time.monotonic()
+
+    def rebuild(self):
+        """清空所有记录, 下次运行将重新处理全部文件"""
+        self._pending.clear()
+        with self.conn:
+            self.conn.execute('DELETE FROM files')
+
+    def prune(self) -> int:
+        """删除已不存在的文件的记录, 返回删除数量"""
+        self.flush()
+        removed = 0
+        last = ''
+        while True:
+            # 按主键分页读取, 内存占用与记录总数无关
+            paths = [row[0] for row in self.conn.execute(
+                'SELECT path FROM files WHERE path > ? ORDER BY path LIMIT ?', (last, self.batch_size))]
+            if not paths:
+                return removed
+            last = paths[-1]
+            removed += self._delete([(path,) for path in paths if not self._exists(path)])
+
+    def _delete(self, rows: List[Tuple[str]]) -> int:
+        """批量删除记录"""
+        if not rows:
+            return 0
+        with self.conn:
+            self.conn.executemany('DELETE FROM files WHERE path = ?', rows)
+        count = len(rows)
+        rows.clear()
+        return count
+
+    def merge(self, path: str) -> int:
+        """合并另一个处理记录 (如各分片的记录), 同一文件保留较新的结果; 返回合并的记录数"""
+        self.flush()
+        self.conn.execute('ATTACH DATABASE ? AS other', (path,))
+        try:
+            # 按列名读取: 旧版本的记录列的顺序可能不同, 版本 1 还没有 options 列
+            present = {row[1] for row in self.conn.execute('PRAGMA other.table_info(files)')}
+            values = ', '.join(f'o.{name}' if name in present else "''" for name in self.COLUMNS)
+            with self.conn:
+                cursor = self.conn.execute(
+                    f'INSERT OR REPLACE INTO files ({", ".join(self.COLUMNS)}) SELECT {values} FROM other.files AS o'
+                    ' LEFT JOIN files AS f ON f.path = o.path'
+                    ' WHERE f.path IS NULL OR o.updated >= f.updated')
+            return cursor.rowcount
+        finally:
+            self.conn.execute('DETACH DATABASE other')
+
+    def summary(self) -> Counter:
+        """按 (是否成功, 处理结果) 统计记录数"""
+        self.flush()
+        return Counter({(bool(success), outcome): count for success, outcome, count in self.conn.execute(
+            'SELECT success, outcome, COUNT(*) FROM files GROUP BY success, outcome')})
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+# ====== 分片 ======
+def _parse_shard(value: str) -> Tuple[int, int]:
+    """解析 'i/N' 形式的分片编号 (1 <= i <= N), 返回 (从 0 开始的编号, 分片数)"""
+    index, _, count = value.partition('/')
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid shard {value!r} (expected i/N, e.g. 1/4)")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"invalid shard {value!r} (i must be between 1 and N)")
+    return index - 1, count
+
+def _relative_key(file_path: str, root: str) -> str:
+    """文件相对源根目录的路径 ('/' 分隔), 在挂载位置不同的节点上保持一致"""
+    return os.path.relpath(file_path, root).replace(os.sep, '/')
+
+def _shard_of(file_path: str, root: str, count: int) -> int:
+    """按相对路径的稳定哈希把文件分配到 count 个分片之一 (从 0 开始)"""
+    import hashlib
+    key = _relative_key(file_path, root).encode('utf-8', 'surrogateescape')
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'big') % count
+
+def _shard_manifest_path(path: str, shard: Tuple[int, int]) -> str:
+    """分片自己的处理记录路径: library.db -> library.shard-2-of-4.db"""
+    stem, ext = os.path.splitext(path)
+    return f'{stem}.shard-{shard[0] + 1}-of-{shard[1]}{ext}'
+
+def _shard_tasks(tasks: Iterable[Tuple[str, str]], shard: Tuple[int, int],
+                 own: bool = True) -> Iterator[Tuple[str, str]]:
+    """只保留属于本分片的文件; own 为 False 时相反, 只保留其他分片的文件"""
+    index, count = shard
+    for file_path, root in tasks:
+        if (_shard_of(file_path, root, count) == index) == own:
+            yield file_path, root
+
+class WorkLocks:
+    """共享目录中的锁文件, 使多个节点不经协调服务即可互相接管剩余的文件
+
+    每个文件以相对路径的哈希命名: 处理前用 O_CREAT|O_EXCL 创建 .lock.0 认领, 完成后创建 .done。
+    认领的文件在处理、等待 --safe-writes 提交期间, 心跳线程定期刷新锁文件的修改时间; 超过 timeout 秒
+    没有刷新且没有 .done 的锁视为节点已退出, 可被其他节点接管: 接管时同样用 O_EXCL 创建下一代的锁
+    (.lock.1, .lock.2 ...), 锁文件从不删除或改名, 每一代只有一个节点能创建成功。锁的修改时间与锁目录
+    所在文件系统的当前时间比较, 不受各节点之间时钟偏差的影响。
+    锁目录只对一次运行有效, 重新运行时请使用新的目录。
+    """
+
+    def __init__(self, directory: str, timeout: float = LOCK_TIMEOUT):
+        import socket
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.timeout = timeout
+        self.owner = f'{socket.gethostname()}:{os.getpid()}\n'.encode()  # 便于排查是哪个节点持有锁
+        self.claimed = {}  # 文件路径 -> (锁文件名 (不含扩展名), 持有的锁文件)
+        self.stolen = 0    # 从其他分片接管的文件数
+        self._probe = os.path.join(directory, f'.clock-{socket.gethostname()}-{os.getpid()}')
+        self._clock = (float('-inf'), 0.0)  # (测量时的本地时间, 文件系统时间与本地时间之差)
+        self._stop = threading.Event()
+        self._heartbeat = threading.Thread(target=self._refresh, name='work-locks', daemon=True)
+        self._heartbeat.start()
+
+    def _refresh(self):
+        """心跳线程: 刷新本节点持有的锁, 处理时间较长的文件不会被其他节点接管"""
+        while not self._stop.wait(self.timeout / 4):
+            for _, lock in tuple(self.claimed.values()):  # 主线程同时增删 claimed
+                try:
+                    os.utime(lock)
+                except OSError:
+                    pass
+
+    def _fs_time(self) -> float:
+        """锁目录所在文件系统的当前时间
+
+        不指定时间的 utime 在网络文件系统上使用服务器时间, 与创建和刷新锁时写入的修改时间来自同一个时钟。
+        """
+        now = time.time()
+        measured, offset = self._clock
+        if now - measured >= LOCK_CLOCK_INTERVAL:
+            with open(self._probe, 'ab'):
+                pass
+            os.utime(self._probe)
+            offset = os.stat(self._probe).st_mtime - now
+            self._clock = (now, offset)
+        return now + offset
+
+    def _base(self, file_path: str, root: str) -> str:
+        import hashlib
+        key = _relative_key(file_path, root).encode('utf-8', 'surrogateescape')
+        return os.path.join(self.directory, hashlib.blake2b(key, digest_size=16).hexdigest())
+
+    def _create(self, lock: str) -> bool:
+        try:
+            fd = os.open(lock, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            return False
+        try:
+            os.write(fd, self.owner)
+        finally:
+            os.close(fd)
+        return True
+
+    def claim(self, file_path: str, root: str) -> bool:
+        """认领文件; 已被其他节点认领且未超时, 或已完成时返回 False"""
+        base = self._base(file_path, root)
+        generation = 0
+        while os.path.exists(f'{base}.lock.{generation + 1}'):
+            generation += 1
+        lock = f'{base}.lock.{generation}'
+        if not self._create(lock):
+            if os.path.exists(base + '.done') or self._fs_time() - os.stat(lock).st_mtime < self.timeout:
+                return False
+            # 同时接管时只有一个节点能创建下一代的锁; 看到的已不是最新一代时也会在这里失败
+            lock = f'{base}.lock.{generation + 1}'
+            if not self._create(lock):
+                return False
+        self.claimed[file_path] = (base, lock)
+        return True
+
+    def claimed_tasks(self, tasks: Iterable[Tuple[str, str]], stealing: bool = False) -> Iterator[Tuple[str, str]]:
+        """只返回本节点认领成功的文件; stealing 表示这些文件属于其他分片"""
+        for file_path, root in tasks:
+            if self.claim(file_path, root):
+                self.stolen += stealing
+                yield file_path, root
+
+    def done(self, file_path: str):
+        """标记文件已处理 (无论成功与否), 其他节点不再接管"""
+        claim = self.claimed.pop(file_path, None)
+        if claim is not None:
+            with open(claim[0] + '.done', 'wb'):
+                pass
+
+    def close(self):
+        """停止心跳线程"""
+        self._stop.set()
+        self._heartbeat.join()
+        with contextlib.suppress(OSError):
+            os.remove(self._probe)
+
+# ====== 安全写入 ======
+def _sync_files(paths: Iterable[str]):
+    """把 paths 所在文件系统的数据和元数据落盘
+
+    Linux 上每个文件系统只调用一次 syncfs, 一批文件只需一次刷盘; 其他平台逐个 fsync 文件及其所在目录。
+    """
+    by_device = {}
+    for path in paths:
+        try:
+            by_device.setdefault(os.stat(path).st_dev, []).append(path)
+        except FileNotFoundError:
+            pass
+    syncfs = None
+    if sys.platform.startswith('linux'):
+        import ctypes
+        syncfs = getattr(ctypes.CDLL(None, use_errno=True), 'syncfs', None)
+    for device_paths in by_device.values():
+        if syncfs is not None:
+            fd = os.open(device_paths[0], os.O_RDONLY)
+            try:
+                if syncfs(fd) == 0:
+                    continue
+            finally:
+                os.close(fd)
+        for path in set(device_paths) | {os.path.dirname(path) for path in device_paths}:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            except OSError:
+                pass  # 部分平台不支持对目录 fsync
+            finally:
+                os.close(fd)
+
+def _fsync_dir(path: str):
+    """使目录中的新建、删除和改名落盘"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _try_lock(fd: int) -> bool:
+    """对打开的文件加非阻塞的排他锁, 进程退出 (包括崩溃) 时由系统释放; 已被其他进程持有时返回 False"""
+    try:
+        import fcntl
+    except ImportError:  # Windows
+        import msvcrt
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+class JournalBusyError(OSError):
+    """日志目录正被另一个运行 (本机或共享该目录的其他节点) 使用"""
+
+    def __init__(self, directory: str, owner: str):
+        super().__init__(errno.EBUSY, f"journal directory is in use by {owner}", directory)
+        self.owner = owner
+
+class WriteJournal:
+    """--safe-writes: 成批提交工作进程暂存的修改, 中断或崩溃时不留下写了一半的文件
+
+    工作进程不修改原文件 (见 remove_cover 的 staged 参数), 主进程每积累 batch_size 个文件或每隔
+    interval 秒提交一批: 临时副本落盘 -> 写入并 fsync 这一批的重做日志 -> 改名替换原文件、写入补丁 ->
+    再次落盘 -> 删除日志。日志写完之前原文件从未被修改, 写完之后的操作都可以重复执行, 因此崩溃后
+    recover() 重放完整的日志, 丢弃不完整的日志并删除其中和尚未提交的临时副本即可。工作进程在创建
+    临时副本之前先把路径记入 temps-<pid>.log, 崩溃时还没有交给主进程的副本也不会遗留。
+    结果在所在批次提交后才交给 on_result, 处理记录中不会出现尚未落盘的文件。
+    同一日志目录同时只能被一个运行使用 (见 _acquire), 否则会重放、回滚或删除其他运行正在提交的批次和临时副本。
+    """
+
+    def __init__(self, directory: str = JOURNAL_DIR, batch_size: int = SYNC_BATCH_SIZE,
+                 batch_interval: float = SYNC_BATCH_INTERVAL):
+        self._lock = WriteJournal._acquire(directory)
+        self.directory = directory
+        self.batch_size = max(1, batch_size)
+        self.batch_interval = batch_interval
+        self.sequence = 0
+        self.batches = 0
+        self._pending = []  # [(文件路径, 结果, 回调)]
+        self._last_commit = time.monotonic()
+
+    def wrap(self, on_result: Optional[Callable[[str, CoverResult], None]]) -> Callable[[str, CoverResult], None]:
+        """返回先暂存、提交后再调用 on_result 的回调"""
+        def add(file_path, result):
+            self.add(file_path, result, on_result)
+        return add
+
+    def add(self, file_path: str, result: CoverResult,
+            on_result: Optional[Callable[[str, CoverResult], None]] = None):
+        """暂存一个结果; 没有待提交修改的结果立即交给 on_result"""
+        if result.pending is None:
+            if on_result:
+                on_result(file_path, result)
+        else:
+            self._pending.append((file_path, result, on_result))
+        if (len(self._pending) >= self.batch_size
+                or self._pending and time.monotonic() - self._last_commit >= self.batch_interval):
+            self.commit()
+
+    def commit(self):
+        """提交暂存的修改"""
+        self._last_commit = time.monotonic()
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        operations = [result.pending for _, result, _ in batch]
+        _sync_files(op[1] for op in operations if op[0] == 'rename')
+
+        self.sequence += 1
+        journal_path = os.path.join(self.directory, f'batch-{os.getpid()}-{self.sequence:06d}.jnl')
+        with open(journal_path, 'w', encoding='utf-8') as f:
+            for op in operations:
+                f.write(json.dumps(WriteJournal._encode(op), ensure_ascii=False) + '\n')
+            f.write(json.dumps({'commit': len(operations)}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        _fsync_dir(self.directory)
+
+        errors = [WriteJournal._apply(op) for op in operations]
+        _sync_files(op[2] if op[0] == 'rename' else op[1] for op in operations)
+        os.unlink(journal_path)
+        _fsync_dir(self.directory)
+        self.batches += 1
+
+        for (file_path, result, on_result), error in zip(batch, errors):
+            result = result._replace(pending=None)
+            if error:
+                result = result._replace(outcome=Outcome.PROCESS_ERROR, error=error)
+            if on_result:
+                on_result(file_path, result)
+
+    def close(self):
+        """提交剩余的修改; 工作进程已全部退出, 此时仍存在的临时副本都不会再被提交"""
+        self.commit()
+        WriteJournal._remove_temps(self.directory)
+        os.close(self._lock)
+
+    @staticmethod
+    def _acquire(directory: str) -> int:
+        """独占日志目录: 在其中的 owner 文件上加排他锁, 返回需要保持打开的文件描述符
+
+        锁由系统在进程退出时释放, 崩溃后不会留下过期的锁; 网络文件系统需要支持文件锁。
+        owner 文件中记下主机名和进程号, 目录已被其他运行持有时抛出 JournalBusyError。
+        """
+        import socket
+        os.makedirs(directory, exist_ok=True)
+        fd = os.open(os.path.join(directory, JOURNAL_OWNER), os.O_RDWR | os.O_CREAT, 0o644)
+        if not _try_lock(fd):
+            try:
+                owner = os.read(fd, 256).decode('utf-8', 'replace').strip()
+            except OSError:
+                owner = ''  # Windows 上被锁定的字节无法读取
+            os.close(fd)
+            raise JournalBusyError(directory, owner or 'another run')
+        os.ftruncate(fd, 0)
+        os.write(fd, f'{socket.gethostname()}:{os.getpid()}\n'.encode())
+        return fd
 
-    def set_language(self, lang_code: str):
-        """设置当前语言并通知观察者"""
-        if lang_code in self.languages:
-            self.current_lang = lang_code
-            for callback in self.observers:
-                callback()
+    @staticmethod
+    def log_temp(directory: str, temp: str):
+        """在创建临时副本之前记下它的路径 (在工作进程中调用), 未提交的副本由 close() 或 recover() 删除"""
+        with open(os.path.join(directory, f'temps-{os.getpid()}.log'), 'a', encoding='utf-8') as f:
+            f.write(temp + '\n')
 
-    def get(self, key: str, *args) -> str:
-        """获取翻译文本"""
-        try:
-            text = self.translations[self.current_lang].get(key, key)
-            return text.format(*args) if args else text
-        except:
-            return key
+    @staticmethod
+    def _remove_temps(directory: str, orphans: Iterable[str] = ()) -> int:
+        """删除 temps-*.log 中记录的和 orphans 中仍存在的临时副本, 返回删除数量"""
+        import glob
+        orphans = list(orphans)
+        for temps_path in glob.glob(os.path.join(glob.escape(directory), 'temps-*.log')):
+            with open(temps_path, encoding='utf-8') as f:
+                orphans.extend(line.rstrip('\n') for line in f if line.strip())
+            os.unlink(temps_path)
+        removed = 0
+        for temp in set(orphans):
+            if os.path.basename(temp).startswith(TEMP_PREFIX) and os.path.exists(temp):
+                os.unlink(temp)
+                removed += 1
+        return removed
 
-# ====== 核心功能 ======
-class AudioCoverRemover:
     @staticmethod
-    def remove_cover(file_path: str, output_dir: Optional[str] = None) -> Tuple[bool, str]:
-        """Remove audio file cover"""
-        try:
-            file_path = str(Path(file_path).resolve())
-            ext = Path(file_path).suffix.lower()
-            
-            if output_dir:
-                output_path = AudioCoverRemover._get_output_path(file_path, output_dir)
-                if not os.path.exists(output_path.parent):
-                    os.makedirs(output_path.parent)
-                # 先复制文件到输出目录
-                import shutil
-                shutil.copy2(file_path, output_path)
-                file_path = str(output_path)
-            
-            if ext == '.mp3':
-                return AudioCoverRemover._remove_mp3_cover(file_path)
+    def _encode(op: tuple) -> Dict:
+        if op[0] == 'rename':
+            return {'op': 'rename', 'temp': op[1], 'path': op[2]}
+        import base64
+        _, path, patches, end, size, digests = op
+        return {'op': 'patch', 'path': path, 'truncate': end, 'size': size, 'digests': digests,
+                'patches': [[offset, data if isinstance(data, int) else base64.b64encode(data).decode('ascii')]
+                            for offset, data in patches]}
+
+    @staticmethod
+    def _decode(entry: Dict) -> tuple:
+        if entry['op'] == 'rename':
+            return 'rename', entry['temp'], entry['path']
+        import base64
+        patches = [(offset, data if isinstance(data, int) else base64.b64decode(data))
+                   for offset, data in entry['patches']]
+        return 'patch', entry['path'], patches, entry['truncate'], entry['size'], entry['digests']
+
+    @staticmethod
+    def _regions(f, patches: List[Patch]) -> List[bytes]:
+        """每个补丁覆盖区域的当前内容; 清零区域很大, 只取开头和结尾各 JOURNAL_SAMPLE_SIZE 字节"""
+        regions = []
+        for offset, data in patches:
+            length = data if isinstance(data, int) else len(data)
+            if isinstance(data, int) and length > 2 * JOURNAL_SAMPLE_SIZE:
+                f.seek(offset)
+                head = f.read(JOURNAL_SAMPLE_SIZE)
+                f.seek(offset + length - JOURNAL_SAMPLE_SIZE)
+                regions.append(head + f.read(JOURNAL_SAMPLE_SIZE))
             else:
-                return AudioCoverRemover._remove_non_mp3_cover(file_path)
-                
-        except Exception as e:
-            return False, i18n.get('process_error', str(e))
+                f.seek(offset)
+                regions.append(f.read(length))
+        return regions
 
     @staticmethod
-    def _get_output_path(original_path: str, output_dir: str) -> Path:
-        """获取输出路径"""
-        original_path = Path(original_path)
-        output_dir = Path(output_dir)
-        relative_path = original_path.relative_to(original_path.parent)
-        return output_dir / relative_path
+    def digests(f, patches: List[Patch]) -> List[str]:
+        """补丁区域原内容的摘要, 提交或重放前用来确认文件在暂存之后没有被改动"""
+        import hashlib
+        return [hashlib.blake2b(region, digest_size=16).hexdigest() for region in WriteJournal._regions(f, patches)]
 
     @staticmethod
-    def _remove_mp3_cover(file_path: str) -> Tuple[bool, str]:
-        """Handle MP3 cover removal"""
+    def _apply(op: tuple) -> str:
+        """执行一项修改, 可以重复执行; 返回错误信息, 成功时为空字符串
+
+        补丁只在每个区域都还是原内容 (摘要一致) 或已经是补丁内容 (上次提交中断) 时写入。
+        """
         try:
-            if not AudioCoverRemover._is_valid_mp3(file_path):
-                return False, i18n.get('invalid_mp3')
-
-            audio = MP3(file_path)
-            if audio.tags is None:
-                return True, i18n.get('no_id3')
-
-            id3 = ID3(file_path)
-            apic_frames = id3.getall("APIC")
-            if apic_frames:
-                id3.delall("APIC")
-                id3.save()
-                return True, i18n.get('cover_removed')
-            return True, i18n.get('no_cover')
-            
-        except MutagenError as e:
-            if "can't sync to MPEG frame" in str(e):
-                return False, i18n.get('invalid_mp3')
-            return False, i18n.get('id3_error', str(e))
+            if op[0] == 'rename':
+                if os.path.exists(op[1]):
+                    os.replace(op[1], op[2])
+                return ''
+            import hashlib
+            _, path, patches, end, size, digests = op
+            with open(path, 'rb+') as f:
+                current = os.fstat(f.fileno()).st_size
+                if current != size and current != end:
+                    return f"{path} changed since it was processed"
+                for (_, data), region, digest in zip(patches, WriteJournal._regions(f, patches), digests):
+                    patched = bytes(len(region)) if isinstance(data, int) else data[:len(region)]
+                    if region != patched and hashlib.blake2b(region, digest_size=16).hexdigest() != digest:
+                        return f"{path} changed since it was processed"
+                TagLayout.apply_patches(f, patches)
+                if end is not None:
+                    f.truncate(end)
+            return ''
+        except OSError as e:
+            return str(e)
 
     @staticmethod
-    def _remove_non_mp3_cover(file_path: str) -> Tuple[bool, str]:
-        """Handle non-MP3 cover removal"""
+    def recover(directory: str = JOURNAL_DIR) -> Tuple[int, int, int]:
+        """崩溃后恢复: 重放完整的日志, 回滚不完整的日志, 删除未提交的临时副本
+
+        返回 (重放的批数, 回滚的批数, 删除的临时文件数)。目录正被其他运行使用时抛出 JournalBusyError,
+        其中的日志和临时副本保持不变。
+        """
+        lock = WriteJournal._acquire(directory)
         try:
-            audio = File(file_path)
-            if audio is None:
-                return False, i18n.get('unsupported_format')
+            return WriteJournal._recover(directory)
+        finally:
+            os.close(lock)
 
-            if not hasattr(audio, 'tags') or audio.tags is None:
-                return True, i18n.get('no_metadata')
+    @staticmethod
+    def _recover(directory: str) -> Tuple[int, int, int]:
+        """recover() 的实现, 调用方已持有日志目录的锁"""
+        import glob
+        replayed = rolled_back = 0
+        orphans = []
+        for journal_path in sorted(glob.glob(os.path.join(glob.escape(directory), 'batch-*.jnl'))):
+            with open(journal_path, encoding='utf-8') as f:
+                entries = []
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        break  # 写到一半的最后一行
+            complete = bool(entries) and entries[-1].get('commit') == len(entries) - 1
+            operations = [WriteJournal._decode(entry) for entry in entries if 'op' in entry]
+            if complete:
+                for op in operations:
+                    WriteJournal._apply(op)
+                _sync_files(op[2] if op[0] == 'rename' else op[1] for op in operations)
+                replayed += 1
+            else:
+                orphans.extend(op[1] for op in operations if op[0] == 'rename')
+                rolled_back += 1
+            os.unlink(journal_path)
+        # 完整的日志已经重放, 剩下的临时副本都没有提交
+        removed = WriteJournal._remove_temps(directory, orphans)
+        _fsync_dir(directory)
+        return replayed, rolled_back, removed
 
-            ext = Path(file_path).suffix.lower()
-            if ext in ('.flac', '.ogg'):
-                if hasattr(audio, 'pictures') and len(audio.pictures) > 0:
-                    audio.pictures = []
-                    audio.save()
-                    return True, i18n.get('cover_removed')
-                return True, i18n.get('no_cover')
+# ====== 调度 ======
+def _set_io_priority(io_class: int, level: int = 0) -> bool:
+    """通过 ioprio_set 系统调用设置当前进程的 I/O 优先级, 不支持时返回 False (仅 Linux)"""
+    import ctypes
+    import platform
+    number = IOPRIO_SET_SYSCALLS.get(platform.machine())
+    if number is None or not sys.platform.startswith('linux'):
+        return False
+    libc = ctypes.CDLL(None, use_errno=True)
+    return libc.syscall(number, IOPRIO_WHO_PROCESS, 0, (io_class << IOPRIO_CLASS_SHIFT) | level) == 0
+
+def _parse_ionice(value: str) -> Tuple[int, int]:
+    """解析 'idle'、'be' 或 'be:LEVEL' 形式的 I/O 优先级"""
+    name, _, level = value.partition(':')
+    if name not in IOPRIO_CLASSES:
+        raise argparse.ArgumentTypeError(f"invalid I/O class {name!r} (choose from {', '.join(IOPRIO_CLASSES)})")
+    try:
+        level = int(level) if level else IOPRIO_DEFAULT_LEVEL
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid I/O priority level {level!r}")
+    if not 0 <= level <= 7:
+        raise argparse.ArgumentTypeError('I/O priority level must be 0-7')
+    return IOPRIO_CLASSES[name], level
+
+def _parse_rate(value: str) -> int:
+    """解析 '512K'、'50M'、'1G' 形式的每秒字节数"""
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    scale = units.get(value[-1:].upper(), 1)
+    try:
+        rate = float(value[:-1] if scale != 1 else value) * scale
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid rate {value!r}")
+    if rate <= 0:
+        raise argparse.ArgumentTypeError('rate must be positive')
+    return int(rate)
+
+class IOScheduler:
+    """批处理调度器: 写入限速、按设备限制并发, 并按延迟目标自动调整并发数
+
+    - write_rate: 每秒写入字节数上限 (令牌桶; 文件处理完成后按 CoverResult.bytes_written 扣除, 欠额还清前不提交新文件。
+      写入量按进程的 wchar 计量, 无法计量的平台上 mutagen 保存按文件大小计, 限速偏严)
+    - per_device: 同一设备 (st_dev) 上同时处理的文件数上限
+    - latency_target: 单文件处理耗时目标 (秒)。每完成 window 个文件检查一次 p90 耗时:
+      超出目标时并发数乘以 SCHED_DECREASE, 否则在吞吐量仍有提升时加一 (AIMD)
+    - nice / ionice: 工作进程的 CPU 和 I/O 优先级
+    """
+
+    def __init__(self, max_workers: int, write_rate: Optional[int] = None, per_device: Optional[int] = None,
+                 latency_target: Optional[float] = None, nice: int = 0,
+                 ionice: Optional[Tuple[int, int]] = None, window: int = SCHED_WINDOW):
+        self.max_workers = max(1, max_workers)
+        self.write_rate = write_rate
+        self.per_device = per_device
+        self.latency_target = latency_target
+        self.nice = nice
+        self.ionice = ionice
+        self.window = window
+        self.limit = max(1, self.max_workers // 2) if latency_target else self.max_workers
+        self._tokens = float(write_rate or 0)
+        self._refilled = time.monotonic()
+        self._inflight = Counter()  # 设备 -> 正在处理的文件数
+        self._latencies = []
+        self._window_start = time.monotonic()
+        self._best_throughput = 0.0
+        self.decisions = []  # (距开始的秒数, 新并发数, p90 耗时, 吞吐量, 原因)
+        self.started = time.monotonic()
+        self.throttled_seconds = 0.0
+        self.deferred = 0
+        self.peak_per_device = Counter()
+
+    def device_of(self, file_path: str) -> Optional[int]:
+        """文件所在设备; 未限制每设备并发时不做 stat"""
+        if not self.per_device:
+            return None
+        try:
+            return os.stat(file_path).st_dev
+        except OSError:
+            return None
+
+    def device_free(self, device: Optional[int]) -> bool:
+        return not self.per_device or device is None or self._inflight[device] < self.per_device
+
+    def throttle_delay(self) -> float:
+        """写入额度不足时需要等待的秒数"""
+        if not self.write_rate:
+            return 0.0
+        now = time.monotonic()
+        self._tokens = min(float(self.write_rate), self._tokens + (now - self._refilled) * self.write_rate)
+        self._refilled = now
+        return max(0.0, -self._tokens / self.write_rate)
+
+    def on_submit(self, device: Optional[int]):
+        self._inflight[device] += 1
+        if self._inflight[device] > self.peak_per_device[device]:
+            self.peak_per_device[device] = self._inflight[device]
+
+    def on_complete(self, device: Optional[int], result: CoverResult):
+        self._inflight[device] -= 1
+        if self.write_rate:
+            self._tokens -= result.bytes_written
+        if self.latency_target:
+            self._latencies.append(result.elapsed)
+            if len(self._latencies) >= self.window:
+                self._adjust()
+
+    def _adjust(self):
+        """一个窗口结束: 根据 p90 耗时和吞吐量调整并发数"""
+        now = time.monotonic()
+        latencies = sorted(self._latencies)
+        p90 = latencies[int(0.9 * (len(latencies) - 1))]
+        throughput = len(latencies) / max(now - self._window_start, 1e-9)
+        limit = self.limit
+        if p90 > self.latency_target:
+            limit, reason = max(1, int(limit * SCHED_DECREASE)), 'latency'
+            self._best_throughput = throughput
+        elif throughput >= self._best_throughput * SCHED_MIN_GAIN and limit < self.max_workers:
+            limit, reason = limit + 1, 'increase'
+            self._best_throughput = throughput
+        else:
+            # 增加并发已不再提升吞吐量: 保持, 以目前最好的吞吐量为基准
+            reason = 'hold'
+            self._best_throughput = max(self._best_throughput, throughput)
+        if limit != self.limit or reason == 'latency':
+            self.decisions.append((now - self.started, limit, p90, throughput, reason))
+        self.limit = limit
+        self._latencies = []
+        self._window_start = now
+
+    def stats(self) -> Dict:
+        """调度决策的统计, 用于调整参数"""
+        return {
+            'limit': self.limit,
+            'max_workers': self.max_workers,
+            'throttled_seconds': self.throttled_seconds,
+            'deferred': self.deferred,
+            'peak_per_device': {str(device): peak for device, peak in self.peak_per_device.items()},
+            'decisions': [{'t': t, 'limit': limit, 'p90': p90, 'files_per_sec': rate, 'reason': reason}
+                          for t, limit, p90, rate, reason in self.decisions],
+        }
+
+# ====== 命令行批处理 ======
+def _init_worker(instrument: bool = False, profile_path: Optional[str] = None,
+                 nice: int = 0, ionice: Optional[Tuple[int, int]] = None):
+    """工作进程初始化: 按需开启阶段统计和性能分析 (结果文本由主进程生成), 设置进程优先级"""
+    enable_instrumentation(instrument)
+    if nice and hasattr(os, 'nice'):
+        os.nice(nice)
+    if ionice:
+        _set_io_priority(*ionice)
+    if profile_path:
+        import cProfile
+        from multiprocessing.util import Finalize
+        profiler = cProfile.Profile()
+        profiler.enable()
+        # 工作进程正常退出时写出各自的分析结果, 由主进程合并
+        Finalize(None, profiler.dump_stats, args=(f'{profile_path}.worker-{os.getpid()}',), exitpriority=10)
+
+def _process_file_task(file_path: str, source_root: Optional[str],
+                       options: Dict) -> Tuple[str, CoverResult, Optional[List]]:
+    """在工作进程中处理单个文件 (需为模块级函数以便序列化), 同时返回阶段采样"""
+    with _stage('file'):
+        result = AudioCoverRemover.remove_cover(file_path, source_root=source_root, **options)
+    return file_path, result, take_stage_samples()
+
+class BatchRunner:
+    """使用进程池批量处理文件"""
+
+    def __init__(self, jobs: Optional[int] = None, output_dir: Optional[str] = None,
+                 metrics: Optional[Metrics] = None, profile_path: Optional[str] = None,
+                 scheduler: Optional[IOScheduler] = None, **options):
+        """options 原样传给 AudioCoverRemover.remove_cover
+
+        指定 metrics 时收集各阶段统计; 指定 profile_path 时每个工作进程写出 cProfile 结果;
+        指定 scheduler 时由其决定何时提交文件 (此时 jobs 为工作进程数上限)。
+        """
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        self.options = dict(options, output_dir=output_dir)
+        self.metrics = metrics
+        self.profile_path = profile_path
+        self.scheduler = scheduler
+        self.processed = 0
+        self.failed = 0
+        self.outcomes = Counter()
+        self.methods = Counter()  # (格式, 处理方式) -> 文件数
+        self.bytes_removed = 0
+        self.bytes_written = 0
+
+    def run(self, tasks: Iterable[Tuple[str, Optional[str]]],
+            on_result: Optional[Callable[[str, CoverResult], None]] = None) -> Tuple[int, int]:
+        """处理 (文件路径, 源根目录) 序列, 返回 (处理数, 失败数)
+
+        同时提交的任务数有上限, 因此 tasks 可以是惰性生成器, 不必先构建完整列表。
+        """
+        if self.scheduler:
+            return self._run_scheduled(tasks, on_result)
+        if self.jobs == 1:
+            enable_instrumentation(self.metrics is not None)
+            try:
+                for file_path, root in tasks:
+                    self._record(_process_file_task(file_path, root, self.options), on_result)
+            finally:
+                enable_instrumentation(False)
+            return self.processed, self.failed
+
+        max_pending = self.jobs * 4
+        with ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_worker,
+                                 initargs=(self.metrics is not None, self.profile_path)) as executor:
+            pending = set()
+            for file_path, root in tasks:
+                pending.add(executor.submit(_process_file_task, file_path, root, self.options))
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._record(future.result(), on_result)
+            for future in wait(pending).done:
+                self._record(future.result(), on_result)
+        return self.processed, self.failed
+
+    def _run_scheduled(self, tasks, on_result) -> Tuple[int, int]:
+        """由 IOScheduler 控制提交: 并发数、每设备并发和写入限速"""
+        scheduler = self.scheduler
+        iterator = iter(tasks)
+        waiting = []  # 所在设备已满而暂缓提交的 (文件路径, 源根目录, 设备)
+        exhausted = False
+
+        def take():
+            nonlocal exhausted
+            for i, item in enumerate(waiting):
+                if scheduler.device_free(item[2]):
+                    return waiting.pop(i)
+            while not exhausted and len(waiting) < SCHED_READAHEAD:
+                task = next(iterator, None)
+                if task is None:
+                    exhausted = True
+                    break
+                item = (task[0], task[1], scheduler.device_of(task[0]))
+                if scheduler.device_free(item[2]):
+                    return item
+                waiting.append(item)
+                scheduler.deferred += 1
+            return None
+
+        with ProcessPoolExecutor(max_workers=scheduler.max_workers, initializer=_init_worker,
+                                 initargs=(self.metrics is not None, self.profile_path,
+                                           scheduler.nice, scheduler.ionice)) as executor:
+            pending = {}  # future -> 设备
+            while True:
+                delay = scheduler.throttle_delay()
+                if delay > 0 and not pending:
+                    time.sleep(delay)
+                    scheduler.throttled_seconds += delay
+                    continue
+                if not delay:
+                    while len(pending) < scheduler.limit:
+                        item = take()
+                        if item is None:
+                            break
+                        future = executor.submit(_process_file_task, item[0], item[1], self.options)
+                        pending[future] = item[2]
+                        scheduler.on_submit(item[2])
+                    if not pending:
+                        break
+                start = time.monotonic()
+                done, _ = wait(pending, timeout=delay or None, return_when=FIRST_COMPLETED)
+                if delay:
+                    scheduler.throttled_seconds += time.monotonic() - start
+                for future in done:
+                    item = future.result()
+                    scheduler.on_complete(pending.pop(future), item[1])
+                    self._record(item, on_result)
+        return self.processed, self.failed
+
+    def _record(self, item: Tuple[str, CoverResult, Optional[List]], on_result):
+        """统计单个结果"""
+        file_path, result, samples = item
+        self.processed += 1
+        self.outcomes[result.outcome] += 1
+        if result.method:
+            self.methods[result.fmt, result.method] += 1
+        self.bytes_removed += result.bytes_removed
+        self.bytes_written += result.bytes_written
+        if not result.success:
+            self.failed += 1
+        if self.metrics:
+            self.metrics.record_file(file_path, result.success, samples)
+        if on_result:
+            on_result(file_path, result)
+
+class _ImageCache:
+    """按图片内容哈希缓存缩小结果; 同一张图片被多个文件同时请求时共享同一个编码任务"""
+
+    def __init__(self, executor, policy: CoverPolicy, limit: int = DOWNSCALE_CACHE_ENTRIES):
+        self.executor = executor
+        self.policy = policy
+        self.limit = limit
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # 哈希 -> Future
+        self._lock = threading.Lock()
+
+    def resize(self, data: bytes) -> Optional[Tuple[bytes, str, int, int]]:
+        import hashlib
+        key = hashlib.blake2b(data, digest_size=16).digest()
+        with self._lock:
+            future = self._entries.get(key)
+            if future is None:
+                self.misses += 1
+                future = self._entries[key] = self.executor.submit(_resize_image, data, self.policy)
+                if len(self._entries) > self.limit:
+                    self._entries.popitem(last=False)
             else:
-                audio.tags.clear()
-                audio.save()
-                return True, i18n.get('metadata_cleared')
-                
-        except MutagenError as e:
-            return False, i18n.get('audio_error', str(e))
+                self.hits += 1
+                self._entries.move_to_end(key)
+        return future.result()
 
-    @staticmethod
-    def _is_valid_mp3(file_path: str) -> bool:
-        """Simple MP3 validation"""
+class DownscaleRunner(BatchRunner):
+    """批量缩小封面: 文件读写在线程池中进行, 图片解码和编码在独立的进程池中进行, 两者重叠执行"""
+
+    def __init__(self, jobs: Optional[int] = None, output_dir: Optional[str] = None,
+                 policy: CoverPolicy = CoverPolicy(), image_jobs: Optional[int] = None,
+                 metrics: Optional[Metrics] = None):
+        super().__init__(jobs, output_dir, metrics=metrics)
+        self.policy = policy
+        self.image_jobs = max(1, image_jobs or os.cpu_count() or 1)
+        self.cache = None
+
+    def run(self, tasks: Iterable[Tuple[str, Optional[str]]],
+            on_result: Optional[Callable[[str, CoverResult], None]] = None) -> Tuple[int, int]:
+        from concurrent.futures import ThreadPoolExecutor
+        output_dir = self.options['output_dir']
+        with ProcessPoolExecutor(max_workers=self.image_jobs) as images, \
+                ThreadPoolExecutor(max_workers=self.jobs) as files:
+            self.cache = _ImageCache(images, self.policy)
+
+            def process(file_path, root):
+                result = AudioCoverRemover.downscale_covers(file_path, self.policy, output_dir, root,
+                                                            self.cache.resize)
+                return file_path, result, None
+
+            pending = set()
+            for file_path, root in tasks:
+                pending.add(files.submit(process, file_path, root))
+                if len(pending) >= self.jobs * 4:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._record(future.result(), on_result)
+            for future in wait(pending).done:
+                self._record(future.result(), on_result)
+        return self.processed, self.failed
+
+def _read_prefix(file_path: str, size: int) -> bytes:
+    """一次读取文件开头的 size 字节"""
+    with open(file_path, 'rb', buffering=0) as f:
+        return f.read(size)
+
+class AsyncBatchRunner(BatchRunner):
+    """基于 asyncio 的流水线: 扫描 -> 预读文件头 -> 判断 -> 修改, 适合延迟高的网络存储
+
+    每个文件只用一次读取取得开头的 ASYNC_PREFETCH_SIZE 字节, 在内存中判断是否有封面;
+    确定没有封面的文件不再访问。阻塞的文件操作和 mutagen 调用在线程池中执行,
+    读取和写入分别受 read_limit / write_limit 限制, 避免压垮文件服务器。
+    阶段统计记录 prefetch 和 modify 的耗时 (各线程共享进程级 I/O 计数, 不单独统计)。
+    """
+
+    def __init__(self, output_dir: Optional[str] = None, read_limit: int = ASYNC_READ_CONCURRENCY,
+                 write_limit: int = ASYNC_WRITE_CONCURRENCY, metrics: Optional[Metrics] = None, **options):
+        """options 原样传给 AudioCoverRemover.remove_cover"""
+        super().__init__(1, output_dir, metrics=metrics, **options)
+        self.prefilter = self.options.pop('prefilter', True)
+        self.read_limit = max(1, read_limit)
+        self.write_limit = max(1, write_limit)
+
+    def run(self, tasks: Iterable[Tuple[str, Optional[str]]],
+            on_result: Optional[Callable[[str, CoverResult], None]] = None) -> Tuple[int, int]:
+        import asyncio
+        # 预先导入 mutagen, 避免各线程首次处理文件时争用导入锁
+        import mutagen.id3
+        import mutagen._file
+        asyncio.run(self._run(tasks, on_result))
+        return self.processed, self.failed
+
+    async def _run(self, tasks, on_result):
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+        loop = asyncio.get_running_loop()
+        workers = self.read_limit + self.write_limit
+        queue_ = asyncio.Queue(maxsize=workers * 2)
+        reads = asyncio.Semaphore(self.read_limit)
+        writes = asyncio.Semaphore(self.write_limit)
+
+        with ThreadPoolExecutor(max_workers=1) as discover_executor, \
+                ThreadPoolExecutor(max_workers=workers) as executor:
+            async def produce():
+                # 目录扫描本身也是阻塞的网络操作, 在单独的线程中逐个取出
+                iterator = iter(tasks)
+                while True:
+                    task = await loop.run_in_executor(discover_executor, next, iterator, None)
+                    if task is None:
+                        break
+                    await queue_.put(task)
+                for _ in range(workers):
+                    await queue_.put(None)
+
+            async def work():
+                while True:
+                    task = await queue_.get()
+                    if task is None:
+                        return
+                    file_path, root = task
+                    result, samples = await self._process(loop, executor, reads, writes, file_path, root)
+                    self._record((file_path, result, samples), on_result)
+
+            await asyncio.gather(produce(), *(work() for _ in range(workers)))
+
+    async def _process(self, loop, executor, reads, writes, file_path: str,
+                       root: Optional[str]) -> Tuple[CoverResult, List[Tuple[str, float, int, int]]]:
+        """处理单个文件, 返回结果和阶段采样"""
+        start = time.perf_counter()
+        ext = Path(file_path).suffix.lower()
+        decision = None
+        samples = []
+        if self.prefilter:
+            async with reads:
+                try:
+                    header = await loop.run_in_executor(executor, _read_prefix, file_path, ASYNC_PREFETCH_SIZE)
+                except OSError as e:
+                    return CoverResult(Outcome.PROCESS_ERROR, fmt=ext[1:], error=str(e),
+                                       elapsed=time.perf_counter() - start), samples
+            samples.append(('prefetch', time.perf_counter() - start, len(header), 0))
+            # 标签超出预读范围时结果为 None, 交给 remove_cover 完整处理;
+            # APEv2 标签位于文件末尾, 无法根据文件头判断
+            decision = None if ext in APEV2_EXTENSIONS else TagLayout.probe_cover(io.BytesIO(header), ext)
+            if decision is False and not self.options['output_dir']:
+                return CoverResult(Outcome.NO_COVER, fmt=ext[1:], method='probe',
+                                   elapsed=time.perf_counter() - start), samples
+
+        async with writes:
+            modify_start = time.perf_counter()
+            # 只有已确定有封面时才不再预检: 标签超出预读范围 (None) 时仍先在磁盘上读取标签区域判断,
+            # 不做完整解析; 没有封面但需要输出副本时由 remove_cover 链接或复制
+            result = await loop.run_in_executor(
+                executor, lambda: AudioCoverRemover.remove_cover(
+                    file_path, source_root=root, prefilter=self.prefilter and decision is not True, **self.options))
+        samples.append(('modify', time.perf_counter() - modify_start, 0, result.bytes_written))
+        return result._replace(elapsed=time.perf_counter() - start), samples
+
+def _analyze_chunk(file_paths: List[str]) -> List[Tuple[str, FileAnalysis]]:
+    """在工作进程中分析一组文件; 成组提交以减少进程间通信"""
+    return [(file_path, CoverAnalyzer.analyze(file_path)) for file_path in file_paths]
+
+class AnalysisTotals:
+    """按格式汇总图片数量和字节数"""
+
+    def __init__(self):
+        self.formats = {}  # 格式 -> [文件数, 有图片的文件数, 图片数, 图片字节数, 出错文件数]
+        self.mimes = Counter()
+
+    def add(self, analysis: FileAnalysis):
+        entry = self.formats.get(analysis.fmt)
+        if entry is None:
+            entry = self.formats[analysis.fmt] = [0, 0, 0, 0, 0]
+        entry[0] += 1
+        if analysis.pictures:
+            entry[1] += 1
+            entry[2] += len(analysis.pictures)
+            entry[3] += sum(picture.size for picture in analysis.pictures)
+            self.mimes.update(picture.mime or 'unknown' for picture in analysis.pictures)
+        if analysis.error:
+            entry[4] += 1
+
+    def rows(self) -> List[Dict]:
+        """每种格式一行, 最后一行为合计"""
+        rows = [dict(zip(ANALYSIS_TOTAL_FIELDS, [fmt] + entry)) for fmt, entry in sorted(self.formats.items())]
+        rows.append(dict(zip(ANALYSIS_TOTAL_FIELDS,
+                             ['total'] + [sum(entry[i] for entry in self.formats.values()) for i in range(5)])))
+        return rows
+
+class LibraryAnalyzer:
+    """使用进程池并行分析文件, 结果逐个交给回调, 不在内存中保留每个文件的结果"""
+
+    def __init__(self, jobs: Optional[int] = None, chunk_size: int = ANALYZE_CHUNK_SIZE):
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+        self.totals = AnalysisTotals()
+
+    def run(self, file_paths: Iterable[str], on_row: Callable[[str, FileAnalysis], None]) -> AnalysisTotals:
+        chunks = self._chunks(file_paths)
+        if self.jobs == 1:
+            for chunk in chunks:
+                self._record(_analyze_chunk(chunk), on_row)
+            return self.totals
+
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            pending = set()
+            for chunk in chunks:
+                pending.add(executor.submit(_analyze_chunk, chunk))
+                if len(pending) >= self.jobs * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._record(future.result(), on_row)
+            for future in wait(pending).done:
+                self._record(future.result(), on_row)
+        return self.totals
+
+    def _chunks(self, file_paths: Iterable[str]) -> Iterator[List[str]]:
+        chunk = []
+        for file_path in file_paths:
+            chunk.append(file_path)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _record(self, results: List[Tuple[str, FileAnalysis]], on_row):
+        for file_path, analysis in results:
+            self.totals.add(analysis)
+            on_row(file_path, analysis)
+
+class _CsvReport:
+    """CSV 报告: 每个文件一行; 汇总表单独输出"""
+
+    def __init__(self, stream):
+        import csv
+        self.writer = csv.writer(stream)
+        self.writer.writerow(ANALYSIS_FIELDS)
+
+    def write(self, file_path: str, analysis: FileAnalysis):
+        self.writer.writerow(_analysis_row(file_path, analysis))
+
+    def close(self, totals: AnalysisTotals, summary_stream):
+        import csv
+        writer = csv.DictWriter(summary_stream, ANALYSIS_TOTAL_FIELDS)
+        writer.writeheader()
+        writer.writerows(totals.rows())
+
+class _JsonReport:
+    """JSON 报告: {"files": [...], "totals": [...], "mime_types": {...}}, 逐行写出文件列表"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.first = True
+        stream.write('{"files": [')
+
+    def write(self, file_path: str, analysis: FileAnalysis):
+        row = dict(zip(ANALYSIS_FIELDS, _analysis_row(file_path, analysis)))
+        self.stream.write(('\n' if self.first else ',\n') + json.dumps(row, ensure_ascii=False))
+        self.first = False
+
+    def close(self, totals: AnalysisTotals, summary_stream):
+        self.stream.write('\n], "totals": ' + json.dumps(totals.rows())
+                          + ', "mime_types": ' + json.dumps(dict(totals.mimes)) + '}\n')
+
+def _analysis_row(file_path: str, analysis: FileAnalysis) -> list:
+    pictures = analysis.pictures
+    return [file_path, analysis.fmt, len(pictures), sum(picture.size for picture in pictures),
+            ';'.join(f'{picture.width}x{picture.height}' for picture in pictures),
+            ';'.join(picture.mime for picture in pictures), analysis.method, analysis.error]
+
+def _run_analyze(args: argparse.Namespace) -> int:
+    """只读分析模式: 输出每个文件的图片信息和按格式的汇总, 不修改任何文件"""
+    fmt = args.report_format or ('json' if args.report and args.report.lower().endswith('.json') else 'csv')
+    to_stdout = not args.report or args.report == '-'
+    stream = sys.stdout if to_stdout else open(args.report, 'w', encoding='utf-8', newline='')
+    try:
+        report = _JsonReport(stream) if fmt == 'json' else _CsvReport(stream)
+        tasks = _iter_cli_tasks(args.paths, args.recursive, args.exclude)
+        if args.shard:
+            tasks = _shard_tasks(tasks, args.shard)
+        files = (task[0] for task in tasks)
+        totals = LibraryAnalyzer(args.jobs).run(files, report.write)
+        # 报告写到标准输出时, CSV 汇总表改写到标准错误, 避免混在一起
+        report.close(totals, sys.stderr if to_stdout else sys.stdout)
+    finally:
+        if not to_stdout:
+            stream.close()
+    return 0
+
+def _source_root(path: str) -> str:
+    """命令行路径对应的源根目录: 目录本身, 或单个文件所在的目录"""
+    return path if os.path.isdir(path) else os.path.dirname(os.path.abspath(path))
+
+def _iter_cli_tasks(paths: List[str], recursive: bool,
+                    exclude: Iterable[str] = ()) -> Iterator[Tuple[str, str]]:
+    """边扫描边展开命令行路径为 (文件路径, 源根目录)"""
+    for path in paths:
+        root = _source_root(path)
+        for file_path in FileProcessor.iter_audio_files(path, recursive, exclude):
+            yield file_path, root
+
+def _timed_discovery(tasks: Iterable[Tuple[str, str]], metrics: Metrics) -> Iterator[Tuple[str, str]]:
+    """统计目录扫描阶段: 每取得一个文件所花的时间"""
+    iterator = iter(tasks)
+    while True:
+        start = time.perf_counter()
         try:
-            with open(file_path, 'rb') as f:
-                header = f.read(4)
-                return len(header) >= 2 and header[0] == 0xFF and (header[1] & 0xE0) == 0xE0
-        except:
-            return False
+            task = next(iterator)
+        except StopIteration:
+            return
+        metrics.observe('discover', time.perf_counter() - start)
+        yield task
 
-class FileProcessor:
-    @staticmethod
-    def get_audio_files(path: str, recursive: bool = False) -> List[str]:
-        """获取音频文件列表"""
-        path_obj = Path(path)
-        if path_obj.is_file():
-            return [str(path_obj)] if path_obj.suffix.lower() in AUDIO_EXTENSIONS else []
-        
-        if recursive:
-            return [str(p) for p in path_obj.rglob('*') if p.suffix.lower() in AUDIO_EXTENSIONS]
+def _print_stage_stats(metrics: Metrics):
+    """打印各阶段的统计表"""
+    print(f"{'stage':<10}{'count':>10}{'total s':>10}{'mean ms':>10}{'read MB':>10}{'written MB':>12}")
+    for stage, data in metrics.snapshot()['stages'].items():
+        mean_ms = data['seconds'] / data['count'] * 1000 if data['count'] else 0.0
+        print(f"{stage:<10}{data['count']:>10}{data['seconds']:>10.2f}{mean_ms:>10.3f}"
+              f"{data['bytes_read'] / 1048576:>10.1f}{data['bytes_written'] / 1048576:>12.1f}")
+
+def _print_outcome_stats(runner: BatchRunner):
+    """打印各处理结果的数量、各格式实际采用的处理方式以及去掉和写入的总字节数"""
+    for outcome, count in sorted(runner.outcomes.items()):
+        print(f"{outcome.name.lower():<20}{count:>10}")
+    for (fmt, method), count in sorted(runner.methods.items()):
+        print(f"{fmt + '/' + method:<20}{count:>10}")
+    print(f"{'removed MB':<20}{runner.bytes_removed / 1048576:>10.1f}")
+    print(f"{'written MB':<20}{runner.bytes_written / 1048576:>10.1f}")
+    if getattr(runner, 'cache', None):
+        print(f"image cache: {runner.cache.misses} encoded, {runner.cache.hits} reused")
+
+def _print_scheduler_stats(scheduler: IOScheduler):
+    """打印调度器的决策, 用于调整限速和并发参数"""
+    stats = scheduler.stats()
+    print(f"scheduler: {stats['limit']}/{stats['max_workers']} workers, "
+          f"throttled {stats['throttled_seconds']:.1f}s, deferred {stats['deferred']} files")
+    for device, peak in stats['peak_per_device'].items():
+        if device != 'None':
+            print(f"  device {device}: peak {peak} in flight")
+    for d in stats['decisions']:
+        print(f"  {d['t']:>8.1f}s  {d['reason']:<9} -> {d['limit']:>3} workers"
+              f"  (p90 {d['p90'] * 1000:.1f} ms, {d['files_per_sec']:.1f} files/s)")
+
+def _write_profile(profiler, path: str):
+    """合并主进程和各工作进程的 cProfile 结果并写入 path"""
+    import glob
+    import pstats
+    stats = pstats.Stats(profiler, stream=sys.stderr)
+    for worker_file in glob.glob(glob.escape(path) + '.worker-*'):
+        stats.add(worker_file)
+        os.unlink(worker_file)
+    stats.dump_stats(path)
+    stats.sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+
+def _skip_current(tasks: Iterable[Tuple[str, str]], manifest: Manifest, skipped: List[int]):
+    """过滤掉处理记录中未变化的文件, 跳过数量累加到 skipped[0]"""
+    for task in tasks:
+        if manifest.is_current(task[0], root=task[1]):
+            skipped[0] += 1
+        else:
+            yield task
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(prog='AudioCoverRemover', description=i18n.get('cli_description'))
+    parser.add_argument('paths', nargs='*', help='audio files or folders')
+    parser.add_argument('-o', '--output-dir', help='write processed copies here instead of modifying in place')
+    parser.add_argument('--hardlink', action='store_true',
+                        help='with --output-dir, hardlink files without a cover when reflink is unavailable '
+                             '(outputs share data with the sources; never edit them in place)')
+    parser.add_argument('-r', '--recursive', action='store_true', help='include subdirectories')
+    parser.add_argument('--exclude', action='append', default=[], metavar='PATTERN',
+                        help='skip directories whose name matches this glob (repeatable)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='number of worker processes (default: CPU count)')
+    parser.add_argument('--in-place', action='store_true',
+                        help='overwrite MP3/FLAC/WAV/AIFF covers with tag padding instead of rewriting or truncating the file')
+    parser.add_argument('--no-prefilter', dest='prefilter', action='store_false',
+                        help='always fully parse files instead of skipping those without a cover')
+    parser.add_argument('--memory-budget', type=int, default=MEMORY_BUDGET // 1048576, metavar='MB',
+                        help='largest MP3/FLAC tag loaded into memory per worker; larger tags are rewritten '
+                             'by skipping picture data on disk (default: %(default)s, 0 = always)')
+    parser.add_argument('--safe-writes', action='store_true',
+                        help='never leave a half-written file: stage in-place patches in a journal and '
+                             'rewrite other files as temporary copies that replace the original when committed')
+    parser.add_argument('--journal', default=JOURNAL_DIR, metavar='DIR',
+                        help='with --safe-writes/--recover, journal folder (default: %(default)s)')
+    parser.add_argument('--sync-every', type=int, default=SYNC_BATCH_SIZE, metavar='N',
+                        help='with --safe-writes, commit and sync after N files (default: %(default)s)')
+    parser.add_argument('--sync-interval', type=float, default=SYNC_BATCH_INTERVAL, metavar='SECONDS',
+                        help='with --safe-writes, commit and sync at least this often (default: %(default)s)')
+    parser.add_argument('--recover', action='store_true',
+                        help='after a crash, finish or roll back the batches left in --journal')
+    parser.add_argument('--manifest', metavar='DB',
+                        help='SQLite manifest; unchanged files recorded as processed are skipped')
+    parser.add_argument('--rebuild-manifest', action='store_true',
+                        help='clear the manifest before running so every file is processed again')
+    parser.add_argument('--prune-manifest', action='store_true',
+                        help='remove manifest entries for files that no longer exist under the given folders')
+    parser.add_argument('--merge-manifests', nargs='+', metavar='DB',
+                        help='merge these (e.g. per-shard) manifests into --manifest and print a summary')
+    parser.add_argument('--shard', type=_parse_shard, metavar='I/N',
+                        help='process only shard I of N, split by a stable hash of the path relative to the '
+                             'given folder; --manifest gets a per-shard suffix')
+    parser.add_argument('--steal', metavar='LOCK_DIR',
+                        help='with --shard, claim files through lock files in this shared folder and take '
+                             'over unfinished files of other shards once this shard is done')
+    parser.add_argument('--lock-timeout', type=float, default=LOCK_TIMEOUT, metavar='SECONDS',
+                        help='with --steal, take over a claim whose lock has not been refreshed for this long; '
+                             'nodes refresh their locks every quarter of it (default: %(default)s)')
+    parser.add_argument('--write-limit', type=_parse_rate, metavar='RATE',
+                        help='cap the write rate, e.g. 20M (bytes per second, K/M/G suffixes)')
+    parser.add_argument('--per-device', type=int, metavar='N',
+                        help='process at most N files at a time on each device (st_dev)')
+    parser.add_argument('--latency-target', type=float, metavar='MS',
+                        help='auto-tune the number of busy workers (up to -j) to keep p90 per-file time under MS')
+    parser.add_argument('--nice', type=int, default=0, metavar='N', help='nice increment for worker processes')
+    parser.add_argument('--ionice', type=_parse_ionice, metavar='CLASS[:LEVEL]',
+                        help='I/O priority for worker processes on Linux: idle, or be with level 0-7 (e.g. be:7)')
+    parser.add_argument('--async-io', action='store_true',
+                        help='use an asyncio pipeline with many files in flight (for SMB/NFS and other '
+                             'high-latency storage) instead of worker processes')
+    parser.add_argument('--read-concurrency', type=int, default=ASYNC_READ_CONCURRENCY, metavar='N',
+                        help='with --async-io, maximum concurrent header reads')
+    parser.add_argument('--write-concurrency', type=int, default=ASYNC_WRITE_CONCURRENCY, metavar='N',
+                        help='with --async-io, maximum concurrent file modifications')
+    parser.add_argument('--downscale', action='store_true',
+                        help='keep covers but re-encode those over --max-cover-kb/--max-cover-px as smaller JPEGs')
+    parser.add_argument('--max-cover-kb', type=int, default=DOWNSCALE_MAX_KB, metavar='KB',
+                        help='with --downscale, largest cover kept unchanged (default: %(default)s)')
+    parser.add_argument('--max-cover-px', type=int, default=DOWNSCALE_MAX_PX, metavar='PX',
+                        help='with --downscale, longest cover side kept unchanged and resize target '
+                             '(default: %(default)s)')
+    parser.add_argument('--cover-quality', type=int, default=DOWNSCALE_QUALITY, metavar='Q',
+                        help='with --downscale, JPEG quality 1-95 (default: %(default)s)')
+    parser.add_argument('--image-jobs', type=int, metavar='N',
+                        help='with --downscale, processes for image decoding/encoding (default: CPU count)')
+    parser.add_argument('--analyze', action='store_true',
+                        help='read-only scan: report embedded pictures per file and totals per format')
+    parser.add_argument('--report', metavar='FILE', help='with --analyze, write the report here (default: stdout)')
+    parser.add_argument('--report-format', choices=('csv', 'json'),
+                        help='with --analyze, report format (default: from the file extension, else csv)')
+    parser.add_argument('--watch', action='store_true',
+                        help='keep running and process files in the given folders once they stop changing')
+    parser.add_argument('--settle', type=float, default=WATCH_SETTLE_SECONDS, metavar='SECONDS',
+                        help='with --watch, how long a file must stay unchanged before it is processed')
+    parser.add_argument('--poll', action='store_true',
+                        help='with --watch, rescan periodically instead of using inotify (e.g. network shares)')
+    parser.add_argument('--poll-interval', type=float, default=WATCH_POLL_INTERVAL, metavar='SECONDS',
+                        help='with --watch, seconds between rescans when polling')
+    parser.add_argument('--stats', action='store_true', help='print per-stage timing and I/O statistics')
+    parser.add_argument('--metrics-jsonl', metavar='FILE', help='write per-file stage timings as JSON lines')
+    parser.add_argument('--metrics-prom', metavar='FILE',
+                        help='write stage metrics in Prometheus text format (rewritten periodically)')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='run under cProfile and write merged stats (parent and workers) to FILE')
+    parser.add_argument('-q', '--quiet', action='store_true', help='only print failures and the summary')
+    parser.add_argument('--lang', choices=sorted(i18n.languages), help='message language')
+    return parser
+
+def _wants_scheduler(args: argparse.Namespace) -> bool:
+    return bool(args.write_limit or args.per_device or args.latency_target or args.nice or args.ionice)
+
+def _make_scheduler(args: argparse.Namespace) -> Optional[IOScheduler]:
+    """根据命令行参数创建调度器, 没有相关参数时返回 None"""
+    if not _wants_scheduler(args):
+        return None
+    return IOScheduler(args.jobs, write_rate=args.write_limit, per_device=args.per_device,
+                       latency_target=args.latency_target / 1000 if args.latency_target else None,
+                       nice=args.nice, ionice=args.ionice)
+
+def cli_main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口, 返回进程退出码"""
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    if args.lang:
+        i18n.set_language(args.lang)
+    if (args.rebuild_manifest or args.prune_manifest or args.merge_manifests) and not args.manifest:
+        parser.error('--rebuild-manifest/--prune-manifest/--merge-manifests require --manifest')
+    if args.merge_manifests and args.shard:
+        parser.error('--merge-manifests writes the combined manifest and cannot be combined with --shard')
+    if args.steal and not args.shard:
+        parser.error('--steal requires --shard')
+    if args.shard and args.watch:
+        parser.error('--shard cannot be combined with --watch')
+    if not args.paths and not args.manifest and not args.recover:
+        parser.error('the following arguments are required: paths')
+    if args.safe_writes and (args.output_dir or args.async_io or args.watch or args.downscale or args.analyze):
+        parser.error('--safe-writes cannot be combined with --output-dir/--async-io/--watch/--downscale/--analyze')
+    if args.async_io and _wants_scheduler(args):
+        parser.error('--async-io cannot be combined with --write-limit/--per-device/--latency-target/--nice/--ionice')
+    if args.downscale and (args.in_place or args.async_io or args.watch or args.analyze):
+        parser.error('--downscale cannot be combined with --in-place/--async-io/--watch/--analyze')
+    if args.analyze and (args.watch or args.in_place or args.output_dir):
+        parser.error('--analyze is read-only and cannot be combined with --watch/--in-place/--output-dir')
+    if args.watch and not all(os.path.isdir(path) for path in args.paths):
+        parser.error('--watch requires folders')
+
+    manifest = None
+    try:
+        if args.recover or args.safe_writes:
+            # 上次中断时留下的批次必须在本次修改文件之前补完或回滚, 否则之后重放的补丁已经过时
+            recovered = WriteJournal.recover(args.journal) if os.path.isdir(args.journal) else (0, 0, 0)
+            if args.recover or any(recovered):
+                print(i18n.get('journal_recovered', *recovered))
+            if not args.paths and not args.manifest:
+                return 0
+
+        if args.manifest:
+            manifest = Manifest(_shard_manifest_path(args.manifest, args.shard) if args.shard else args.manifest,
+                                options=_manifest_options(args), output_dir=args.output_dir,
+                                roots=[_source_root(path) for path in args.paths])
+        if manifest and args.rebuild_manifest:
+            manifest.rebuild()
+        if manifest and args.merge_manifests:
+            _merge_manifests(manifest, args.merge_manifests)
+        if manifest and args.prune_manifest:
+            print(i18n.get('manifest_pruned', manifest.prune()))
+        if not args.paths:
+            return 0
+        if args.analyze:
+            return _run_analyze(args)
+        if args.watch:
+            return _run_watch(args, manifest)
+        return _run_cli_batch(args, manifest)
+    except JournalBusyError as e:
+        print(i18n.get('journal_busy', e.filename, e.owner), file=sys.stderr)
+        return 1
+    finally:
+        if manifest:
+            manifest.close()
+
+def _manifest_options(args: argparse.Namespace) -> str:
+    """影响处理结果的运行参数, 记录在处理记录中; 参数不同的运行不会跳过已处理的文件"""
+    options = {'output_dir': os.path.abspath(args.output_dir) if args.output_dir else None,
+               'in_place': args.in_place}
+    if args.downscale:
+        options['downscale'] = [args.max_cover_kb, args.max_cover_px, args.cover_quality]
+    return json.dumps(options, sort_keys=True)
+
+def _merge_manifests(manifest: Manifest, paths: List[str]):
+    """把各分片的处理记录合并到 manifest, 并输出合并后的汇总"""
+    for path in paths:
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"manifest not found: {path}")
+        manifest.merge(path)
+    summary = manifest.summary()
+    succeeded = sum(count for (success, _), count in summary.items() if success)
+    failed = sum(summary.values()) - succeeded
+    for (success, outcome), count in sorted(summary.items(), key=lambda item: (not item[0][0], item[0][1] or '')):
+        print(f"{(outcome or '').lower():<20}{count:>10}")
+    print(i18n.get('manifest_merged', len(paths), succeeded + failed, succeeded, failed))
+
+def _make_reporter(args: argparse.Namespace, manifest: Optional[Manifest],
+                   locks: Optional[WorkLocks] = None) -> Callable[[str, CoverResult], None]:
+    """返回输出单个结果并写入处理记录的回调"""
+    def report(file_path, result):
+        if manifest:
+            manifest.record(file_path, result.success, result.outcome.name)
+        if locks:
+            locks.done(file_path)
+        if result.success and args.quiet:
+            return
+        status = i18n.get('success') if result.success else i18n.get('fail')
+        print(f"{status}: {file_path} - {i18n.render(result)}", flush=not result.success)
+    return report
+
+def _run_watch(args: argparse.Namespace, manifest: Optional[Manifest]) -> int:
+    """监视模式: 运行到 Ctrl+C 或 SIGTERM"""
+    watcher = FolderWatcher(args.paths, args.jobs, args.output_dir, recursive=args.recursive,
+                            exclude=args.exclude, settle=args.settle, poll_interval=args.poll_interval,
+                            use_inotify=not args.poll, manifest=manifest,
+                            on_result=_make_reporter(args, manifest),
+                            in_place=args.in_place, prefilter=args.prefilter,
+                            memory_budget=args.memory_budget * 1048576, hardlink=args.hardlink)
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    print(i18n.get('watch_started', len(args.paths)), flush=True)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    print(i18n.get('watch_stopped', watcher.processed, watcher.failed))
+    return 0
+
+def _run_cli_batch(args: argparse.Namespace, manifest: Optional[Manifest]) -> int:
+    """执行批处理并输出统计信息"""
+    locks = WorkLocks(args.steal, args.lock_timeout) if args.steal else None
+    report = _make_reporter(args, manifest, locks)
+    journal = None
+    if args.safe_writes:
+        journal = WriteJournal(args.journal, args.sync_every, args.sync_interval)
+        report = journal.wrap(report)
+
+    hooks = []
+    if args.metrics_jsonl:
+        hooks.append(JsonLinesHook(args.metrics_jsonl))
+    if args.metrics_prom:
+        hooks.append(PrometheusHook(args.metrics_prom))
+    metrics = Metrics(hooks) if hooks or args.stats else None
+
+    skipped = [0]
+
+    def scan(own_shard: bool = True) -> Iterator[Tuple[str, str]]:
+        tasks = _iter_cli_tasks(args.paths, args.recursive, args.exclude)
+        if metrics:
+            tasks = _timed_discovery(tasks, metrics)
+        if args.shard:
+            tasks = _shard_tasks(tasks, args.shard, own_shard)
+        if manifest:
+            tasks = _skip_current(tasks, manifest, skipped)
+        if locks:
+            tasks = locks.claimed_tasks(tasks, stealing=not own_shard)
+        return tasks
+
+    tasks = scan()
+    if locks:
+        # 本分片扫描完后再扫描一遍, 接管其他分片尚未认领或已超时的文件
+        tasks = itertools.chain(tasks, scan(own_shard=False))
+
+    if args.downscale:
+        policy = CoverPolicy(args.max_cover_kb, args.max_cover_px, args.cover_quality)
+        runner = DownscaleRunner(args.jobs, args.output_dir, policy, args.image_jobs, metrics=metrics)
+    elif args.async_io:
+        runner = AsyncBatchRunner(args.output_dir, args.read_concurrency, args.write_concurrency,
+                                  metrics=metrics, in_place=args.in_place, prefilter=args.prefilter,
+                                  memory_budget=args.memory_budget * 1048576, hardlink=args.hardlink)
+    else:
+        runner = BatchRunner(args.jobs, args.output_dir, metrics=metrics, profile_path=args.profile,
+                             scheduler=_make_scheduler(args), in_place=args.in_place,
+                             prefilter=args.prefilter, memory_budget=args.memory_budget * 1048576,
+                             staged=args.journal if args.safe_writes else None, hardlink=args.hardlink)
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    start = time.perf_counter()
+    try:
+        processed, failed = runner.run(tasks, report)
+    finally:
+        if journal:
+            journal.close()  # 已完成的文件在中断时也提交
+        if locks:
+            locks.close()
+        elapsed = time.perf_counter() - start
+        if profiler:
+            profiler.disable()
+            _write_profile(profiler, args.profile)
+        if metrics:
+            metrics.close()
+
+    if metrics and args.stats:
+        _print_stage_stats(metrics)
+        _print_outcome_stats(runner)
+        if getattr(runner, 'scheduler', None):
+            _print_scheduler_stats(runner.scheduler)
+        if locks:
+            print(f"{'stolen':<20}{locks.stolen:>10}")
+
+    if skipped[0]:
+        print(i18n.get('cli_skipped', skipped[0]))
+    if not processed:
+        if not skipped[0]:
+            print(i18n.get('no_audio_files'))
+        return 0
+    print(i18n.get('cli_summary', processed, processed - failed, failed,
+                   elapsed, processed / elapsed if elapsed else 0.0))
+    return 1 if failed else 0
+
+# ====== 监视模式 ======
+class _InotifySource:
+    """基于 inotify 的文件变化事件源 (Linux, 通过 ctypes 调用 libc)
+
+    第一次 wait() 返回监视目录中已有的音频文件; 之后只返回发生变化的文件。
+    递归监视时, 新建或移入的子目录会自动加入监视, 其中已有的文件也会一并返回。
+    """
+
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_ONLYDIR
+
+    def __init__(self, roots: List[str], recursive: bool, exclude: Iterable[str] = ()):
+        import ctypes
+        import ctypes.util
+        self._ctypes = ctypes
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.roots = roots
+        self.recursive = recursive
+        self.exclude = tuple(exclude)
+        self._dirs = {}  # watch descriptor -> 目录路径
+        try:
+            self._initial = [path for root in roots for path in self._watch_tree(root)]
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def _watch_tree(self, root: str) -> List[str]:
+        """监视 root (递归时包括子目录), 返回其中已有的音频文件; 先加监视再扫描, 不会漏掉新文件"""
+        files = []
+        stack = [root]
+        while stack:
+            path = stack.pop()
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), self.MASK)
+            if wd < 0:
+                err = self._ctypes.get_errno()
+                raise OSError(err, os.strerror(err), path)
+            self._dirs[wd] = path
+            try:
+                entries = os.scandir(path)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if self.recursive and not self._excluded(entry.name):
+                                stack.append(entry.path)
+                        elif FileProcessor._is_audio_name(entry.name):
+                            files.append(entry.path)
+                    except OSError:
+                        continue
+        return files
+
+    def _excluded(self, name: str) -> bool:
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.exclude)
+
+    def wait(self, timeout: Optional[float]) -> List[str]:
+        """阻塞等待事件 (timeout 为 None 时无限等待), 返回发生变化的音频文件"""
+        if self._initial is not None:
+            files, self._initial = self._initial, None
+            return files
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        changed = []
+        while True:
+            try:
+                data = os.read(self.fd, INOTIFY_READ_SIZE)
+            except BlockingIOError:
+                break
+            self._parse(data, changed)
+        return changed
+
+    def _parse(self, data: bytes, changed: List[str]):
+        """解析 struct inotify_event 序列"""
+        pos = 0
+        while pos + INOTIFY_EVENT_SIZE <= len(data):
+            wd, mask, _, length = struct.unpack_from('iIII', data, pos)
+            name = data[pos + INOTIFY_EVENT_SIZE:pos + INOTIFY_EVENT_SIZE + length].rstrip(b'\0')
+            pos += INOTIFY_EVENT_SIZE + length
+            if mask & IN_Q_OVERFLOW:
+                # 事件队列溢出: 重新列出所有文件, 由调用方根据文件状态判断是否需要处理
+                for root in self.roots:
+                    changed.extend(FileProcessor.iter_audio_files(root, self.recursive, self.exclude))
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if self.recursive and mask & (IN_CREATE | IN_MOVED_TO) and not self._excluded(os.fsdecode(name)):
+                    try:
+                        changed.extend(self._watch_tree(path))
+                    except OSError as e:
+                        print(i18n.get('watch_add_failed', path, e), file=sys.stderr)
+            elif FileProcessor._is_audio_name(path):
+                changed.append(path)
+
+    def close(self):
+        os.close(self.fd)
+
+class _PollingSource:
+    """定期扫描目录并比较文件大小和修改时间, 用于没有 inotify 的系统或网络文件系统"""
+
+    def __init__(self, roots: List[str], recursive: bool, exclude: Iterable[str] = (),
+                 interval: float = WATCH_POLL_INTERVAL):
+        self.roots = roots
+        self.recursive = recursive
+        self.exclude = tuple(exclude)
+        self.interval = interval
+        self._snapshot = {}  # 路径 -> (大小, 修改时间)
+        self._next_scan = 0.0
+
+    def wait(self, timeout: Optional[float]) -> List[str]:
+        """等待到下一次扫描或 timeout 到期, 返回新增或变化的音频文件"""
+        delay = self._next_scan - time.monotonic()
+        if timeout is not None:
+            delay = min(delay, timeout)
+        if delay > 0:
+            time.sleep(delay)
+        if time.monotonic() < self._next_scan:
+            return []
+
+        snapshot, changed = {}, []
+        for root in self.roots:
+            for path in FileProcessor.iter_audio_files(root, self.recursive, self.exclude):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                key = (st.st_size, st.st_mtime_ns)
+                snapshot[path] = key
+                if self._snapshot.get(path) != key:
+                    changed.append(path)
+        self._snapshot = snapshot
+        self._next_scan = time.monotonic() + self.interval
+        return changed
+
+    def close(self):
+        pass
+
+class FolderWatcher:
+    """持续监视目录, 文件停止变化后批量去除封面
+
+    事件源优先使用 inotify, 不可用时退回定期扫描。文件在最后一次事件 settle 秒后, 且大小和修改时间
+    未再变化时才处理; 同时就绪的文件作为一批交给 BatchRunner。空闲时阻塞等待事件, 也不保留工作进程。
+    处理后记录文件状态, 自身写入产生的事件不会导致重复处理。
+    """
+
+    def __init__(self, roots: List[str], jobs: Optional[int] = None, output_dir: Optional[str] = None,
+                 recursive: bool = False, exclude: Iterable[str] = (),
+                 settle: float = WATCH_SETTLE_SECONDS, poll_interval: float = WATCH_POLL_INTERVAL,
+                 use_inotify: bool = True, manifest: Optional[Manifest] = None,
+                 on_result: Optional[Callable[[str, CoverResult], None]] = None, **options):
+        """options 原样传给 AudioCoverRemover.remove_cover"""
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        self.output_dir = os.path.abspath(output_dir) if output_dir else None
+        self.recursive = recursive
+        self.exclude = tuple(exclude)
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.manifest = manifest
+        self.on_result = on_result
+        self.options = options
+        self.processed = 0
+        self.failed = 0
+        self._pending = {}         # 路径 -> [到期时间, (大小, 修改时间)]
+        self._done = OrderedDict()  # 路径 -> 处理后的 (大小, 修改时间, inode)
+
+    def _open_source(self):
+        if self.use_inotify and sys.platform.startswith('linux'):
+            try:
+                return _InotifySource(self.roots, self.recursive, self.exclude)
+            except (OSError, AttributeError) as e:
+                print(i18n.get('watch_polling', e), file=sys.stderr)
+        return _PollingSource(self.roots, self.recursive, self.exclude, self.poll_interval)
+
+    def run(self):
+        """运行直到被中断 (KeyboardInterrupt)"""
+        source = self._open_source()
+        try:
+            while True:
+                for path in source.wait(self._next_timeout()):
+                    self._touch(path)
+                ready = self._take_ready()
+                for i in range(0, len(ready), WATCH_BATCH_SIZE):
+                    self._process(ready[i:i + WATCH_BATCH_SIZE])
+        finally:
+            source.close()
+
+    def _touch(self, path: str):
+        """记录一次文件事件: 已在等待的文件只推迟到期时间, 不重复 stat"""
+        entry = self._pending.get(path)
+        if entry is not None:
+            entry[0] = time.monotonic() + self.settle
+            return
+        if self.output_dir and path.startswith(self.output_dir + os.sep):
+            return  # 输出目录位于监视目录内时, 忽略自己写出的文件
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        self._pending[path] = [time.monotonic() + self.settle, (st.st_size, st.st_mtime_ns)]
+
+    def _next_timeout(self) -> Optional[float]:
+        if not self._pending:
+            return None
+        return max(0.0, min(entry[0] for entry in self._pending.values()) - time.monotonic())
+
+    def _take_ready(self) -> List[str]:
+        """取出已停止变化的文件; 状态仍在变化的文件重新计时"""
+        now = time.monotonic()
+        ready = []
+        for path, entry in list(self._pending.items()):
+            if entry[0] > now:
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self._pending[path]
+                continue
+            key = (st.st_size, st.st_mtime_ns)
+            if key != entry[1]:
+                entry[0], entry[1] = now + self.settle, key
+                continue
+            del self._pending[path]
+            if self._done.get(path) == key + (st.st_ino,):
+                continue
+            if self.manifest and self.manifest.is_current(path, st, self._root_of(path)):
+                continue
+            ready.append(path)
+        return ready
+
+    def _root_of(self, path: str) -> str:
+        """文件所属的监视目录, 用于在输出目录中保留相对结构"""
+        return max((root for root in self.roots if path.startswith(root + os.sep)), key=len,
+                   default=os.path.dirname(path))
+
+    def _process(self, batch: List[str]):
+        runner = BatchRunner(min(self.jobs, len(batch)), self.output_dir, **self.options)
+        runner.run(((path, self._root_of(path)) for path in batch), self._record)
+        self.processed += runner.processed
+        self.failed += runner.failed
+        if self.manifest:
+            self.manifest.flush()
+
+    def _record(self, file_path: str, result: CoverResult):
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            pass
         else:
-            return [str(p) for p in path_obj.glob('*') if p.suffix.lower() in AUDIO_EXTENSIONS]
+            self._done[file_path] = (st.st_size, st.st_mtime_ns, st.st_ino)
+            self._done.move_to_end(file_path)
+            if len(self._done) > WATCH_DONE_LIMIT:
+                self._done.popitem(last=False)
+        if self.on_result:
+            self.on_result(file_path, result)
 
 # ====== 用户界面 ======
 class AudioCoverRemoverApp:
     def __init__(self, master):
         self.master = master
+        self._result_queue = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._worker = None
+        self._log_lines = deque(maxlen=LOG_MAX_LINES)
+        self._log_spool = tempfile.TemporaryFile(mode='w+', encoding='utf-8')
         self._setup_window()
         self._init_ui()
         self._setup_responsive_layout()
@@ -262,9 +3988,9 @@ class AudioCoverRemoverApp:
         self._set_window_icon()
         
         # 设置网格布局权重
-        for i in range(6):
+        for i in range(8):
             self.master.grid_rowconfigure(i, weight=0)
-        self.master.grid_rowconfigure(5, weight=1)  # 日志区域可扩展
+        self.master.grid_rowconfigure(6, weight=1)  # 日志区域可扩展
         
         for i in range(4):
             self.master.grid_columnconfigure(i, weight=1)
@@ -310,6 +4036,13 @@ class AudioCoverRemoverApp:
         self.dnd_label = ttk.Label(self.master, text=i18n.get('drag_drop'), foreground="gray")
         self.dnd_label.grid(row=2, column=0, columnspan=3, pady=(0, 10))
 
+        # 原地修改选项
+        self.in_place_var = tk.BooleanVar(value=False)
+        self.in_place_check = ttk.Checkbutton(
+            self.master, text=i18n.get('in_place'),
+            variable=self.in_place_var)
+        self.in_place_check.grid(row=2, column=3, padx=10, pady=(0, 10), sticky=tk.W)
+
         # 输出目录
         self.output_dir_var = StringVar()
         ttk.Label(self.master, text=i18n.get('output_dir')).grid(row=3, column=0, padx=10, pady=5, sticky=tk.W)
@@ -344,14 +4077,39 @@ class AudioCoverRemoverApp:
             command=lambda: webbrowser.open(GITHUB_WIKI_URL))
         self.help_button.grid(row=4, column=3, padx=10, pady=10, sticky=tk.E)
 
+        # 进度区域
+        self._add_progress_bar()
+
         # 日志区域
         self.log_text = scrolledtext.ScrolledText(
             self.master, width=85, height=20, wrap=tk.WORD)
-        self.log_text.grid(row=5, column=0, columnspan=4, padx=10, pady=10, sticky=tk.NSEW)
+        self.log_text.grid(row=6, column=0, columnspan=4, padx=10, pady=10, sticky=tk.NSEW)
 
         # 底部信息
         self._add_footer()
 
+    def _add_progress_bar(self):
+        """添加进度条、统计信息和取消/保存日志按钮"""
+        progress_frame = ttk.Frame(self.master)
+        progress_frame.grid(row=5, column=0, columnspan=4, padx=10, sticky=tk.EW)
+        progress_frame.grid_columnconfigure(0, weight=1)
+
+        self.progress = ttk.Progressbar(progress_frame, mode='determinate')
+        self.progress.grid(row=0, column=0, sticky=tk.EW)
+
+        self.progress_label = ttk.Label(progress_frame, width=36)
+        self.progress_label.grid(row=0, column=1, padx=10)
+
+        self.cancel_button = ttk.Button(
+            progress_frame, text=i18n.get('cancel'),
+            command=self._cancel_processing, state=tk.DISABLED)
+        self.cancel_button.grid(row=0, column=2)
+
+        self.save_log_button = ttk.Button(
+            progress_frame, text=i18n.get('save_log'),
+            command=self._save_log)
+        self.save_log_button.grid(row=0, column=3, padx=(10, 0))
+
     def _init_dnd(self):
         """初始化拖放支持"""
         try:
@@ -401,36 +4159,67 @@ class AudioCoverRemoverApp:
             text=i18n.get('contact'),
             style='Hyperlink.TLabel'
         )
-        self.contact_label.grid(row=6, column=1, columnspan=2, pady=(0, 10), sticky=tk.W)
+        self.contact_label.grid(row=7, column=1, columnspan=2, pady=(0, 10), sticky=tk.W)
         self.contact_label.bind("<Button-1>", lambda e: webbrowser.open(f"mailto:{AUTHOR_EMAIL}"))
 
     def _add_github_button(self):
-        """添加GitHub按钮"""
+        """添加GitHub按钮 (图标在后台加载, 不阻塞窗口显示)"""
+        self.github_icon = None
+        self._github_icon_image = None
+        self.github_button = ttk.Button(
+            self.master,
+            text=i18n.get('github'),
+            compound='left',
+            command=lambda: webbrowser.open(GITHUB_PROFILE_URL)
+        )
+        self.github_button.grid(row=7, column=0, padx=10, pady=(0, 10), sticky=tk.W)
+
+        loader = threading.Thread(target=self._load_github_icon, daemon=True)
+        loader.start()
+        self.master.after(LOG_POLL_INTERVAL_MS, self._apply_github_icon, loader)
+
+    def _load_github_icon(self):
+        """后台线程: 依次尝试随附图标、磁盘缓存和网络, 解码并缩放为 PIL 图像"""
+        cache_path = os.path.join(_user_cache_dir(), 'github-icon.png')
         try:
-            response = requests.get(GITHUB_ICON_URL, timeout=5)
-            response.raise_for_status()
-            
-            img = Image.open(io.BytesIO(response.content))
-            img = img.resize((24, 24), Image.LANCZOS)
-            self.github_icon = ImageTk.PhotoImage(img)
-            
-            self.github_button = ttk.Button(
-                self.master,
-                text=i18n.get('github'),
-                image=self.github_icon,
-                compound='left',
-                command=lambda: webbrowser.open(GITHUB_PROFILE_URL)
-            )
-            self.github_button.grid(row=6, column=0, padx=10, pady=(0, 10), sticky=tk.W)
-            self.github_button.image = self.github_icon  # 保持引用
+            data = None
+            for path in (GITHUB_ICON_PATH, cache_path):
+                if os.path.exists(path):
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                    break
+            if data is None:
+                import requests
+                response = requests.get(GITHUB_ICON_URL, timeout=5)
+                response.raise_for_status()
+                data = response.content
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                with open(cache_path, 'wb') as f:
+                    f.write(data)
+
+            from PIL import Image
+            img = Image.open(io.BytesIO(data))
+            self._github_icon_image = img.resize(GITHUB_ICON_SIZE, Image.LANCZOS)
         except Exception as e:
             print(f"Failed to load GitHub icon: {e}")
 
+    def _apply_github_icon(self, loader: threading.Thread):
+        """在主线程中等待图标加载完成后设置到按钮上 (Tk 对象只能在主线程创建)"""
+        if loader.is_alive():
+            self.master.after(LOG_POLL_INTERVAL_MS, self._apply_github_icon, loader)
+            return
+        if self._github_icon_image is None:
+            return
+        from PIL import ImageTk
+        self.github_icon = ImageTk.PhotoImage(self._github_icon_image)
+        self.github_button.config(image=self.github_icon)
+        self.github_button.image = self.github_icon  # 保持引用
+
     def _setup_responsive_layout(self):
         """设置响应式布局"""
-        for i in range(7):
+        for i in range(8):
             self.master.grid_rowconfigure(i, weight=0)
-        self.master.grid_rowconfigure(5, weight=1)  # 日志区域可扩展
+        self.master.grid_rowconfigure(6, weight=1)  # 日志区域可扩展
         
         for i in range(4):
             self.master.grid_columnconfigure(i, weight=1)
@@ -451,7 +4240,10 @@ class AudioCoverRemoverApp:
             (self.help_button, 'help'),
             (self.dnd_label, 'drag_drop'),
             (self.recursive_check, 'scan_subdir'),
-            (self.browse_button, 'browse')
+            (self.in_place_check, 'in_place'),
+            (self.browse_button, 'browse'),
+            (self.cancel_button, 'cancel'),
+            (self.save_log_button, 'save_log')
         ]
         
         for widget, key in widgets:
@@ -484,7 +4276,10 @@ class AudioCoverRemoverApp:
             self.entry.insert(0, path)
 
     def _start_processing(self):
-        """开始处理文件"""
+        """开始处理文件 (在后台线程中运行, 结果通过队列返回界面)"""
+        if self._worker is not None and self._worker.is_alive():
+            return
+
         path = self.entry.get().strip()
         if not path:
             messagebox.showwarning(
@@ -495,51 +4290,172 @@ class AudioCoverRemoverApp:
             
         output_dir = self.output_dir_var.get().strip() or None
         recursive = self.recursive_var.get()
+        single = self.mode.get() == "single"
+        options = {'output_dir': output_dir, 'in_place': self.in_place_var.get()}
             
         self._log_message(i18n.get('processing'))
-        self.master.update()
+        self._cancel_event.clear()
+        self._progress_total = 0
+        self._progress_done = 0
+        self._progress_start = time.perf_counter()
+        self.progress.config(value=0, maximum=1)
+        self.progress_label.config(text='')
+        self.process_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
 
-        if self.mode.get() == "single":
-            self._process_single_file(path, output_dir)
-        else:
-            self._process_folder(path, output_dir, recursive)
-            
-        messagebox.showinfo(
-            i18n.get('complete'),
-            i18n.get('process_complete')
-        )
+        self._worker = threading.Thread(
+            target=self._process_worker, args=(path, options, recursive, single), daemon=True)
+        self._worker.start()
+        self.master.after(LOG_POLL_INTERVAL_MS, self._poll_results)
+
+    def _cancel_processing(self):
+        """请求取消处理, 当前文件完成后停止"""
+        self._cancel_event.set()
+        self.cancel_button.config(state=tk.DISABLED)
 
-    def _process_single_file(self, file_path, output_dir=None):
+    def _process_worker(self, path, options, recursive, single):
+        """后台线程: 处理文件并将结果放入队列 (不直接访问任何控件); 出错时也总会发送 done"""
+        self._processed_count = 0
+        try:
+            if single:
+                self._result_queue.put(('total', 1))
+                self._process_single_file(path, options)
+            else:
+                self._process_folder(path, options, recursive)
+        except Exception as e:
+            self._result_queue.put(('error', i18n.get('process_error', str(e))))
+        finally:
+            self._result_queue.put(('done', self._processed_count, self._cancel_event.is_set()))
+
+    def _process_single_file(self, file_path, options):
         """处理单个文件"""
-        success, message = AudioCoverRemover.remove_cover(file_path, output_dir)
-        status = i18n.get('success') if success else i18n.get('fail')
-        self._log_message(f"{status}: {file_path} - {message}")
+        result = AudioCoverRemover.remove_cover(file_path, **options)
+        self._processed_count += 1
+        self._result_queue.put(('result', file_path, result))
 
-    def _process_folder(self, folder_path, output_dir=None, recursive=False):
+    def _process_folder(self, folder_path, options, recursive=False):
         """处理文件夹中的所有音频文件"""
-        count = 0
         file_list = FileProcessor.get_audio_files(folder_path, recursive)
-        
-        if not file_list:
-            self._log_message(i18n.get('no_cover'))
-            return
-            
+        self._result_queue.put(('total', len(file_list)))
+
         for file_path in file_list:
-            self._process_single_file(file_path, output_dir)
-            count += 1
-                    
-        self._log_message("\n" + i18n.get('files_processed', count))
+            if self._cancel_event.is_set():
+                break
+            self._process_single_file(file_path, options)
+
+    def _poll_results(self):
+        """定时从队列取出结果, 批量写入日志并刷新进度"""
+        lines = []
+        finished = None
+        for _ in range(LOG_BATCH_LIMIT):
+            try:
+                item = self._result_queue.get_nowait()
+            except queue.Empty:
+                break
+            kind = item[0]
+            if kind == 'result':
+                _, file_path, result = item
+                status = i18n.get('success') if result.success else i18n.get('fail')
+                lines.append(f"{status}: {file_path} - {i18n.render(result)}")
+                self._progress_done += 1
+            elif kind == 'total':
+                self._progress_total = item[1]
+                self.progress.config(maximum=max(1, item[1]))
+                if not item[1]:
+                    lines.append(i18n.get('no_audio_files'))
+            elif kind == 'error':
+                lines.append(item[1])
+            else:
+                finished = item
+
+        if lines:
+            self._append_log_lines(lines)
+        self._update_progress()
+
+        if finished is None:
+            self.master.after(LOG_POLL_INTERVAL_MS, self._poll_results)
+            return
+
+        _, count, cancelled = finished
+        self._append_log_lines(["", i18n.get('files_processed', count)]
+                               + ([i18n.get('cancelled')] if cancelled else []))
+        self.process_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+        messagebox.showinfo(
+            i18n.get('complete'),
+            i18n.get('cancelled') if cancelled else i18n.get('process_complete')
+        )
+
+    def _update_progress(self):
+        """更新进度条、处理速度和预计剩余时间"""
+        done, total = self._progress_done, self._progress_total
+        elapsed = time.perf_counter() - self._progress_start
+        rate = done / elapsed if elapsed > 0 else 0.0
+        if rate > 0 and total > done:
+            eta = time.strftime('%H:%M:%S', time.gmtime((total - done) / rate))
+        else:
+            eta = '--:--:--'
+        self.progress.config(value=done)
+        self.progress_label.config(text=i18n.get('progress_stats', done, total, rate, eta))
+
+    def _save_log(self):
+        """将完整日志写入用户选择的文件"""
+        path = filedialog.asksaveasfilename(
+            defaultextension='.log',
+            filetypes=[(i18n.get('log_files'), '*.log *.txt')]
+        )
+        if not path:
+            return
+        self._log_spool.flush()
+        self._log_spool.seek(0)
+        with open(path, 'w', encoding='utf-8') as f:
+            shutil.copyfileobj(self._log_spool, f)
+        self._log_spool.seek(0, os.SEEK_END)
+
+    def _append_log_lines(self, lines: List[str]):
+        """批量追加日志: 完整内容写入临时文件, 控件只保留最近 LOG_MAX_LINES 行"""
+        text = "\n".join(lines) + "\n"
+        self._log_spool.write(text)
+        self._log_lines.extend(lines)
+
+        if len(lines) >= LOG_MAX_LINES:
+            # 整批替换, 避免插入后立即删除
+            self.log_text.delete('1.0', tk.END)
+            self.log_text.insert(tk.END, "\n".join(self._log_lines) + "\n")
+        else:
+            self.log_text.insert(tk.END, text)
+            excess = int(self.log_text.index('end-1c').split('.')[0]) - 1 - LOG_MAX_LINES
+            if excess > 0:
+                self.log_text.delete('1.0', f'{excess + 1}.0')
+        self.log_text.see(tk.END)
 
     def _log_message(self, message):
         """记录日志消息"""
-        self.log_text.insert(tk.END, message + "\n")
-        self.log_text.see(tk.END)
-        self.master.update()
+        self._append_log_lines([message])
 
 # ====== 初始化 ======
 i18n = I18N()
 
+def _user_cache_dir() -> str:
+    """用户缓存目录"""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'AudioCoverRemover')
+
+def _import_gui_modules():
+    """导入图形界面所需模块并注入模块全局"""
+    global tk, ttk, filedialog, messagebox, StringVar, scrolledtext, webbrowser
+    import tkinter as tk
+    import webbrowser
+    from tkinter import ttk, filedialog, messagebox, StringVar, scrolledtext
+
 def main():
+    if len(sys.argv) > 1:
+        sys.exit(cli_main())
+
+    _import_gui_modules()
     try:
         # 尝试使用tkinterdnd2实现更好的拖放支持
         from tkinterdnd2 import TkinterDnD
@@ -0,0 +1,6 @@
+"""AudioCoverRemover 性能基准测试
+
+在仓库根目录运行, 例如::
+
+    python -m benchmarks.bench_open_count
+"""
@@ -0,0 +1,68 @@
+"""统计处理每个 MP3 文件时的 open 次数和读写系统调用次数
+
+open 次数通过审计钩子统计; 读写系统调用次数来自 /proc/self/io (仅 Linux)。
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+from AudioCoverRemover import AudioCoverRemover
+from benchmarks.fixtures import write_mp3
+
+_open_count = 0
+
+
+def _audit(event, args):
+    global _open_count
+    if event == 'open':
+        _open_count += 1
+
+
+def _io_syscalls():
+    """返回 (读调用次数, 写调用次数), 非 Linux 平台返回 None"""
+    try:
+        with open('/proc/self/io') as f:
+            values = dict(line.split(': ') for line in f.read().splitlines())
+        return int(values['syscr']), int(values['syscw'])
+    except OSError:
+        return None
+
+
+def run(count: int):
+    cases = {
+        'with_cover': dict(cover_size=200 * 1024),
+        'no_cover': dict(cover_size=None),
+        'no_id3': dict(id3=False),
+    }
+    global _open_count
+    sys.addaudithook(_audit)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'case':<12}{'opens/file':>12}{'reads/file':>12}{'writes/file':>13}")
+        for name, options in cases.items():
+            paths = [write_mp3(os.path.join(tmp, f'{name}_{i}.mp3'), **options) for i in range(count)]
+            # /proc/self/io 本身的读取也会产生 open 和 read, 在循环外测量
+            before = _io_syscalls()
+            _open_count = 0
+            for path in paths:
+                AudioCoverRemover._remove_mp3_cover(path)
+            opens = _open_count
+            after = _io_syscalls()
+
+            if before and after:
+                reads = f'{(after[0] - before[0] - 1) / count:.1f}'
+                writes = f'{(after[1] - before[1]) / count:.1f}'
+            else:
+                reads = writes = 'n/a'
+            print(f'{name:<12}{opens / count:>12.1f}{reads:>12}{writes:>13}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--count', type=int, default=200, help='files per case')
+    run(parser.parse_args().count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""启动时间基准测试
+
+1. ``python -X importtime -c "import AudioCoverRemover"``: 模块导入耗时及最慢的依赖;
+2. 命令行模式不得加载 tkinter / PIL / requests;
+3. 从启动解释器到主窗口首次绘制完成的时间 (需要图形环境, 否则跳过)。
+
+任一项超出预算时退出码为 1。
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_BUDGET_MS = 100
+FIRST_WINDOW_BUDGET_MS = 1000
+GUI_ONLY_MODULES = ('tkinter', 'PIL', 'requests')
+
+_HEADLESS_SNIPPET = '''
+import sys, tempfile
+import AudioCoverRemover
+with tempfile.TemporaryDirectory() as tmp:
+    AudioCoverRemover.cli_main(['-q', '-j', '1', tmp])
+print('loaded:' + ','.join(m for m in %r if m in sys.modules))
+''' % (GUI_ONLY_MODULES,)
+
+_WINDOW_SNIPPET = '''
+import AudioCoverRemover as A
+A._import_gui_modules()
+root = A.tk.Tk()
+A.AudioCoverRemoverApp(root)
+root.update()
+print('ready', flush=True)
+root.destroy()
+'''
+
+
+def _python(*args, **kwargs):
+    return subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, **kwargs)
+
+
+def measure_import(runs: int):
+    """返回 (最短导入耗时 ms, 最慢的依赖列表)"""
+    best, slowest = None, []
+    for _ in range(runs):
+        stderr = _python('-X', 'importtime', '-c', 'import AudioCoverRemover').stderr
+        # importtime 先输出子模块再输出父模块; 只统计 AudioCoverRemover 自身引入的依赖
+        subtree, total = [], None
+        for line in stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            self_us, cumulative_us, raw_name = [part for part in line[len('import time:'):].split('|')]
+            name = raw_name.strip()
+            if raw_name[1:2] != ' ':  # 顶层模块
+                if name == 'AudioCoverRemover':
+                    total = int(cumulative_us) / 1000
+                    break
+                subtree = []
+            else:
+                subtree.append((int(cumulative_us), name))
+        if total is not None and (best is None or total < best):
+            best = total
+            slowest = sorted(subtree, reverse=True)[:8]
+    return best, slowest
+
+
+def check_headless():
+    """返回命令行模式下被加载的图形界面模块"""
+    result = _python('-c', _HEADLESS_SNIPPET)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    loaded = result.stdout.strip().splitlines()[-1][len('loaded:'):]
+    return [m for m in loaded.split(',') if m]
+
+
+def measure_first_window(runs: int):
+    """返回从启动进程到窗口首次绘制完成的最短耗时 (ms), 无图形环境时返回 None"""
+    if sys.platform.startswith('linux') and not os.environ.get('DISPLAY'):
+        return None
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, '-c', _WINDOW_SNIPPET], cwd=ROOT,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        line = proc.stdout.readline()
+        elapsed = (time.perf_counter() - start) * 1000
+        proc.wait()
+        if line.strip() != 'ready':
+            return None
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--runs', type=int, default=5, help='take the best of N runs')
+    parser.add_argument('--import-budget', type=float, default=IMPORT_BUDGET_MS, help='import budget in ms')
+    parser.add_argument('--window-budget', type=float, default=FIRST_WINDOW_BUDGET_MS,
+                        help='time-to-first-window budget in ms')
+    args = parser.parse_args()
+    ok = True
+
+    import_ms, slowest = measure_import(args.runs)
+    ok &= import_ms <= args.import_budget
+    print(f'import AudioCoverRemover: {import_ms:.1f} ms (budget {args.import_budget:.0f} ms)')
+    for cumulative, name in slowest:
+        print(f'    {cumulative / 1000:8.1f} ms  {name}')
+
+    loaded = check_headless()
+    ok &= not loaded
+    print(f"headless GUI imports: {', '.join(loaded) if loaded else 'none'}")
+
+    window_ms = measure_first_window(args.runs)
+    if window_ms is None:
+        print('first window: skipped (no display)')
+    else:
+        ok &= window_ms <= args.window_budget
+        print(f'first window: {window_ms:.1f} ms (budget {args.window_budget:.0f} ms)')
+
+    print('OK' if ok else 'OVER BUDGET')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,319 @@
+"""合成音频测试文件
+
+只生成足以被解析的最小结构 (标签 + 若干音频帧), 不需要任何外部编码器。
+"""
+import base64
+import os
+import struct
+from typing import Iterable, Optional
+
+MP3_FRAME_HEADER = b'\xff\xfb\x90\x64'  # MPEG-1 Layer III, 128 kbps, 44.1 kHz
+MP3_FRAME_SIZE = 417
+
+
+def syncsafe(value: int) -> bytes:
+    """编码 ID3v2 的 syncsafe 整数"""
+    return bytes([(value >> 21) & 0x7F, (value >> 14) & 0x7F, (value >> 7) & 0x7F, value & 0x7F])
+
+
+def mp3_frames(count: int = 40) -> bytes:
+    """生成静音 MPEG 帧"""
+    return (MP3_FRAME_HEADER + b'\x00' * (MP3_FRAME_SIZE - 4)) * count
+
+
+def id3_frame(frame_id: bytes, data: bytes, version: int = 3) -> bytes:
+    """生成单个 ID3v2.3/2.4 帧"""
+    size = syncsafe(len(data)) if version == 4 else struct.pack('>I', len(data))
+    return frame_id + size + b'\x00\x00' + data
+
+
+def apic_frame(image_size: int, version: int = 3) -> bytes:
+    """生成带随机 "JPEG" 数据的 APIC 帧"""
+    image = b'\xff\xd8\xff\xe0' + os.urandom(max(0, image_size - 4))
+    return id3_frame(b'APIC', b'\x00image/jpeg\x00\x03\x00' + image, version)
+
+
+def text_frame(frame_id: bytes, text: str, version: int = 3) -> bytes:
+    """生成 UTF-8 文本帧"""
+    return id3_frame(frame_id, b'\x03' + text.encode('utf-8'), version)
+
+
+def id3_tag(frames: Iterable[bytes], padding: int = 0, version: int = 3) -> bytes:
+    """组装 ID3v2 标签"""
+    body = b''.join(frames) + b'\x00' * padding
+    return b'ID3' + bytes([version, 0, 0]) + syncsafe(len(body)) + body
+
+
+def write_mp3(path: str, cover_size: Optional[int] = None, id3: bool = True,
+              padding: int = 0, frames: int = 40) -> str:
+    """写入 MP3 文件: 可选 ID3v2 标签和指定大小的封面"""
+    data = b''
+    if id3:
+        tag_frames = [text_frame(b'TIT2', os.path.basename(path)), text_frame(b'TPE1', 'Benchmark')]
+        if cover_size is not None:
+            tag_frames.append(apic_frame(cover_size))
+        data = id3_tag(tag_frames, padding)
+    with open(path, 'wb') as f:
+        f.write(data + mp3_frames(frames))
+    return path
+
+
+# ---- FLAC ----
+
+def flac_block(block_type: int, data: bytes, last: bool = False) -> bytes:
+    """生成 FLAC 元数据块"""
+    return bytes([block_type | (0x80 if last else 0)]) + len(data).to_bytes(3, 'big') + data
+
+
+def flac_picture(image_size: int, width: int = 1000, height: int = 1000) -> bytes:
+    """生成 PICTURE 块内容 (前封面, 随机 "JPEG" 数据)"""
+    mime = b'image/jpeg'
+    image = b'\xff\xd8\xff\xe0' + os.urandom(max(0, image_size - 4))
+    return (struct.pack('>II', 3, len(mime)) + mime + struct.pack('>I', 0)
+            + struct.pack('>IIIII', width, height, 24, 0, len(image)) + image)
+
+
+def vorbis_comment(comments: Iterable[bytes], framing: bool = False) -> bytes:
+    """生成 Vorbis 注释结构 (FLAC 与 Ogg 共用)"""
+    comments = list(comments)
+    vendor = b'AudioCoverRemover benchmark'
+    data = struct.pack('<I', len(vendor)) + vendor + struct.pack('<I', len(comments))
+    data += b''.join(struct.pack('<I', len(c)) + c for c in comments)
+    return data + (b'\x01' if framing else b'')
+
+
+def write_flac(path: str, picture_sizes: Iterable[int] = (), padding: int = 0,
+               audio_size: int = 64 * 1024) -> str:
+    """写入 FLAC 文件: 可包含多个 PICTURE 块, 音频部分为随机数据"""
+    streaminfo = (struct.pack('>HH', 4096, 4096) + b'\x00' * 6
+                  + bytes([0x0A, 0xC4, 0x42, 0xF0]) + b'\x00' * 4 + b'\x00' * 16)
+    blocks = [(0, streaminfo), (4, vorbis_comment([b'TITLE=' + os.path.basename(path).encode()]))]
+    blocks += [(6, flac_picture(size)) for size in picture_sizes]
+    if padding:
+        blocks.append((1, b'\x00' * padding))
+    data = b'fLaC' + b''.join(flac_block(t, d, i == len(blocks) - 1) for i, (t, d) in enumerate(blocks))
+    with open(path, 'wb') as f:
+        f.write(data + b'\xff\xf8' + os.urandom(max(0, audio_size - 2)))
+    return path
+
+
+# ---- Ogg Vorbis ----
+
+def _ogg_crc_table():
+    table = []
+    for i in range(256):
+        r = i << 24
+        for _ in range(8):
+            r = ((r << 1) ^ 0x04C11DB7) if r & 0x80000000 else (r << 1)
+        table.append(r & 0xFFFFFFFF)
+    return table
+
+
+_OGG_CRC_TABLE = _ogg_crc_table()
+
+
+def ogg_crc(data: bytes) -> int:
+    """Ogg 页校验和"""
+    crc = 0
+    for b in data:
+        crc = ((crc << 8) & 0xFFFFFFFF) ^ _OGG_CRC_TABLE[((crc >> 24) & 0xFF) ^ b]
+    return crc
+
+
+def ogg_page(segments, sequence: int, header_type: int = 0, granule: int = 0, serial: int = 1) -> bytes:
+    """由分段列表生成一页"""
+    lacing = bytes(len(s) for s in segments)
+    page = (b'OggS' + bytes([0, header_type]) + struct.pack('<qII', granule, serial, sequence)
+            + b'\x00' * 4 + bytes([len(lacing)]) + lacing + b''.join(segments))
+    return page[:22] + struct.pack('<I', ogg_crc(page)) + page[26:]
+
+
+def ogg_packets_to_pages(packets, first_sequence: int = 0):
+    """把若干包按 255 字节分段装入页, 每页最多 255 段"""
+    segments = []
+    for packet in packets:
+        for i in range(0, len(packet) - len(packet) % 255, 255):
+            segments.append(packet[i:i + 255])
+        segments.append(packet[len(packet) - len(packet) % 255:])
+    pages = []
+    continued = False
+    for i in range(0, len(segments), 255):
+        chunk = segments[i:i + 255]
+        pages.append(ogg_page(chunk, first_sequence + len(pages), 1 if continued else 0))
+        continued = len(chunk[-1]) == 255
+    return pages
+
+
+def write_ogg(path: str, cover_size: Optional[int] = None, audio_size: int = 32 * 1024) -> str:
+    """写入 Ogg Vorbis 文件, 封面以 METADATA_BLOCK_PICTURE 注释嵌入"""
+    ident = b'\x01vorbis' + struct.pack('<IBIiii', 0, 2, 44100, 0, 128000, 0) + bytes([0xB8, 1])
+    comments = [b'TITLE=' + os.path.basename(path).encode(), b'ARTIST=Benchmark']
+    if cover_size is not None:
+        comments.append(b'METADATA_BLOCK_PICTURE=' + base64.b64encode(flac_picture(cover_size)))
+    comment_packet = b'\x03vorbis' + vorbis_comment(comments, framing=True)
+    setup = b'\x05vorbis' + b'\x00' * 30
+
+    pages = [ogg_page([ident], 0, header_type=2)]
+    pages += ogg_packets_to_pages([comment_packet, setup], first_sequence=1)
+    # 音频页: 每页一个 4000 字节以内的包
+    sequence = len(pages)
+    for i in range(0, audio_size, 4000):
+        packet = os.urandom(min(4000, audio_size - i))
+        segments = [packet[j:j + 255] for j in range(0, len(packet), 255)]
+        if len(segments[-1]) == 255:
+            segments.append(b'')
+        last = i + 4000 >= audio_size
+        pages.append(ogg_page(segments, sequence, 4 if last else 0, granule=(i + 4000) * 10))
+        sequence += 1
+    with open(path, 'wb') as f:
+        f.write(b''.join(pages))
+    return path
+
+
+# ---- WAV / AIFF ----
+
+def _chunk(chunk_id: bytes, data: bytes, big_endian: bool) -> bytes:
+    size = struct.pack('>I' if big_endian else '<I', len(data))
+    return chunk_id + size + data + (b'\x00' if len(data) % 2 else b'')
+
+
+def _id3_chunk_tag(cover_size: Optional[int]) -> bytes:
+    frames = [text_frame(b'TIT2', 'Benchmark'), text_frame(b'TPE1', 'Benchmark')]
+    if cover_size is not None:
+        frames.append(apic_frame(cover_size))
+    return id3_tag(frames)
+
+
+def write_wav(path: str, cover_size: Optional[int] = None, id3: bool = True,
+              audio_size: int = 64 * 1024, id3_first: bool = False) -> str:
+    """写入 PCM WAV 文件, 可附带 'id3 ' 块 (默认在 data 块之后)"""
+    fmt = struct.pack('<HHIIHH', 1, 2, 44100, 44100 * 4, 4, 16)
+    tag = _chunk(b'id3 ', _id3_chunk_tag(cover_size), False) if id3 else b''
+    data = _chunk(b'data', os.urandom(audio_size), False)
+    body = b'WAVE' + _chunk(b'fmt ', fmt, False) + (tag + data if id3_first else data + tag)
+    with open(path, 'wb') as f:
+        f.write(b'RIFF' + struct.pack('<I', len(body)) + body)
+    return path
+
+
+def _ieee_extended(value: float) -> bytes:
+    """AIFF 采样率使用的 80 位扩展精度浮点数 (仅支持正整数)"""
+    value = int(value)
+    exponent = value.bit_length() - 1
+    mantissa = value << (63 - exponent)
+    return struct.pack('>HQ', 16383 + exponent, mantissa)
+
+
+def write_aiff(path: str, cover_size: Optional[int] = None, id3: bool = True,
+               audio_size: int = 64 * 1024) -> str:
+    """写入 AIFF 文件, 可附带 'ID3 ' 块"""
+    frames = audio_size // 4
+    comm = struct.pack('>hIh', 2, frames, 16) + _ieee_extended(44100)
+    ssnd = struct.pack('>II', 0, 0) + os.urandom(frames * 4)
+    body = b'AIFF' + _chunk(b'COMM', comm, True) + _chunk(b'SSND', ssnd, True)
+    if id3:
+        body += _chunk(b'ID3 ', _id3_chunk_tag(cover_size), True)
+    with open(path, 'wb') as f:
+        f.write(b'FORM' + struct.pack('>I', len(body)) + body)
+    return path
+
+
+# ---- APEv2 (WavPack) ----
+
+def ape_item(key: str, value: bytes, binary: bool = False) -> bytes:
+    """生成 APEv2 项目"""
+    return struct.pack('<II', len(value), 2 if binary else 0) + key.encode('ascii') + b'\x00' + value
+
+
+def apev2_tag(items: Iterable[bytes]) -> bytes:
+    """组装带头部和尾部的 APEv2 标签"""
+    items = list(items)
+    body = b''.join(items)
+    size = len(body) + 32
+    header = b'APETAGEX' + struct.pack('<IIII', 2000, size, len(items), 0xA0000000) + b'\x00' * 8
+    footer = b'APETAGEX' + struct.pack('<IIII', 2000, size, len(items), 0x80000000) + b'\x00' * 8
+    return header + body + footer
+
+
+def write_wavpack(path: str, cover_size: Optional[int] = None, audio_size: int = 64 * 1024,
+                  id3v1: bool = False) -> str:
+    """写入只含一个 WavPack 块头的文件, 末尾附带 APEv2 标签 (和可选的 ID3v1)"""
+    block = b'wvpk' + struct.pack('<IHBBIIIII', 24 + audio_size, 0x410, 0, 0, 44100, 0, 44100, 0x80000000 | 2, 0)
+    items = [ape_item('Title', os.path.basename(path).encode('utf-8')), ape_item('Artist', b'Benchmark')]
+    if cover_size is not None:
+        image = b'\xff\xd8\xff\xe0' + os.urandom(max(0, cover_size - 4))
+        items.append(ape_item('Cover Art (Front)', b'cover.jpg\x00' + image, binary=True))
+    data = block + os.urandom(audio_size) + apev2_tag(items)
+    if id3v1:
+        data += b'TAG' + b'\x00' * 125
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+# ---- MP4 / M4A ----
+
+def mp4_atom(name: bytes, data: bytes) -> bytes:
+    """生成 MP4 原子"""
+    return struct.pack('>I', 8 + len(data)) + name + data
+
+
+def _mp4_item(name: bytes, data: bytes, flags: int = 1) -> bytes:
+    """生成 ilst 中的一个项目 (flags: 1 为 UTF-8 文本, 13 为 JPEG)"""
+    return mp4_atom(name, mp4_atom(b'data', struct.pack('>II', flags, 0) + data))
+
+
+def _mp4_moov(ilst: bytes, chunk_offset: int) -> bytes:
+    """只含一条音轨和一个 stco 块偏移的 moov"""
+    mvhd = mp4_atom(b'mvhd', struct.pack('>I', 0) + struct.pack('>IIII', 0, 0, 44100, 44100) + b'\x00' * 80)
+    mdhd = mp4_atom(b'mdhd', struct.pack('>I', 0) + struct.pack('>IIII', 0, 0, 44100, 44100) + b'\x00' * 4)
+    handler = mp4_atom(b'hdlr', struct.pack('>II', 0, 0) + b'soun' + b'\x00' * 13)
+    stbl = mp4_atom(b'stbl', mp4_atom(b'stsd', struct.pack('>II', 0, 0))
+                    + mp4_atom(b'stco', struct.pack('>III', 0, 1, chunk_offset)))
+    trak = mp4_atom(b'trak', mp4_atom(b'mdia', mdhd + handler + mp4_atom(b'minf', stbl)))
+    meta_handler = mp4_atom(b'hdlr', struct.pack('>II', 0, 0) + b'mdir' + b'appl' + b'\x00' * 9)
+    udta = mp4_atom(b'udta', mp4_atom(b'meta', struct.pack('>I', 0) + meta_handler + mp4_atom(b'ilst', ilst)))
+    return mp4_atom(b'moov', mvhd + trak + udta)
+
+
+def write_mp4(path: str, cover_size: Optional[int] = None, audio_size: int = 64 * 1024,
+              moov_first: bool = True, cover_last: bool = True) -> str:
+    """写入 M4A 文件: moov 在 mdat 之前 (faststart) 或之后, 可附带 covr 封面
+
+    cover_last 为 False 时 covr 位于 ilst 中间, 之后还有一个文字项目。
+    """
+    ftyp = mp4_atom(b'ftyp', b'M4A \x00\x00\x00\x00M4A isom')
+    ilst = _mp4_item(b'\xa9nam', os.path.basename(path).encode('utf-8'))
+    if cover_size is not None:
+        ilst += _mp4_item(b'covr', b'\xff\xd8\xff\xe0' + os.urandom(max(0, cover_size - 4)), flags=13)
+    if not cover_last:
+        ilst += _mp4_item(b'\xa9ART', b'artist')
+    mdat_payload = os.urandom(audio_size)
+    moov_size = len(_mp4_moov(ilst, 0))
+    if moov_first:
+        moov = _mp4_moov(ilst, len(ftyp) + moov_size + 8)
+        data = ftyp + moov + mp4_atom(b'mdat', mdat_payload)
+    else:
+        data = ftyp + mp4_atom(b'mdat', mdat_payload) + _mp4_moov(ilst, len(ftyp) + 8)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+# ---- 损坏的文件 ----
+
+def write_corrupt(path: str, kind: str = 'garbage') -> str:
+    """写入损坏的文件: garbage 为随机数据, truncated 为只剩标签头的文件"""
+    ext = os.path.splitext(path)[1].lower()
+    if kind == 'truncated':
+        if ext == '.flac':
+            data = b'fLaC' + bytes([0]) + (34).to_bytes(3, 'big') + b'\x00' * 10
+        elif ext == '.ogg':
+            data = b'OggS' + b'\x00' * 10
+        else:
+            data = b'ID3\x03\x00\x00' + syncsafe(100000) + text_frame(b'TIT2', 'cut')
+    else:
+        data = os.urandom(4096)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
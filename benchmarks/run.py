@@ -0,0 +1,279 @@
+"""remove_cover 吞吐量基准测试
+
+在临时目录中生成合成测试文件, 用 AudioCoverRemover.remove_cover 处理, 输出每个场景的
+files/s、MB/s (读/写)、峰值 RSS 以及单文件延迟的 p50/p99, 并可写入 JSON 以便跨提交比较::
+
+    python -m benchmarks.run --output before.json
+    python -m benchmarks.run --output after.json --compare before.json
+
+每个 (场景, 模式) 在独立的子进程中运行, 使峰值 RSS 和 I/O 计数互不影响。
+读写字节数来自 /proc/self/io (rchar/wchar), 在其他平台上为 null。
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import fixtures
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+KB = 1024
+MB = 1024 * 1024
+
+# 场景名 -> (扩展名, 生成函数)
+SCENARIOS = {
+    'mp3_no_id3': ('.mp3', lambda p: fixtures.write_mp3(p, id3=False)),
+    'mp3_no_cover': ('.mp3', lambda p: fixtures.write_mp3(p)),
+    'mp3_cover_50k': ('.mp3', lambda p: fixtures.write_mp3(p, cover_size=50 * KB)),
+    'mp3_cover_2m': ('.mp3', lambda p: fixtures.write_mp3(p, cover_size=2 * MB, frames=2000)),
+    'flac_no_cover': ('.flac', lambda p: fixtures.write_flac(p, padding=8 * KB, audio_size=4 * MB)),
+    'flac_3_pictures': ('.flac', lambda p: fixtures.write_flac(
+        p, picture_sizes=(500 * KB, 200 * KB, 50 * KB), audio_size=4 * MB)),
+    'ogg_cover': ('.ogg', lambda p: fixtures.write_ogg(p, cover_size=200 * KB)),
+    'wav_id3_cover': ('.wav', lambda p: fixtures.write_wav(p, cover_size=100 * KB, audio_size=2 * MB)),
+    'aiff_id3_cover': ('.aiff', lambda p: fixtures.write_aiff(p, cover_size=100 * KB, audio_size=2 * MB)),
+    'wav_id3_first_cover': ('.wav', lambda p: fixtures.write_wav(
+        p, cover_size=100 * KB, audio_size=2 * MB, id3_first=True)),
+    'wav_id3_no_cover': ('.wav', lambda p: fixtures.write_wav(p, audio_size=2 * MB)),
+    'wv_ape_cover': ('.wv', lambda p: fixtures.write_wavpack(p, cover_size=100 * KB, audio_size=2 * MB)),
+    'wv_ape_no_cover': ('.wv', lambda p: fixtures.write_wavpack(p, audio_size=2 * MB)),
+    'm4a_cover': ('.m4a', lambda p: fixtures.write_mp4(p, cover_size=500 * KB, audio_size=4 * MB)),
+    'm4a_cover_moov_last': ('.m4a', lambda p: fixtures.write_mp4(
+        p, cover_size=500 * KB, audio_size=4 * MB, moov_first=False)),
+    'm4a_cover_middle': ('.m4a', lambda p: fixtures.write_mp4(
+        p, cover_size=500 * KB, audio_size=4 * MB, cover_last=False)),
+    'mp3_cover_128m': ('.mp3', lambda p: fixtures.write_mp3(p, cover_size=128 * MB, frames=2000)),
+    'flac_booklet_240m': ('.flac', lambda p: fixtures.write_flac(
+        p, picture_sizes=(15 * MB,) * 16, audio_size=4 * MB)),  # PICTURE 块最大 16 MB
+    'corrupt_mp3': ('.mp3', lambda p: fixtures.write_corrupt(p, 'truncated')),
+    'corrupt_flac': ('.flac', lambda p: fixtures.write_corrupt(p, 'garbage')),
+}
+
+# 超大文件场景最多生成的文件数, 避免占用过多磁盘
+SCENARIO_MAX_FILES = {
+    'mp3_cover_128m': 3,
+    'flac_booklet_240m': 2,
+}
+
+# 模式名 -> remove_cover 参数 (output_dir 由子进程填入)
+MODES = {
+    'default': {},
+    'in_place': {'in_place': True},
+    'output_dir': {'output_dir': True},
+    'no_memory_budget': {'memory_budget': None},  # 总是用 mutagen 读入整个标签, 用于对比峰值 RSS
+    # --safe-writes: 暂存修改, 每 sync_every 个文件提交并落盘一次 (与上面的直接保存比较)
+    'safe_writes': {'staged': True, 'sync_every': 100},
+    'safe_in_place': {'staged': True, 'in_place': True, 'sync_every': 100},
+    'safe_sync_each': {'staged': True, 'sync_every': 1},
+}
+
+
+def _io_counters():
+    """返回 (rchar, wchar), 不支持时返回 None"""
+    try:
+        with open('/proc/self/io') as f:
+            values = dict(line.split(': ') for line in f.read().splitlines())
+        return int(values['rchar']), int(values['wchar'])
+    except OSError:
+        return None
+
+
+def _peak_rss_bytes():
+    """当前进程的峰值 RSS
+
+    优先读取 /proc/self/status 的 VmHWM: exec 后重新计算, 不包含 fork 时从父进程 (生成了大文件的
+    测试进程) 继承的内存; ru_maxrss 在 Linux 上会保留 exec 之前的峰值。
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+def run_child(fixture_dir: str, mode: str) -> dict:
+    """子进程: 复制一份测试文件并逐个处理, 返回测量结果"""
+    from AudioCoverRemover import AudioCoverRemover, WriteJournal
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(fixture_dir)) as work:
+        source = os.path.join(work, 'src')
+        shutil.copytree(fixture_dir, source)
+        options = dict(MODES[mode])
+        if options.get('output_dir'):
+            options['output_dir'] = os.path.join(work, 'out')
+        sync_every = options.pop('sync_every', None)
+        journal = None
+        if options.get('staged'):
+            options['staged'] = os.path.join(work, 'journal')
+            journal = WriteJournal(options['staged'], sync_every)
+        paths = sorted(os.path.join(source, name) for name in os.listdir(source))
+        input_bytes = sum(os.path.getsize(p) for p in paths)
+
+        # 预热: 处理一份不计时的副本, 使按需导入的 mutagen 模块不计入延迟
+        warmup = os.path.join(work, 'warmup' + os.path.splitext(paths[0])[1])
+        shutil.copyfile(paths[0], warmup)
+        AudioCoverRemover.remove_cover(warmup, **dict(options, output_dir=None, staged=None))
+
+        latencies = []
+        succeeded = 0
+        io_before = _io_counters()
+        start = time.perf_counter()
+        for path in paths:
+            t0 = time.perf_counter()
+            result = AudioCoverRemover.remove_cover(path, **options)
+            if journal:
+                journal.add(path, result)  # 提交落盘的耗时计入触发提交的那个文件
+            latencies.append(time.perf_counter() - t0)
+            succeeded += result.success
+        if journal:
+            journal.close()
+        elapsed = time.perf_counter() - start
+        io_after = _io_counters()
+
+    latencies.sort()
+    result = {
+        'files': len(paths),
+        'succeeded': succeeded,
+        'input_mb': input_bytes / MB,
+        'seconds': elapsed,
+        'files_per_sec': len(paths) / elapsed if elapsed else None,
+        'read_mb_per_sec': None,
+        'write_mb_per_sec': None,
+        'read_bytes_per_file': None,
+        'write_bytes_per_file': None,
+        'peak_rss_mb': None,
+        'p50_ms': _percentile(latencies, 0.50) * 1000,
+        'p99_ms': _percentile(latencies, 0.99) * 1000,
+    }
+    if io_before and io_after and elapsed:
+        read, written = io_after[0] - io_before[0], io_after[1] - io_before[1]
+        result.update(read_mb_per_sec=read / MB / elapsed, write_mb_per_sec=written / MB / elapsed,
+                      read_bytes_per_file=read / len(paths), write_bytes_per_file=written / len(paths))
+    peak = _peak_rss_bytes()
+    if peak is not None:
+        result['peak_rss_mb'] = peak / MB
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_suite(scenarios, modes, count: int, workdir=None) -> dict:
+    """生成测试文件并在子进程中运行所有 (场景, 模式) 组合"""
+    results = []
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        for scenario in scenarios:
+            ext, make = SCENARIOS[scenario]
+            fixture_dir = os.path.join(tmp, scenario)
+            os.makedirs(fixture_dir)
+            for i in range(min(count, SCENARIO_MAX_FILES.get(scenario, count))):
+                make(os.path.join(fixture_dir, f'{i:05d}{ext}'))
+
+            for mode in modes:
+                proc = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.run', '--child', fixture_dir, '--mode', mode],
+                    cwd=ROOT, capture_output=True, text=True)
+                if proc.returncode != 0:
+                    raise RuntimeError(f'{scenario}/{mode} failed:\n{proc.stderr}')
+                row = {'scenario': scenario, 'mode': mode}
+                row.update(json.loads(proc.stdout.strip().splitlines()[-1]))
+                results.append(row)
+                _print_row(row)
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'files_per_scenario': count,
+        },
+        'results': results,
+    }
+
+
+def _fmt(value, spec):
+    return 'n/a' if value is None else format(value, spec)
+
+
+def _print_header():
+    print(f"{'scenario':<21}{'mode':<18}{'files/s':>9}{'rd MB/s':>9}{'wr MB/s':>9}"
+          f"{'wr KB/file':>11}{'RSS MB':>8}{'p50 ms':>8}{'p99 ms':>8}{'ok':>6}")
+
+
+def _print_row(row):
+    write_kb = None if row['write_bytes_per_file'] is None else row['write_bytes_per_file'] / KB
+    print(f"{row['scenario']:<21}{row['mode']:<18}{_fmt(row['files_per_sec'], '9.1f')}"
+          f"{_fmt(row['read_mb_per_sec'], '9.1f')}{_fmt(row['write_mb_per_sec'], '9.1f')}"
+          f"{_fmt(write_kb, '11.1f')}{_fmt(row['peak_rss_mb'], '8.1f')}"
+          f"{_fmt(row['p50_ms'], '8.2f')}{_fmt(row['p99_ms'], '8.2f')}"
+          f"{row['succeeded']:>3}/{row['files']:<2}", flush=True)
+
+
+def compare(current: dict, baseline: dict):
+    """打印与基线结果相比的 files/s 和 p99 变化"""
+    old = {(r['scenario'], r['mode']): r for r in baseline['results']}
+    print(f"\ncompared with {baseline['meta'].get('commit') or 'baseline'}:")
+    print(f"{'scenario':<21}{'mode':<18}{'files/s':>10}{'p99':>10}")
+    for row in current['results']:
+        before = old.get((row['scenario'], row['mode']))
+        if not before or not before['files_per_sec'] or not before['p99_ms']:
+            continue
+        speed = row['files_per_sec'] / before['files_per_sec'] - 1
+        p99 = row['p99_ms'] / before['p99_ms'] - 1
+        print(f"{row['scenario']:<21}{row['mode']:<18}{speed:>+10.1%}{p99:>+10.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', '--count', type=int, default=50, help='files per scenario')
+    parser.add_argument('-s', '--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='run only these scenarios (repeatable)')
+    parser.add_argument('-m', '--mode', action='append', choices=sorted(MODES),
+                        help='run only these modes (repeatable)')
+    parser.add_argument('-o', '--output', help='write results as JSON')
+    parser.add_argument('--compare', metavar='JSON', help='baseline JSON to compare against')
+    parser.add_argument('--workdir', help='directory for fixtures (default: system temp)')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, (args.mode or ['default'])[0])))
+        return
+
+    _print_header()
+    report = run_suite(args.scenario or list(SCENARIOS), args.mode or list(MODES), args.count, args.workdir)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""测试共用的文件读写和检查函数
+
+测试文件由 benchmarks.fixtures 生成。去掉封面后文件必须仍能解析、只有图片消失、音频数据逐字节不变。
+"""
+import builtins
+import os
+import struct
+
+import mutagen
+
+from AudioCoverRemover import Outcome, cli_main
+from benchmarks import fixtures
+
+JPEG_MAGIC = b'\xff\xd8\xff\xe0'
+PICTURE_KEYS = ('apic', 'covr', 'metadata_block_picture', 'cover art')
+
+# 名称 -> (文件名, 生成带封面文件的函数)
+COVERED = {
+    'mp3': ('a.mp3', lambda p: fixtures.write_mp3(p, cover_size=20000)),
+    'mp3_padding': ('a.mp3', lambda p: fixtures.write_mp3(p, cover_size=20000, padding=1024)),
+    'flac': ('a.flac', lambda p: fixtures.write_flac(p, [20000, 3000])),
+    'flac_padding': ('a.flac', lambda p: fixtures.write_flac(p, [20000], padding=512)),
+    'ogg': ('a.ogg', lambda p: fixtures.write_ogg(p, cover_size=20000)),
+    'wav': ('a.wav', lambda p: fixtures.write_wav(p, cover_size=20000)),
+    'wav_id3_first': ('a.wav', lambda p: fixtures.write_wav(p, cover_size=20000, id3_first=True)),
+    'aiff': ('a.aiff', lambda p: fixtures.write_aiff(p, cover_size=20000)),
+    'wv': ('a.wv', lambda p: fixtures.write_wavpack(p, cover_size=20000)),
+    'wv_id3v1': ('a.wv', lambda p: fixtures.write_wavpack(p, cover_size=20000, id3v1=True)),
+    'm4a': ('a.m4a', lambda p: fixtures.write_mp4(p, cover_size=20000)),
+    'm4a_moov_last': ('a.m4a', lambda p: fixtures.write_mp4(p, cover_size=20000, moov_first=False)),
+    'm4a_cover_middle': ('a.m4a', lambda p: fixtures.write_mp4(p, cover_size=20000, cover_last=False)),
+}
+
+NO_COVER = {
+    'mp3': ('a.mp3', fixtures.write_mp3),
+    'flac': ('a.flac', fixtures.write_flac),
+    'ogg': ('a.ogg', fixtures.write_ogg),
+    'wav': ('a.wav', fixtures.write_wav),
+    'wv': ('a.wv', fixtures.write_wavpack),
+    'm4a': ('a.m4a', fixtures.write_mp4),
+}
+
+
+def read(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def write(path: str, data: bytes):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def audio_payload(path: str) -> bytes:
+    """与标签无关的音频数据, 处理前后必须逐字节相同"""
+    data = read(path)
+    ext = os.path.splitext(path)[1]
+    if ext == '.mp3':
+        if data[:3] != b'ID3':
+            return data
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        return data[10 + size:]
+    if ext == '.flac':
+        pos = 4
+        while True:
+            last, length = data[pos] & 0x80, int.from_bytes(data[pos + 1:pos + 4], 'big')
+            pos += 4 + length
+            if last:
+                return data[pos:]
+    if ext in ('.wav', '.aiff'):
+        big_endian = ext == '.aiff'
+        name = b'SSND' if big_endian else b'data'
+        pos = 12
+        while pos + 8 <= len(data):
+            size = struct.unpack('>I' if big_endian else '<I', data[pos + 4:pos + 8])[0]
+            if data[pos:pos + 4] == name:
+                return data[pos + 8:pos + 8 + size]
+            pos += 8 + size + size % 2
+    if ext == '.wv':
+        return data[:data.index(b'APETAGEX')]  # 去掉封面后 APEv2 标签中仍有标题和艺术家
+    if ext == '.m4a':
+        pos = 0
+        while pos + 8 <= len(data):
+            size, name = struct.unpack('>I4s', data[pos:pos + 8])
+            if name == b'mdat':
+                return data[pos + 8:pos + size]
+            pos += size
+    if ext == '.ogg':
+        bodies = []
+        pos = 0
+        while pos < len(data):
+            granule = struct.unpack('<q', data[pos + 6:pos + 14])[0]
+            count = data[pos + 26]
+            start = pos + 27 + count
+            pos = start + sum(data[pos + 27:start])
+            if granule > 0:  # 头部页的 granule 为 0
+                bodies.append(data[start:pos])
+        return b''.join(bodies)
+    raise AssertionError(f'no audio payload found in {path}')
+
+
+def read_tags(path: str):
+    """用 mutagen 解析文件, 返回 (图片数量, 其他标签)"""
+    audio = mutagen.File(path)
+    assert audio is not None, f'mutagen cannot parse {path}'
+    assert not getattr(audio.tags, '_failed_atoms', None)  # MP4 中无法解析的项目会在每次保存时写回
+    pictures = len(getattr(audio, 'pictures', ()))
+    others = []
+    for key, value in audio.tags.items() if audio.tags else ():
+        if key.lower().startswith(PICTURE_KEYS):
+            pictures += 1
+        else:
+            others.append((key, str(value)))
+    return pictures, sorted(others)
+
+
+def covered_file(tmp_path, fixture: str) -> str:
+    name, write = COVERED[fixture]
+    return write(str(tmp_path / name))
+
+
+def check_removes_only_pictures(path: str, process):
+    """用 process(path) -> (结果, 输出路径) 处理带封面的文件并检查输出, 返回结果"""
+    original = read(path)
+    pictures, tags = read_tags(path)
+    assert pictures
+    payload = audio_payload(path)
+
+    result, output = process(path)
+
+    assert result.outcome == Outcome.COVER_REMOVED, result.error
+    assert result.pending is None
+    assert read_tags(output) == (0, tags)
+    assert audio_payload(output) == payload
+    assert JPEG_MAGIC not in read(output)  # 留作填充的图片数据已清零
+    if output != path:
+        assert read(path) == original
+    return result
+
+
+def cut_inside_cover(path: str) -> bytes:
+    """把文件截断在最后一张图片中间, 返回截断后的内容"""
+    data = read(path)
+    cut = data[:data.rindex(JPEG_MAGIC) + 1000]
+    write(path, cut)
+    return cut
+
+
+def make_read_only(monkeypatch, path: str):
+    """打开 path 用于写入时抛出 PermissionError (以 root 运行时 chmod 不起作用)"""
+    real_open = builtins.open
+
+    def guarded_open(file, mode='r', *args, **kwargs):
+        if file == path and any(flag in mode for flag in '+wax'):
+            raise PermissionError(13, 'Permission denied', file)
+        return real_open(file, mode, *args, **kwargs)
+    monkeypatch.setattr(builtins, 'open', guarded_open)
+
+
+def run_cli(capsys, *argv):
+    """运行命令行模式 (英文输出), 返回 (退出码, 处理过的文件 -> 是否成功, 其余输出行 (含标准错误))"""
+    code = cli_main(['--lang', 'en_US', '-j', '1', *argv])
+    captured = capsys.readouterr()
+    processed, lines = {}, captured.err.splitlines()
+    for line in captured.out.splitlines():
+        status, _, rest = line.partition(': ')
+        if status in ('Success', 'Fail') and ' - ' in rest:
+            processed[rest.rsplit(' - ', 1)[0]] = status == 'Success'
+        else:
+            lines.append(line)
+    return code, processed, lines
@@ -0,0 +1,89 @@
+"""--analyze: 只读统计内嵌图片, 直接读取标签区域的结果与 mutagen 一致"""
+import csv
+import io
+import json
+import os
+
+import pytest
+from mutagen.id3 import APIC, ID3
+
+from AudioCoverRemover import CoverAnalyzer, cli_main
+from benchmarks import fixtures
+from helpers import COVERED, NO_COVER, covered_file, read
+
+
+@pytest.mark.parametrize('fixture', sorted(COVERED))
+def test_pictures_match_mutagen(tmp_path, fixture):
+    path = covered_file(tmp_path, fixture)
+    original = read(path)
+
+    analysis = CoverAnalyzer.analyze(path)
+    reference = CoverAnalyzer._analyze_mutagen(path, os.path.splitext(path)[1])
+
+    assert analysis.error == ''
+    assert [picture.size for picture in analysis.pictures] == [picture.size for picture in reference.pictures]
+    assert sum(picture.size for picture in analysis.pictures) == (23000 if fixture == 'flac' else 20000)
+    assert read(path) == original
+
+
+@pytest.mark.parametrize('fixture', sorted(NO_COVER))
+def test_files_without_pictures(tmp_path, fixture):
+    name, write = NO_COVER[fixture]
+    analysis = CoverAnalyzer.analyze(write(str(tmp_path / name)))
+
+    assert (analysis.pictures, analysis.error) == ((), '')
+
+
+def test_dimensions_are_read_from_the_image_header(tmp_path):
+    from PIL import Image
+    image = io.BytesIO()
+    Image.new('RGB', (640, 480)).save(image, 'PNG')
+    path = fixtures.write_mp3(str(tmp_path / 'a.mp3'))
+    tags = ID3(path)
+    tags.add(APIC(encoding=3, mime='image/png', type=3, desc='', data=image.getvalue()))
+    tags.save(path)
+
+    (picture,) = CoverAnalyzer.analyze(path).pictures
+
+    assert (picture.mime, picture.size, picture.width, picture.height) == \
+        ('image/png', len(image.getvalue()), 640, 480)
+
+
+def _library(tmp_path):
+    library = tmp_path / 'lib'
+    os.makedirs(library)
+    covered = covered_file(library, 'flac')
+    clean = fixtures.write_mp3(str(library / 'b.mp3'))
+    broken = fixtures.write_corrupt(str(library / 'c.mp3'))
+    return str(library), covered, clean, broken
+
+
+def test_csv_report(tmp_path, capsys):
+    library, covered, clean, broken = _library(tmp_path)
+    report = str(tmp_path / 'covers.csv')
+
+    assert cli_main(['--lang', 'en_US', '-j', '1', '--analyze', '--report', report, library]) == 0
+
+    with open(report, newline='', encoding='utf-8') as f:
+        rows = {row['path']: row for row in csv.DictReader(f)}
+    assert set(rows) == {covered, clean, broken}
+    assert (rows[covered]['pictures'], rows[covered]['picture_bytes']) == ('2', '23000')
+    assert rows[clean]['pictures'] == '0'
+    assert 'flac' in capsys.readouterr().out  # 按格式的汇总表
+
+
+def test_json_report(tmp_path):
+    library, covered, clean, broken = _library(tmp_path)
+    report = str(tmp_path / 'covers.json')
+    originals = {path: read(path) for path in (covered, clean, broken)}
+
+    assert cli_main(['--lang', 'en_US', '-j', '2', '--analyze', '--report', report, library]) == 0
+
+    with open(report, encoding='utf-8') as f:
+        data = json.load(f)
+    assert {row['path'] for row in data['files']} == {covered, clean, broken}
+    totals = {row['format']: row for row in data['totals']}
+    assert (totals['flac']['files_with_pictures'], totals['flac']['picture_bytes']) == (1, 23000)
+    assert totals['mp3']['files'] == 2
+    assert data['mime_types'] == {'image/jpeg': 2}
+    assert {path: read(path) for path in originals} == originals
@@ -0,0 +1,66 @@
+"""--async-io: 预读文件头判断是否有封面, 读取和修改分别限制并发"""
+import os
+
+from AudioCoverRemover import ASYNC_PREFETCH_SIZE, AsyncBatchRunner, Outcome
+from benchmarks import fixtures
+from helpers import COVERED, audio_payload, covered_file, read, read_tags
+
+
+def _run(tmp_path, paths, **options):
+    results = {}
+    runner = AsyncBatchRunner(read_limit=4, write_limit=2, **options)
+    processed, failed = runner.run([(path, str(tmp_path)) for path in paths], results.__setitem__)
+    assert processed == len(paths)
+    return results, failed
+
+
+def test_covers_are_removed(tmp_path):
+    paths, payloads = [], {}
+    for fixture in sorted(COVERED):
+        os.makedirs(tmp_path / fixture)
+        path = covered_file(tmp_path / fixture, fixture)
+        paths.append(path)
+        payloads[path] = (audio_payload(path), read_tags(path)[1])
+
+    results, failed = _run(tmp_path, paths)
+
+    assert failed == 0
+    for path in paths:
+        assert results[path].outcome == Outcome.COVER_REMOVED, (path, results[path].error)
+        assert (audio_payload(path), read_tags(path)[1]) == payloads[path]
+        assert read_tags(path)[0] == 0
+
+
+def test_files_without_cover_are_decided_from_the_prefetched_header(tmp_path):
+    paths = [fixtures.write_mp3(str(tmp_path / 'a.mp3')), fixtures.write_flac(str(tmp_path / 'b.flac'))]
+    originals = {path: read(path) for path in paths}
+
+    results, _ = _run(tmp_path, paths)
+
+    assert {result.method for result in results.values()} == {'probe'}
+    assert {path: read(path) for path in paths} == originals
+
+
+def test_tags_larger_than_the_prefetch_are_probed_on_disk(tmp_path):
+    padding = 2 * ASYNC_PREFETCH_SIZE
+    paths = [fixtures.write_mp3(str(tmp_path / 'a.mp3'), padding=padding),
+             fixtures.write_flac(str(tmp_path / 'b.flac'), padding=padding)]
+
+    results, _ = _run(tmp_path, paths)
+
+    for path in paths:
+        assert results[path].outcome == Outcome.NO_COVER
+        assert results[path].method == 'probe'  # 不做完整的 mutagen 解析
+
+
+def test_outputs_are_written_for_every_file(tmp_path):
+    covered = fixtures.write_flac(str(tmp_path / 'a.flac'), [20000])
+    clean = fixtures.write_mp3(str(tmp_path / 'b.mp3'))
+    out = tmp_path / 'out'
+
+    results, failed = _run(tmp_path, [covered, clean], output_dir=str(out))
+
+    assert failed == 0
+    assert results[covered].outcome == Outcome.COVER_REMOVED
+    assert read_tags(str(out / 'a.flac'))[0] == 0
+    assert read(str(out / 'b.mp3')) == read(clean)
@@ -0,0 +1,108 @@
+"""--downscale: 只重新编码超出限制的封面, 音频数据和其他标签不变"""
+import base64
+import io
+import os
+
+import pytest
+from mutagen.flac import FLAC, Picture
+from mutagen.id3 import APIC, ID3
+from mutagen.mp4 import MP4, MP4Cover
+from mutagen.oggvorbis import OggVorbis
+
+from AudioCoverRemover import AudioCoverRemover, CoverAnalyzer, CoverPolicy, DownscaleRunner, Outcome
+from helpers import NO_COVER, audio_payload, read, read_tags
+
+POLICY = CoverPolicy(max_kb=60, max_px=300, quality=80)
+
+
+def _image(side: int) -> bytes:
+    from PIL import Image
+    out = io.BytesIO()
+    Image.effect_noise((side, side), 64).convert('RGB').save(out, 'JPEG', quality=95)
+    return out.getvalue()
+
+
+def _with_cover(tmp_path, fixture: str, data: bytes) -> str:
+    """生成不带封面的文件, 再用 mutagen 嵌入 data"""
+    name, write = NO_COVER[fixture]
+    path = write(str(tmp_path / name))
+    if fixture == 'mp3':
+        tags = ID3(path)
+        tags.add(APIC(encoding=3, mime='image/jpeg', type=3, desc='', data=data))
+        tags.save(path)
+        return path
+    picture = Picture()
+    picture.type, picture.mime, picture.data = 3, 'image/jpeg', data
+    if fixture == 'flac':
+        audio = FLAC(path)
+        audio.add_picture(picture)
+    elif fixture == 'ogg':
+        audio = OggVorbis(path)
+        audio['metadata_block_picture'] = [base64.b64encode(picture.write()).decode('ascii')]
+    else:
+        audio = MP4(path)
+        audio['covr'] = [MP4Cover(data, MP4Cover.FORMAT_JPEG)]
+    audio.save()
+    return path
+
+
+@pytest.mark.parametrize('fixture', ['mp3', 'flac', 'ogg', 'm4a'])
+def test_large_covers_are_reencoded(tmp_path, fixture):
+    data = _image(800)
+    path = _with_cover(tmp_path, fixture, data)
+    payload, tags = audio_payload(path), read_tags(path)
+
+    result = AudioCoverRemover.downscale_covers(path, POLICY)
+
+    assert result.outcome == Outcome.COVER_RESIZED, result.error
+    (picture,) = CoverAnalyzer.analyze(path).pictures
+    assert max(picture.width, picture.height) <= POLICY.max_px
+    assert picture.size <= POLICY.max_kb * 1024
+    assert result.bytes_removed == len(data) - picture.size
+    assert (audio_payload(path), read_tags(path)) == (payload, tags)
+
+
+def test_covers_within_limits_are_kept(tmp_path):
+    path = _with_cover(tmp_path, 'flac', _image(200))
+    original = read(path)
+
+    result = AudioCoverRemover.downscale_covers(path, POLICY)
+
+    assert result.outcome == Outcome.COVER_KEPT
+    assert read(path) == original
+
+
+def test_files_without_covers(tmp_path):
+    name, write = NO_COVER['mp3']
+    path = write(str(tmp_path / name))
+
+    assert AudioCoverRemover.downscale_covers(path, POLICY).outcome == Outcome.NO_COVER
+
+
+def test_output_dir_leaves_the_source_unchanged(tmp_path):
+    os.makedirs(tmp_path / 'lib' / 'album')
+    path = _with_cover(tmp_path / 'lib' / 'album', 'mp3', _image(800))
+    original = read(path)
+
+    result = AudioCoverRemover.downscale_covers(path, POLICY, str(tmp_path / 'out'), str(tmp_path / 'lib'))
+
+    assert result.outcome == Outcome.COVER_RESIZED
+    assert read(path) == original
+    (picture,) = CoverAnalyzer.analyze(str(tmp_path / 'out' / 'album' / 'a.mp3')).pictures
+    assert max(picture.width, picture.height) <= POLICY.max_px
+
+
+def test_identical_covers_are_encoded_once(tmp_path):
+    data = _image(800)
+    paths = []
+    for album in ('a', 'b', 'c'):
+        os.makedirs(tmp_path / album)
+        paths.append(_with_cover(tmp_path / album, 'flac', data))
+    results = {}
+
+    runner = DownscaleRunner(jobs=2, policy=POLICY, image_jobs=1)
+    assert runner.run([(path, str(tmp_path)) for path in paths], results.__setitem__) == (3, 0)
+
+    assert {result.outcome for result in results.values()} == {Outcome.COVER_RESIZED}
+    assert (runner.cache.misses, runner.cache.hits) == (1, 2)
+    assert len({FLAC(path).pictures[0].data for path in paths}) == 1
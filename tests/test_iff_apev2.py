@@ -0,0 +1,66 @@
+"""WAV / AIFF 的 ID3 块和 APEv2 标签: 只去掉图片, 其他标签保持不变"""
+import pytest
+
+from AudioCoverRemover import AudioCoverRemover, Outcome
+from benchmarks import fixtures
+from helpers import check_removes_only_pictures, covered_file, cut_inside_cover, make_read_only, read
+
+# (名称, in_place) -> 必须采用的处理方式
+EXPECTED_METHODS = {
+    ('wav', False): 'shrink',  # ID3 块在文件末尾: 截断
+    ('wav', True): 'inplace',
+    ('wav_id3_first', False): 'inplace',  # ID3 块在音频数据之前: 改写为填充
+    ('aiff', False): 'shrink',
+    ('wv', False): 'shrink',
+}
+
+
+@pytest.mark.parametrize('in_place', (False, True))
+@pytest.mark.parametrize('fixture', ('wav', 'wav_id3_first', 'aiff', 'wv', 'wv_id3v1'))
+def test_removes_only_pictures(tmp_path, fixture, in_place):
+    path = covered_file(tmp_path, fixture)
+
+    result = check_removes_only_pictures(path, lambda p: (AudioCoverRemover.remove_cover(p, in_place=in_place), p))
+
+    if (fixture, in_place) in EXPECTED_METHODS:
+        assert result.method == EXPECTED_METHODS[fixture, in_place]
+
+
+@pytest.mark.parametrize('name, write', (('a.wav', fixtures.write_wav), ('a.aiff', fixtures.write_aiff),
+                                         ('a.wv', fixtures.write_wavpack)))
+def test_files_without_cover_are_not_written(tmp_path, name, write):
+    path = write(str(tmp_path / name))
+    original = read(path)
+
+    assert AudioCoverRemover.remove_cover(path).outcome == Outcome.NO_COVER
+    assert read(path) == original
+
+
+@pytest.mark.parametrize('name, write', (('a.wav', fixtures.write_wav), ('a.wv', fixtures.write_wavpack)))
+def test_read_only_files_without_cover_report_no_cover(tmp_path, monkeypatch, name, write):
+    path = write(str(tmp_path / name))
+    make_read_only(monkeypatch, path)
+
+    assert AudioCoverRemover.remove_cover(path, prefilter=False).outcome == Outcome.NO_COVER
+
+
+@pytest.mark.parametrize('fixture', ('wav', 'wav_id3_first', 'wv'))
+def test_read_only_files_with_cover_are_left_unchanged(tmp_path, monkeypatch, fixture):
+    path = covered_file(tmp_path, fixture)
+    original = read(path)
+    make_read_only(monkeypatch, path)
+
+    assert AudioCoverRemover.remove_cover(path).outcome == Outcome.PROCESS_ERROR
+    assert read(path) == original
+
+
+@pytest.mark.parametrize('in_place', (False, True))
+@pytest.mark.parametrize('fixture', ('wav', 'wav_id3_first', 'aiff'))
+def test_files_cut_inside_the_cover_are_left_unchanged(tmp_path, fixture, in_place):
+    path = covered_file(tmp_path, fixture)
+    cut = cut_inside_cover(path)
+
+    result = AudioCoverRemover.remove_cover(path, in_place=in_place)
+
+    assert not result.success
+    assert read(path) == cut
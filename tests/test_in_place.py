@@ -0,0 +1,80 @@
+"""默认保存和 --in-place: 图片改写为标签填充, 音频数据不移动"""
+import pytest
+
+from AudioCoverRemover import AudioCoverRemover, Outcome
+from benchmarks import fixtures
+from helpers import NO_COVER, check_removes_only_pictures, covered_file, cut_inside_cover, make_read_only, read
+
+FORMATS = ('mp3', 'mp3_padding', 'flac', 'flac_padding', 'ogg')
+
+
+@pytest.mark.parametrize('in_place', (False, True))
+@pytest.mark.parametrize('fixture', FORMATS)
+def test_removes_only_pictures(tmp_path, fixture, in_place):
+    path = covered_file(tmp_path, fixture)
+
+    result = check_removes_only_pictures(path, lambda p: (AudioCoverRemover.remove_cover(p, in_place=in_place), p))
+
+    if in_place and fixture != 'ogg':
+        assert result.method == 'inplace'  # 不能悄悄退回 mutagen 重写
+
+
+@pytest.mark.parametrize('in_place', (False, True))
+@pytest.mark.parametrize('fixture', ('mp3', 'flac', 'ogg'))
+def test_files_without_cover_are_not_written(tmp_path, fixture, in_place):
+    name, write = NO_COVER[fixture]
+    path = write(str(tmp_path / name))
+    original = read(path)
+
+    result = AudioCoverRemover.remove_cover(path, in_place=in_place)
+
+    assert result.outcome == Outcome.NO_COVER
+    assert read(path) == original
+
+
+@pytest.mark.parametrize('in_place', (False, True))
+@pytest.mark.parametrize('kind', ('garbage', 'truncated'))
+@pytest.mark.parametrize('ext', ('.mp3', '.flac', '.ogg', '.wav', '.aiff', '.wv', '.m4a'))
+def test_corrupt_files_are_left_unchanged(tmp_path, ext, kind, in_place):
+    path = fixtures.write_corrupt(str(tmp_path / ('a' + ext)), kind)
+    original = read(path)
+
+    result = AudioCoverRemover.remove_cover(path, in_place=in_place)
+
+    assert result.outcome != Outcome.COVER_REMOVED
+    assert read(path) == original
+
+
+@pytest.mark.parametrize('in_place', (False, True))
+@pytest.mark.parametrize('fixture', ('mp3', 'flac'))
+def test_files_cut_inside_the_cover_are_left_unchanged(tmp_path, fixture, in_place):
+    path = covered_file(tmp_path, fixture)
+    cut = cut_inside_cover(path)
+
+    result = AudioCoverRemover.remove_cover(path, in_place=in_place)
+
+    assert not result.success
+    assert read(path) == cut
+
+
+@pytest.mark.parametrize('fixture', ('mp3', 'flac'))
+def test_read_only_file_without_cover_reports_no_cover(tmp_path, monkeypatch, fixture):
+    name, write = NO_COVER[fixture]
+    path = write(str(tmp_path / name))
+    make_read_only(monkeypatch, path)
+
+    result = AudioCoverRemover.remove_cover(path, in_place=True, prefilter=False)  # 不经过只读的预检
+
+    assert result.outcome == Outcome.NO_COVER
+
+
+@pytest.mark.parametrize('fixture', ('mp3', 'flac'))
+def test_read_only_file_with_cover_is_left_unchanged(tmp_path, monkeypatch, fixture):
+    path = covered_file(tmp_path, fixture)
+    original = read(path)
+    make_read_only(monkeypatch, path)
+
+    result = AudioCoverRemover.remove_cover(path, in_place=True)
+
+    assert result.outcome == Outcome.PROCESS_ERROR
+    assert read(path) == original
@@ -0,0 +1,95 @@
+"""--manifest: 再次运行时只处理新增、变化、上次失败或以其他参数处理过的文件"""
+import os
+import sqlite3
+
+from AudioCoverRemover import Manifest
+from benchmarks import fixtures
+from helpers import run_cli
+
+
+def _library(tmp_path):
+    library = tmp_path / 'music'
+    library.mkdir()
+    covered = fixtures.write_flac(str(library / 'a.flac'), [20000])
+    clean = fixtures.write_mp3(str(library / 'b.mp3'))
+    return str(library), covered, clean
+
+
+def test_unchanged_files_are_skipped(tmp_path, capsys):
+    library, covered, clean = _library(tmp_path)
+    db = str(tmp_path / 'library.db')
+
+    assert run_cli(capsys, '--manifest', db, library)[1] == {covered: True, clean: True}
+    code, processed, lines = run_cli(capsys, '--manifest', db, library)
+
+    assert (code, processed) == (0, {})
+    assert 'Skipped 2 unchanged files' in lines
+
+
+def test_new_changed_and_failed_files_are_processed_again(tmp_path, capsys):
+    library, covered, clean = _library(tmp_path)
+    broken = fixtures.write_corrupt(os.path.join(library, 'c.flac'), 'garbage')
+    db = str(tmp_path / 'library.db')
+    assert run_cli(capsys, '--manifest', db, library)[1] == {covered: True, clean: True, broken: False}
+
+    fixtures.write_mp3(clean, cover_size=20000)
+    added = fixtures.write_wav(os.path.join(library, 'd.wav'), cover_size=20000)
+
+    assert run_cli(capsys, '--manifest', db, library)[1] == {clean: True, broken: False, added: True}
+
+
+def test_runs_with_other_options_process_files_again(tmp_path, capsys):
+    library, covered, clean = _library(tmp_path)
+    db = str(tmp_path / 'library.db')
+    every = {covered: True, clean: True}
+
+    assert run_cli(capsys, '--manifest', db, '-o', str(tmp_path / 'out1'), library)[1] == every
+    assert run_cli(capsys, '--manifest', db, '-o', str(tmp_path / 'out2'), library)[1] == every
+    assert os.path.exists(tmp_path / 'out2' / 'a.flac')
+    assert run_cli(capsys, '--manifest', db, library)[1] == every  # 原文件仍带封面
+    assert run_cli(capsys, '--manifest', db, '--in-place', library)[1] == every
+    assert run_cli(capsys, '--manifest', db, '--in-place', library)[1] == {}
+
+
+def test_missing_outputs_are_written_again(tmp_path, capsys):
+    library, covered, clean = _library(tmp_path)
+    db, out = str(tmp_path / 'library.db'), tmp_path / 'out'
+    run_cli(capsys, '--manifest', db, '-o', str(out), library)
+
+    os.remove(out / 'a.flac')
+
+    assert run_cli(capsys, '--manifest', db, '-o', str(out), library)[1] == {covered: True}
+    assert os.path.exists(out / 'a.flac')
+
+
+def test_prune_and_rebuild(tmp_path, capsys):
+    library, covered, clean = _library(tmp_path)
+    db = str(tmp_path / 'library.db')
+    run_cli(capsys, '--manifest', db, library)
+    os.remove(clean)
+
+    code, processed, lines = run_cli(capsys, '--manifest', db, '--prune-manifest', library)
+    assert 'Removed 1 missing files from the manifest' in lines
+    assert processed == {}
+
+    assert run_cli(capsys, '--manifest', db, '--rebuild-manifest', library)[1] == {covered: True}
+
+
+def test_rows_of_the_first_schema_never_match(tmp_path):
+    path = fixtures.write_mp3(str(tmp_path / 'a.mp3'))
+    st = os.stat(path)
+    db = str(tmp_path / 'library.db')
+    with sqlite3.connect(db) as conn:  # 版本 1: 没有 options 列
+        conn.execute('CREATE TABLE files (path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,'
+                     ' inode INTEGER NOT NULL, success INTEGER NOT NULL, outcome TEXT, updated REAL NOT NULL)'
+                     ' WITHOUT ROWID')
+        conn.execute('INSERT INTO files VALUES (?, ?, ?, ?, 1, ?, 0)',
+                     (path, st.st_size, st.st_mtime_ns, st.st_ino, 'NO_COVER'))
+    conn.close()
+
+    manifest = Manifest(db, options='{}', roots=[str(tmp_path)])
+    assert not manifest.is_current(path)
+    manifest.record(path, True, 'NO_COVER')
+    manifest.flush()
+    assert manifest.is_current(path)
+    manifest.close()
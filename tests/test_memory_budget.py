@@ -0,0 +1,50 @@
+"""标签超过 --memory-budget 时按偏移跳过图片, 音频数据分块前移"""
+import pytest
+
+from AudioCoverRemover import AudioCoverRemover, Outcome
+from benchmarks import fixtures
+from helpers import COVERED, check_removes_only_pictures, covered_file, cut_inside_cover, make_read_only, read
+
+BUDGET = 1024  # 远小于测试文件中的图片
+
+
+@pytest.mark.parametrize('fixture', sorted(COVERED))
+def test_removes_only_pictures(tmp_path, fixture):
+    path = covered_file(tmp_path, fixture)
+
+    result = check_removes_only_pictures(path, lambda p: (AudioCoverRemover.remove_cover(p, memory_budget=BUDGET), p))
+
+    if fixture in ('mp3', 'flac'):
+        assert result.method == 'shrink'
+
+
+@pytest.mark.parametrize('fixture', ('mp3', 'flac', 'wav', 'wav_id3_first', 'aiff', 'm4a'))
+def test_files_cut_inside_the_cover_are_left_unchanged(tmp_path, fixture):
+    path = covered_file(tmp_path, fixture)
+    cut = cut_inside_cover(path)
+
+    result = AudioCoverRemover.remove_cover(path, memory_budget=BUDGET)
+
+    assert not result.success
+    assert read(path) == cut
+
+
+def test_read_only_file_without_cover_reports_no_cover(tmp_path, monkeypatch):
+    path = fixtures.write_flac(str(tmp_path / 'a.flac'), padding=4096)  # 元数据超过 BUDGET
+    make_read_only(monkeypatch, path)
+
+    result = AudioCoverRemover.remove_cover(path, memory_budget=BUDGET, prefilter=False)
+
+    assert result.outcome == Outcome.NO_COVER
+
+
+@pytest.mark.parametrize('fixture', ('mp3', 'flac'))
+def test_read_only_file_with_cover_is_left_unchanged(tmp_path, monkeypatch, fixture):
+    path = covered_file(tmp_path, fixture)
+    original = read(path)
+    make_read_only(monkeypatch, path)
+
+    result = AudioCoverRemover.remove_cover(path, memory_budget=BUDGET)
+
+    assert result.outcome == Outcome.PROCESS_ERROR
+    assert read(path) == original
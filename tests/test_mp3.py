@@ -0,0 +1,35 @@
+"""MP3 文件头识别: 帧同步字必须在文件开头或紧跟 ID3v2 标签"""
+import io
+
+import pytest
+
+from AudioCoverRemover import AudioCoverRemover
+from benchmarks import fixtures
+
+FRAME = fixtures.mp3_frames(1)
+TAG = fixtures.id3_tag([fixtures.text_frame(b'TIT2', 'a')], 0)
+
+
+@pytest.mark.parametrize('data', (FRAME, TAG + FRAME, TAG + b'\x00' * 100 + FRAME),
+                         ids=('untagged', 'tagged', 'zero_padding'))
+def test_frame_sync_at_start_or_after_tag_is_accepted(data):
+    assert AudioCoverRemover._sniff_mp3(io.BytesIO(data)) == (True, len(TAG) if data != FRAME else 0)
+
+
+@pytest.mark.parametrize('data', (
+    b'\x00' + FRAME,  # 没有标签时同步字不在开头
+    b'RIFF\xff\xe0' + FRAME,
+    TAG + b'junk' + FRAME,  # 标签和同步字之间有非零数据
+    TAG + b'\x00' * 10 + b'\x01\xff\xfb' + FRAME,
+    TAG + b'\x00' * 100,
+), ids=('untagged_offset', 'riff', 'junk_after_tag', 'nonzero_padding', 'no_frames'))
+def test_data_without_frame_sync_in_place_is_rejected(data):
+    assert not AudioCoverRemover._sniff_mp3(io.BytesIO(data))[0]
+
+
+def test_random_data_after_tag_is_not_an_mp3(tmp_path):
+    path = str(tmp_path / 'a.mp3')
+    with open(path, 'wb') as f:
+        f.write(TAG + b'\x12' + b'\xff\xe3' * 2000)
+
+    assert not AudioCoverRemover.remove_cover(path).success
@@ -0,0 +1,51 @@
+"""MP4 / M4A: covr 原子移出 ilst 并改写为 free 原子, mdat 不移动"""
+import pytest
+
+from AudioCoverRemover import AudioCoverRemover, Outcome
+from benchmarks import fixtures
+from helpers import check_removes_only_pictures, covered_file, cut_inside_cover, make_read_only, read
+
+
+@pytest.mark.parametrize('in_place', (False, True))
+@pytest.mark.parametrize('fixture', ('m4a', 'm4a_moov_last', 'm4a_cover_middle'))
+def test_removes_only_pictures(tmp_path, fixture, in_place):
+    path = covered_file(tmp_path, fixture)
+
+    result = check_removes_only_pictures(path, lambda p: (AudioCoverRemover.remove_cover(p, in_place=in_place), p))
+
+    assert result.method == 'inplace'
+
+
+def test_file_without_cover_is_not_written(tmp_path):
+    path = fixtures.write_mp4(str(tmp_path / 'a.m4a'))
+    original = read(path)
+
+    assert AudioCoverRemover.remove_cover(path).outcome == Outcome.NO_COVER
+    assert read(path) == original
+
+
+def test_read_only_file_without_cover_reports_no_cover(tmp_path, monkeypatch):
+    path = fixtures.write_mp4(str(tmp_path / 'a.m4a'))
+    make_read_only(monkeypatch, path)
+
+    assert AudioCoverRemover.remove_cover(path, prefilter=False).outcome == Outcome.NO_COVER
+
+
+def test_read_only_file_with_cover_is_left_unchanged(tmp_path, monkeypatch):
+    path = covered_file(tmp_path, 'm4a')
+    original = read(path)
+    make_read_only(monkeypatch, path)
+
+    assert AudioCoverRemover.remove_cover(path).outcome == Outcome.PROCESS_ERROR
+    assert read(path) == original
+
+
+@pytest.mark.parametrize('in_place', (False, True))
+def test_file_cut_inside_the_cover_is_left_unchanged(tmp_path, in_place):
+    path = covered_file(tmp_path, 'm4a')
+    cut = cut_inside_cover(path)
+
+    result = AudioCoverRemover.remove_cover(path, in_place=in_place)
+
+    assert not result.success
+    assert read(path) == cut
@@ -0,0 +1,50 @@
+"""指定输出目录: 流式写出去掉封面的文件, 源文件保持不变"""
+import os
+
+import pytest
+
+from AudioCoverRemover import AudioCoverRemover, FastCopy, Outcome
+from benchmarks import fixtures
+from helpers import COVERED, check_removes_only_pictures, covered_file, read
+
+
+def _to_output_dir(tmp_path, **options):
+    def process(path):
+        result = AudioCoverRemover.remove_cover(path, output_dir=str(tmp_path / 'out'),
+                                                source_root=str(tmp_path), **options)
+        return result, str(tmp_path / 'out' / os.path.basename(path))
+    return process
+
+
+@pytest.mark.parametrize('fixture', sorted(COVERED))
+def test_removes_only_pictures(tmp_path, fixture):
+    path = covered_file(tmp_path, fixture)
+
+    result = check_removes_only_pictures(path, _to_output_dir(tmp_path))
+
+    if fixture in ('mp3', 'flac'):
+        assert result.method == 'stream'  # 只读取一次源文件
+
+
+def test_subdirectories_are_kept(tmp_path):
+    os.makedirs(tmp_path / 'album' / 'disc1')
+    path = fixtures.write_flac(str(tmp_path / 'album' / 'disc1' / 'a.flac'), [20000])
+
+    AudioCoverRemover.remove_cover(path, output_dir=str(tmp_path / 'out'), source_root=str(tmp_path))
+
+    assert os.path.exists(tmp_path / 'out' / 'album' / 'disc1' / 'a.flac')
+
+
+@pytest.mark.parametrize('hardlink', (False, True))
+def test_files_without_cover_are_hardlinked_only_on_request(tmp_path, monkeypatch, hardlink):
+    monkeypatch.setattr(FastCopy, 'reflink', staticmethod(lambda src, dst: False))
+    path = fixtures.write_flac(str(tmp_path / 'a.flac'))
+    original = read(path)
+
+    result = AudioCoverRemover.remove_cover(path, output_dir=str(tmp_path / 'out'),
+                                            source_root=str(tmp_path), hardlink=hardlink)
+
+    output = str(tmp_path / 'out' / 'a.flac')
+    assert result.outcome == Outcome.NO_COVER
+    assert read(output) == original
+    assert os.path.samefile(path, output) == hardlink
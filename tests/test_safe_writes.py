@@ -0,0 +1,175 @@
+"""--safe-writes: 修改先记入日志, 成批落盘后再应用; 崩溃后按日志补完或回滚"""
+import json
+import os
+
+import pytest
+
+from AudioCoverRemover import JOURNAL_OWNER, TEMP_PREFIX, AudioCoverRemover, JournalBusyError, Outcome, TagLayout, \
+    WriteJournal
+from benchmarks import fixtures
+from helpers import COVERED, JPEG_MAGIC, NO_COVER, audio_payload, check_removes_only_pictures, covered_file, read, \
+    read_tags, run_cli, write
+
+
+def _staged(tmp_path, in_place: bool):
+    def process(path):
+        journal = WriteJournal(str(tmp_path / 'journal'))
+        results = []
+        result = AudioCoverRemover.remove_cover(path, in_place=in_place, staged=journal.directory)
+        journal.add(path, result, lambda _, committed: results.append(committed))
+        journal.close()
+        assert not [name for name in os.listdir(tmp_path) if name.startswith(TEMP_PREFIX)]
+        return results[0], path
+    return process
+
+
+@pytest.mark.parametrize('in_place', (False, True))
+@pytest.mark.parametrize('fixture', sorted(COVERED))
+def test_removes_only_pictures(tmp_path, fixture, in_place):
+    check_removes_only_pictures(covered_file(tmp_path, fixture), _staged(tmp_path, in_place))
+
+
+@pytest.mark.parametrize('fixture', sorted(NO_COVER))
+def test_files_without_cover_are_not_written(tmp_path, fixture):
+    name, write_file = NO_COVER[fixture]
+    path = write_file(str(tmp_path / name))
+    original = read(path)
+
+    result, _ = _staged(tmp_path, False)(path)
+
+    assert result.outcome == Outcome.NO_COVER
+    assert read(path) == original
+
+
+# ---- 崩溃恢复 ----
+
+class _Crash(BaseException):
+    """模拟进程在提交过程中被杀死"""
+
+
+def _stage_batch(tmp_path, monkeypatch):
+    """暂存三种修改 (原地补丁、临时副本改名、补丁加截断), 在日志落盘之后、修改写入之前崩溃
+
+    返回 {文件路径: 原内容} 和日志目录。
+    """
+    paths = {
+        fixtures.write_mp3(str(tmp_path / 'a.mp3'), cover_size=20000): True,
+        fixtures.write_flac(str(tmp_path / 'b.flac'), [20000]): False,
+        fixtures.write_wav(str(tmp_path / 'c.wav'), cover_size=20000): False,
+    }
+    originals = {path: read(path) for path in paths}
+    journal = WriteJournal(str(tmp_path / 'journal'))
+    for path, in_place in paths.items():
+        journal.add(path, AudioCoverRemover.remove_cover(path, in_place=in_place, staged=journal.directory))
+
+    def crash(op):
+        raise _Crash()
+    monkeypatch.setattr(WriteJournal, '_apply', staticmethod(crash))
+    with pytest.raises(_Crash):
+        journal.commit()
+    monkeypatch.undo()
+    os.close(journal._lock)  # 进程退出时由系统释放
+    assert {path: read(path) for path in paths} == originals
+    return originals, journal.directory
+
+
+def _journal_entries(directory: str):
+    [name] = [name for name in os.listdir(directory) if name.endswith('.jnl')]
+    with open(os.path.join(directory, name), encoding='utf-8') as f:
+        return os.path.join(directory, name), [json.loads(line) for line in f]
+
+
+def _audio_payload_of(tmp_path, path: str, data: bytes) -> bytes:
+    """原内容的音频数据"""
+    copy = str(tmp_path / ('original' + os.path.splitext(path)[1]))
+    write(copy, data)
+    return audio_payload(copy)
+
+
+def test_committed_batch_is_replayed(tmp_path, monkeypatch):
+    originals, directory = _stage_batch(tmp_path, monkeypatch)
+
+    assert WriteJournal.recover(directory) == (1, 0, 0)
+
+    for path, original in originals.items():
+        assert read_tags(path)[0] == 0
+        assert audio_payload(path) == _audio_payload_of(tmp_path, path, original)
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(TEMP_PREFIX)]
+    assert os.listdir(directory) == [JOURNAL_OWNER]  # 只剩下加锁的文件
+
+
+def test_incomplete_batch_is_rolled_back(tmp_path, monkeypatch):
+    originals, directory = _stage_batch(tmp_path, monkeypatch)
+    journal_path, entries = _journal_entries(directory)
+    with open(journal_path, 'w', encoding='utf-8') as f:  # 写到一半时崩溃: 没有提交标记
+        for entry in entries[:-1]:
+            f.write(json.dumps(entry) + '\n')
+
+    replayed, rolled_back, removed = WriteJournal.recover(directory)
+
+    assert (replayed, rolled_back) == (0, 1)
+    assert removed == 1  # b.flac 的临时副本
+    assert {path: read(path) for path in originals} == originals
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(TEMP_PREFIX)]
+
+
+def test_replay_skips_files_changed_since_staging(tmp_path, monkeypatch):
+    originals, directory = _stage_batch(tmp_path, monkeypatch)
+    path = str(tmp_path / 'a.mp3')
+    changed = bytearray(originals[path])
+    start = changed.index(JPEG_MAGIC)
+    changed[start:start + 4] = b'edit'  # 大小不变, 只改动补丁要清零的区域
+    write(path, bytes(changed))
+
+    WriteJournal.recover(directory)
+
+    assert read(path) == bytes(changed)
+    assert read_tags(str(tmp_path / 'b.flac'))[0] == 0
+
+
+def test_partially_applied_patch_is_completed(tmp_path, monkeypatch):
+    originals, directory = _stage_batch(tmp_path, monkeypatch)
+    _, entries = _journal_entries(directory)
+    op = WriteJournal._decode(next(entry for entry in entries if entry.get('path') == str(tmp_path / 'a.mp3')))
+    with open(op[1], 'rb+') as f:
+        TagLayout.apply_patches(f, op[2][:1])  # 提交时只写入了第一个补丁
+
+    WriteJournal.recover(directory)
+
+    path = str(tmp_path / 'a.mp3')
+    assert read_tags(path)[0] == 0
+    assert audio_payload(path) == _audio_payload_of(tmp_path, path, originals[path])
+
+
+def test_temp_copy_of_crashed_worker_is_removed(tmp_path):
+    directory = str(tmp_path / 'journal')
+    os.makedirs(directory)
+    temp = str(tmp_path / (TEMP_PREFIX + 'a.flac'))
+    WriteJournal.log_temp(directory, temp)
+    fixtures.write_flac(temp, [20000])  # 工作进程复制完后崩溃, 结果没有交给主进程
+
+    assert WriteJournal.recover(directory) == (0, 0, 1)
+    assert not os.path.exists(temp)
+
+
+def test_journal_in_use_is_left_alone(tmp_path, capsys):
+    directory = str(tmp_path / 'journal')
+    journal = WriteJournal(directory)
+    path = fixtures.write_flac(str(tmp_path / 'a.flac'), [20000])
+    journal.add(path, AudioCoverRemover.remove_cover(path, staged=directory))
+    [temp] = [name for name in os.listdir(tmp_path) if name.startswith(TEMP_PREFIX)]
+    staged = sorted(os.listdir(directory))
+
+    with pytest.raises(JournalBusyError):
+        WriteJournal.recover(directory)
+    with pytest.raises(JournalBusyError):
+        WriteJournal(directory)
+    code, _, lines = run_cli(capsys, '--recover', '--journal', directory)
+    assert code == 1
+    assert any(line.startswith(f'Journal directory {directory} is in use by another run') for line in lines)
+    assert sorted(os.listdir(directory)) == staged
+    assert os.path.exists(tmp_path / temp)
+
+    journal.close()
+    assert read_tags(path)[0] == 0
+    assert WriteJournal.recover(directory) == (0, 0, 0)
@@ -0,0 +1,68 @@
+"""FileProcessor.iter_audio_files: 流式扫描目录"""
+import os
+
+from AudioCoverRemover import TEMP_PREFIX, FileProcessor, _iter_cli_tasks
+
+
+def _touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+    return str(path)
+
+
+def _library(tmp_path):
+    names = ['a.mp3', 'B.FLAC', 'notes.txt', TEMP_PREFIX + 'x.mp3', 'sub/c.m4a', 'sub/deep/d.ogg',
+             '@eaDir/e.mp3', '.hidden/f.wav']
+    for name in names:
+        _touch(tmp_path / name)
+    return str(tmp_path)
+
+
+def _found(root, **options):
+    return sorted(os.path.relpath(path, root) for path in FileProcessor.iter_audio_files(root, **options))
+
+
+def test_top_level_only_without_recursion(tmp_path):
+    root = _library(tmp_path)
+
+    assert _found(root) == ['B.FLAC', 'a.mp3']
+
+
+def test_recursive_scan_skips_temp_copies_and_other_files(tmp_path):
+    root = _library(tmp_path)
+
+    assert _found(root, recursive=True) == [
+        os.path.join('.hidden', 'f.wav'), os.path.join('@eaDir', 'e.mp3'), 'B.FLAC', 'a.mp3',
+        os.path.join('sub', 'c.m4a'), os.path.join('sub', 'deep', 'd.ogg')]
+
+
+def test_excluded_directories_are_not_entered(tmp_path):
+    root = _library(tmp_path)
+
+    assert _found(root, recursive=True, exclude=['@eaDir', '.*']) == [
+        'B.FLAC', 'a.mp3', os.path.join('sub', 'c.m4a'), os.path.join('sub', 'deep', 'd.ogg')]
+
+
+def test_directory_symlinks_are_not_followed(tmp_path):
+    root = _library(tmp_path / 'lib')
+    os.symlink(str(tmp_path / 'lib' / 'sub'), str(tmp_path / 'lib' / 'link'))
+
+    assert os.path.join('link', 'c.m4a') not in _found(root, recursive=True)
+
+
+def test_single_file_argument(tmp_path):
+    path = _touch(tmp_path / 'a.mp3')
+    other = _touch(tmp_path / 'notes.txt')
+
+    assert list(FileProcessor.iter_audio_files(path)) == [path]
+    assert list(FileProcessor.iter_audio_files(other)) == []
+
+
+def test_cli_tasks_carry_their_source_root(tmp_path):
+    root = _library(tmp_path / 'lib')
+    single = _touch(tmp_path / 'other' / 'g.mp3')
+
+    tasks = list(_iter_cli_tasks([root, single], recursive=False))
+
+    assert sorted(tasks) == sorted([(os.path.join(root, 'a.mp3'), root), (os.path.join(root, 'B.FLAC'), root),
+                                    (single, str(tmp_path / 'other'))])
@@ -0,0 +1,58 @@
+"""IOScheduler: 写入限速、按设备限制并发和按延迟目标调整并发数"""
+import os
+
+import pytest
+
+from AudioCoverRemover import AudioCoverRemover, CoverResult, IOScheduler, Outcome
+from benchmarks import fixtures
+
+
+def _done(scheduler, device=None, bytes_written=0, elapsed=0.0):
+    scheduler.on_submit(device)
+    scheduler.on_complete(device, CoverResult(Outcome.COVER_REMOVED, bytes_written=bytes_written, elapsed=elapsed))
+
+
+def test_write_limit_waits_until_the_debt_is_repaid():
+    scheduler = IOScheduler(4, write_rate=1000)
+    assert scheduler.throttle_delay() == 0.0
+
+    _done(scheduler, bytes_written=3000)
+
+    assert scheduler.throttle_delay() == pytest.approx(2.0, abs=0.1)
+
+
+def test_mutagen_save_is_charged_the_bytes_it_wrote(tmp_path):
+    # 小封面去掉后 mutagen 只把空出的位置改为填充, 不移动音频数据
+    path = fixtures.write_flac(str(tmp_path / 'a.flac'), [3000])
+
+    result = AudioCoverRemover.remove_cover(path, prefilter=False)
+
+    assert (result.outcome, result.method) == (Outcome.COVER_REMOVED, 'mutagen')
+    assert 0 < result.bytes_written < os.path.getsize(path) // 4
+
+
+def test_per_device_limit():
+    scheduler = IOScheduler(4, per_device=1)
+    scheduler.on_submit(1)
+
+    assert not scheduler.device_free(1)
+    assert scheduler.device_free(2)
+    assert scheduler.device_free(None)
+
+    scheduler.on_complete(1, CoverResult(Outcome.COVER_REMOVED))
+    assert scheduler.device_free(1)
+    assert scheduler.stats()['peak_per_device'] == {'1': 1}
+
+
+def test_latency_target_adjusts_concurrency():
+    scheduler = IOScheduler(8, latency_target=0.05, window=4)
+    assert scheduler.limit == 4
+
+    for _ in range(4):
+        _done(scheduler, elapsed=0.01)
+    assert scheduler.limit == 5
+
+    for _ in range(4):
+        _done(scheduler, elapsed=0.2)
+    assert scheduler.limit == 3
+    assert [decision['reason'] for decision in scheduler.stats()['decisions']] == ['increase', 'latency']
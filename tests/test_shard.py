@@ -0,0 +1,172 @@
+"""--shard: 各节点按相对路径的哈希分担文件, 处理记录合并后与普通运行使用同一套主键"""
+import os
+import sqlite3
+import time
+
+import pytest
+
+from AudioCoverRemover import Manifest, WorkLocks, _shard_of
+from benchmarks import fixtures
+from helpers import run_cli
+
+
+def _library(tmp_path, count: int = 12):
+    library = tmp_path / 'music'
+    (library / 'album').mkdir(parents=True)
+    paths = [fixtures.write_flac(str(library / 'album' / f'{i:02}.flac'), [2000]) for i in range(count)]
+    return str(library), paths
+
+
+def _mount(tmp_path, library: str, name: str) -> str:
+    """同一个音乐库的另一个挂载位置"""
+    mount = str(tmp_path / name)
+    os.symlink(library, mount)
+    return mount
+
+
+def test_shards_split_the_library_without_overlap(tmp_path, capsys):
+    library, paths = _library(tmp_path)
+
+    shards = [set(run_cli(capsys, '-r', '--shard', f'{i}/3', library)[1]) for i in (1, 2, 3)]
+
+    assert sorted(shards[0] | shards[1] | shards[2]) == paths
+    assert sum(map(len, shards)) == len(paths)
+    assert all(shards)
+
+
+def test_assignment_does_not_depend_on_the_mount_point(tmp_path):
+    library, paths = _library(tmp_path)
+    mount = _mount(tmp_path, library, 'mnt')
+
+    for path in paths:
+        moved = os.path.join(mount, os.path.relpath(path, library))
+        assert _shard_of(path, library, 4) == _shard_of(moved, mount, 4)
+
+
+def test_merged_manifest_matches_later_runs(tmp_path, capsys):
+    library, paths = _library(tmp_path, 10)
+    db = str(tmp_path / 'library.db')
+    for i, mount in ((1, library), (2, _mount(tmp_path, library, 'node2')), (3, _mount(tmp_path, library, 'node3'))):
+        run_cli(capsys, '-r', '--manifest', db, '--shard', f'{i}/3', mount)
+
+    code, _, lines = run_cli(capsys, '--manifest', db, '--merge-manifests',
+                             *(str(tmp_path / f'library.shard-{i}-of-3.db') for i in (1, 2, 3)))
+    assert code == 0
+    assert 'Merged 3 shard manifests: 10 files, 10 succeeded, 0 failed' in lines
+
+    code, processed, lines = run_cli(capsys, '-r', '--manifest', db, library)
+    assert (code, processed) == (0, {})
+    assert 'Skipped 10 unchanged files' in lines
+
+
+def test_merge_reads_manifests_of_the_first_schema(tmp_path):
+    shard = str(tmp_path / 'library.shard-1-of-2.db')
+    with sqlite3.connect(shard) as conn:  # 版本 1: 没有 options 列, 列的顺序也不同
+        conn.execute('CREATE TABLE files (path TEXT PRIMARY KEY, updated REAL NOT NULL, size INTEGER NOT NULL,'
+                     ' mtime_ns INTEGER NOT NULL, inode INTEGER NOT NULL, success INTEGER NOT NULL, outcome TEXT)'
+                     ' WITHOUT ROWID')
+        conn.execute("INSERT INTO files VALUES ('album/a.flac', 5, 100, 200, 300, 1, 'COVER_REMOVED')")
+    conn.close()
+
+    manifest = Manifest(str(tmp_path / 'library.db'))
+    assert manifest.merge(shard) == 1
+    assert manifest.conn.execute('SELECT * FROM files').fetchall() == [
+        ('album/a.flac', 100, 200, 300, 1, 'COVER_REMOVED', 5.0, '')]
+    manifest.close()
+
+
+def test_rows_recorded_with_absolute_paths_are_made_relative(tmp_path):
+    library, paths = _library(tmp_path, 2)
+    db = str(tmp_path / 'library.db')
+    with sqlite3.connect(db) as conn:
+        conn.execute('CREATE TABLE files (path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,'
+                     ' inode INTEGER NOT NULL, success INTEGER NOT NULL, outcome TEXT, updated REAL NOT NULL,'
+                     " options TEXT NOT NULL DEFAULT '') WITHOUT ROWID")
+        for path in paths:
+            st = os.stat(path)
+            conn.execute("INSERT INTO files VALUES (?, ?, ?, ?, 1, 'COVER_REMOVED', 0, '{}')",
+                         (path, st.st_size, st.st_mtime_ns, st.st_ino))
+        conn.execute("INSERT INTO files VALUES ('/elsewhere/b.mp3', 1, 1, 1, 1, 'NO_COVER', 0, '{}')")
+    conn.close()
+
+    manifest = Manifest(db, options='{}', roots=[library])
+
+    assert [row[0] for row in manifest.conn.execute('SELECT path FROM files ORDER BY path')] == [
+        '/elsewhere/b.mp3', 'album/00.flac', 'album/01.flac']
+    assert all(manifest.is_current(path) for path in paths)
+    manifest.close()
+
+
+# ---- --steal 锁文件 ----
+
+@pytest.fixture
+def nodes(tmp_path):
+    """共享同一个锁目录的多个节点"""
+    created = []
+
+    def node(timeout: float = 600.0) -> WorkLocks:
+        created.append(WorkLocks(str(tmp_path / 'locks'), timeout))
+        return created[-1]
+    yield node
+    for locks in created:
+        locks.close()
+
+
+def _age(locks: WorkLocks, file_path: str, seconds: float):
+    """把锁的修改时间改为 seconds 秒之前, 模拟持有锁的节点已退出"""
+    lock = locks.claimed[file_path][1]
+    past = time.time() - seconds
+    os.utime(lock, (past, past))
+
+
+def test_claimed_and_finished_files_are_not_claimed_again(tmp_path, nodes):
+    first, second = nodes(), nodes(timeout=0)
+    path = str(tmp_path / 'a.flac')
+
+    assert first.claim(path, str(tmp_path))
+    assert not nodes().claim(path, str(tmp_path))
+    first.done(path)
+    assert not second.claim(path, str(tmp_path))  # 已完成的文件不会被接管
+
+
+def test_stale_lock_is_taken_over_by_one_node(tmp_path, nodes):
+    owner = nodes()
+    path = str(tmp_path / 'a.flac')
+    owner.claim(path, str(tmp_path))
+    _age(owner, path, 1000)
+
+    assert [node.claim(path, str(tmp_path)) for node in (nodes(), nodes(), nodes())] == [True, False, False]
+
+
+def test_locks_of_files_in_flight_are_refreshed(tmp_path, nodes):
+    owner = nodes(timeout=0.4)
+    path = str(tmp_path / 'a.flac')
+    owner.claim(path, str(tmp_path))
+    _age(owner, path, 1000)
+
+    time.sleep(0.3)  # 心跳间隔为 timeout 的 1/4
+
+    assert not nodes(timeout=0.4).claim(path, str(tmp_path))
+
+
+def test_clock_skew_between_nodes_does_not_steal_fresh_locks(tmp_path, nodes, monkeypatch):
+    owner = nodes()
+    path = str(tmp_path / 'a.flac')
+    owner.claim(path, str(tmp_path))
+
+    real_time = time.time
+    monkeypatch.setattr(time, 'time', lambda: real_time() + 3600)  # 本节点的时钟快一小时
+
+    assert not nodes().claim(path, str(tmp_path))
+
+
+def test_steal_takes_over_files_of_other_shards(tmp_path, capsys):
+    library, paths = _library(tmp_path, 8)
+    lock_dir = str(tmp_path / 'locks')
+
+    code, processed, lines = run_cli(capsys, '-r', '--stats', '--shard', '1/2', '--steal', lock_dir, library)
+    own = {path for path in paths if _shard_of(path, library, 2) == 0}
+    assert sorted(processed) == paths
+    assert f"{'stolen':<20}{len(paths) - len(own):>10}" in lines
+
+    assert run_cli(capsys, '-r', '--shard', '2/2', '--steal', lock_dir, library)[1] == {}
@@ -0,0 +1,102 @@
+"""--watch: 监视目录, 文件停止变化后处理, 自身写入不会导致重复处理"""
+import os
+import sys
+import time
+
+import pytest
+
+import AudioCoverRemover as acr
+from AudioCoverRemover import FolderWatcher, Outcome
+from helpers import covered_file, read_tags
+
+
+class _Scans(acr._PollingSource):
+    """测试用事件源: 快速轮询, 每次扫描前调用 before_scan, 扫描 scans 次后中断"""
+
+    def __init__(self, roots, recursive, exclude, scans, before_scan):
+        super().__init__(roots, recursive, exclude, interval=0.05)
+        self.scans = scans
+        self.before_scan = before_scan
+
+    def wait(self, timeout):
+        if self.scans == 0:
+            raise KeyboardInterrupt
+        self.scans -= 1
+        self.before_scan(self.scans)
+        return super().wait(0.05)
+
+
+def _watch(monkeypatch, root, scans=20, before_scan=lambda left: None, **options):
+    results = []
+    watcher = FolderWatcher([root], jobs=1, settle=0.1, use_inotify=False,
+                            on_result=lambda path, result: results.append((path, result)), **options)
+    monkeypatch.setattr(watcher, '_open_source',
+                        lambda: _Scans(watcher.roots, watcher.recursive, watcher.exclude, scans, before_scan))
+    with pytest.raises(KeyboardInterrupt):
+        watcher.run()
+    return watcher, results
+
+
+def test_files_are_processed_once(tmp_path, monkeypatch):
+    os.makedirs(tmp_path / 'sub')
+    paths = [covered_file(tmp_path, 'mp3'), covered_file(tmp_path / 'sub', 'flac')]
+
+    watcher, results = _watch(monkeypatch, str(tmp_path), recursive=True, prefilter=False)
+
+    assert sorted(path for path, _ in results) == sorted(paths)
+    assert all(result.outcome == Outcome.COVER_REMOVED for _, result in results)
+    assert all(read_tags(path)[0] == 0 for path in paths)
+    assert (watcher.processed, watcher.failed) == (2, 0)
+
+
+def test_files_arriving_later_are_picked_up(tmp_path, monkeypatch):
+    arrived = []
+
+    def before_scan(left):
+        if left == 10:
+            arrived.append(covered_file(tmp_path, 'm4a'))
+
+    _, results = _watch(monkeypatch, str(tmp_path), before_scan=before_scan)
+
+    assert [path for path, _ in results] == arrived
+    assert read_tags(arrived[0])[0] == 0
+
+
+def test_files_still_changing_wait_to_settle(tmp_path):
+    path = covered_file(tmp_path, 'mp3')
+    watcher = FolderWatcher([str(tmp_path)], settle=0.0, use_inotify=False)
+
+    watcher._touch(path)
+    with open(path, 'ab') as f:
+        f.write(b'\x00' * 16)
+
+    assert watcher._take_ready() == []
+    assert watcher._take_ready() == [path]
+
+
+def test_output_dir_inside_the_watched_folder_is_ignored(tmp_path):
+    output_dir = tmp_path / 'out'
+    os.makedirs(output_dir)
+    path = covered_file(output_dir, 'mp3')
+    watcher = FolderWatcher([str(tmp_path)], output_dir=str(output_dir), settle=0.0, use_inotify=False)
+
+    watcher._touch(path)
+
+    assert watcher._take_ready() == []
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='inotify')
+def test_inotify_reports_new_files_in_new_subdirectories(tmp_path):
+    source = acr._InotifySource([str(tmp_path)], True)
+    try:
+        assert source.wait(0) == []  # 第一次返回已有的文件
+        os.makedirs(tmp_path / 'album')
+        path = covered_file(tmp_path / 'album', 'mp3')
+        seen = set()
+        deadline = time.monotonic() + 5
+        while path not in seen and time.monotonic() < deadline:
+            seen.update(source.wait(0.2))
+    finally:
+        source.close()
+
+    assert path in seen